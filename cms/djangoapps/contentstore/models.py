@@ -2,10 +2,19 @@
 Models for contentstore
 """
 # pylint: disable=no-member
+import json
 
+from django.conf import settings
 from django.db.models.fields import TextField
+from django.dispatch import receiver
+from model_utils.models import TimeStampedModel
+from opaque_keys.edx.locator import LibraryLocator
 
 from config_models.models import ConfigurationModel
+from contentstore.tasks import prewarm_course_safe_exec_cache, prewarm_course_structure_cache, update_search_index
+from util.models import CompressedTextField
+from xmodule.modulestore.django import SignalHandler
+from xmodule_django.models import CourseKeyField
 
 
 class VideoUploadConfig(ConfigurationModel):
@@ -19,3 +28,45 @@ class VideoUploadConfig(ConfigurationModel):
     def get_profile_whitelist(cls):
         """Get the list of profiles to include in the encoding download"""
         return [profile for profile in cls.current().profile_whitelist.split(",") if profile]
+
+
+class CoursewareSearchIndexState(TimeStampedModel):
+    """
+    The content hashes of the documents of a course in the courseware search
+    index, so that only the documents which changed are indexed again when the
+    course is published.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True, unique=True, verbose_name='Course ID')
+    hashes_json = CompressedTextField(blank=True, null=True)
+
+    @property
+    def hashes(self):
+        """
+        The content hashes of the indexed documents, by document id, or None
+        if the course hasn't been indexed yet.
+        """
+        if self.hashes_json:
+            return json.loads(self.hashes_json)
+        return None
+
+    @hashes.setter
+    def hashes(self, value):
+        """
+        Sets the content hashes of the indexed documents.
+        """
+        self.hashes_json = json.dumps(value)
+
+
+@receiver(SignalHandler.course_published)
+def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Prewarm the caches of the published course, as enabled by
+    settings.SPLIT_STRUCTURE_CACHE and settings.SAFE_EXEC_CACHE, and update
+    its courseware search index if it is enabled.
+    """
+    if settings.SPLIT_STRUCTURE_CACHE['ENABLED'] and settings.SPLIT_STRUCTURE_CACHE['PREWARM_ON_PUBLISH']:
+        prewarm_course_structure_cache.delay(unicode(course_key))
+    if settings.SAFE_EXEC_CACHE['PREWARM_ON_PUBLISH']:
+        prewarm_course_safe_exec_cache.delay(unicode(course_key))
+    if settings.FEATURES.get('ENABLE_COURSEWARE_INDEX') and not isinstance(course_key, LibraryLocator):
+        update_search_index.delay(unicode(course_key))
@@ -3,9 +3,14 @@ This file contains celery tasks for contentstore views
 """
 
 from celery.task import task
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 import json
 import logging
+from xmodule.capa_base import randomization_seeds
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.courseware_index import CoursewareSearchIndexer
 from xmodule.modulestore.django import modulestore
 from xmodule.course_module import CourseFields
 
@@ -13,6 +18,7 @@ from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundErr
 from course_action_state.models import CourseRerunState
 from contentstore.utils import initialize_permissions
 from opaque_keys.edx.keys import CourseKey
+from util.sandboxing import get_safe_exec_cache, prewarm_safe_exec_cache
 
 
 @task()
@@ -66,3 +72,69 @@ def deserialize_fields(json_fields):
     for field_name, value in fields.iteritems():
         fields[field_name] = getattr(CourseFields, field_name).from_json(value)
     return fields
+
+
+@task()
+def prewarm_course_structure_cache(course_key_string):
+    """
+    Loads the published structure of a course, so that it is cached for the
+    processes which will serve it.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        store.get_course(course_key, depth=0)
+
+
+@task()
+def prewarm_course_safe_exec_cache(course_key_string):
+    """
+    Runs the code of the problems of a published course for all the seeds they
+    can get, so that its results are cached before students load them.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    max_seeds = settings.SAFE_EXEC_CACHE['PREWARM_MAX_SEEDS']
+    cache = get_safe_exec_cache()
+    misses = cache.misses
+
+    store = modulestore()
+    loaded = 0
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        for problem in store.get_items(course_key, qualifiers={'category': 'problem'}):
+            seeds = randomization_seeds(problem.rerandomize)[:max_seeds]
+            loaded += prewarm_safe_exec_cache(problem, seeds)
+
+    logging.info(
+        u"Prewarmed the safe_exec cache for %s: %d problem variants loaded, %d not cached yet",
+        course_key, loaded, cache.misses - misses
+    )
+
+
+@task()
+def update_search_index(course_key_string):
+    """
+    Updates the courseware search index of a published course, sending only
+    the documents which changed since it was last indexed.
+    """
+    # Imported here because the models of contentstore dispatch these tasks
+    from contentstore.models import CoursewareSearchIndexState
+
+    course_key = CourseKey.from_string(course_key_string)
+    try:
+        with transaction.commit_on_success():
+            CoursewareSearchIndexState.objects.get_or_create(course_id=course_key)
+    except IntegrityError:
+        # another task created the state of the course meanwhile
+        pass
+
+    # The state of the course is locked while the course is indexed, so that the
+    # tasks indexing it run one after the other, each reading the course and the
+    # hashes once the previous one is done
+    with transaction.commit_on_success():
+        state = CoursewareSearchIndexState.objects.select_for_update().get(course_id=course_key)
+        hashes, error_list = CoursewareSearchIndexer.index_course(modulestore(), course_key, state.hashes)
+        if hashes is not None:
+            state.hashes = hashes
+            state.save()
+    if error_list:
+        logging.warning(u"Errors while indexing %s for courseware search: %s", course_key, u", ".join(error_list))
@@ -0,0 +1,82 @@
+"""
+Tests for prewarming the safe_exec cache when a course is published.
+"""
+import textwrap
+
+from django.core.cache import get_cache
+from django.test.utils import override_settings
+import mock
+
+from capa.safe_exec import SafeExecCache
+from contentstore.tasks import prewarm_course_safe_exec_cache
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+PROBLEM_DATA = textwrap.dedent("""
+    <problem>
+        <script type="loncapa/python" student_independent="true">
+            x = random.randint(1, 1000)
+        </script>
+        <p>What is $x?</p>
+    </problem>
+""")
+
+
+class PrewarmSafeExecCacheTest(ModuleStoreTestCase):
+    """
+    Test that the code of the problems of a course is run for all their seeds.
+    """
+    def setUp(self):
+        super(PrewarmSafeExecCacheTest, self).setUp()
+        self.course = CourseFactory.create()
+        self.cache = get_cache('default')
+        self.cache.clear()
+        patcher = mock.patch('util.sandboxing._safe_exec_cache', SafeExecCache(self.cache))
+        self.safe_exec_cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_problem(self, rerandomize, data=PROBLEM_DATA):
+        """
+        Create and publish a problem in the course.
+        """
+        return ItemFactory.create(
+            parent_location=self.course.location,
+            category='problem',
+            data=data,
+            metadata={'rerandomize': rerandomize},
+        )
+
+    def test_prewarm(self):
+        self.create_problem('never')
+        self.create_problem('per_student', data=PROBLEM_DATA.replace('1000', '100'))
+        prewarm_course_safe_exec_cache(unicode(self.course.id))
+        self.assertEqual(self.safe_exec_cache.misses, 1 + 20)
+        self.assertEqual(self.safe_exec_cache.hits, 0)
+
+        # Everything is cached the second time around
+        prewarm_course_safe_exec_cache(unicode(self.course.id))
+        self.assertEqual(self.safe_exec_cache.misses, 1 + 20)
+        self.assertEqual(self.safe_exec_cache.hits, 1 + 20)
+
+    @override_settings(SAFE_EXEC_CACHE={'PREWARM_MAX_SEEDS': 5, 'PREWARM_ON_PUBLISH': False})
+    def test_max_seeds(self):
+        self.create_problem('always')
+        prewarm_course_safe_exec_cache(unicode(self.course.id))
+        self.assertEqual(self.safe_exec_cache.misses, 5)
+
+    def test_skip_student_specific_problems(self):
+        self.create_problem('never', data=PROBLEM_DATA.replace(' student_independent="true"', ''))
+        self.create_problem('never', data='<problem><p>No code</p></problem>')
+        prewarm_course_safe_exec_cache(unicode(self.course.id))
+        self.assertEqual(self.safe_exec_cache.misses, 0)
+
+    @override_settings(SAFE_EXEC_CACHE={'PREWARM_MAX_SEEDS': 5, 'PREWARM_ON_PUBLISH': True})
+    def test_prewarm_on_publish(self):
+        with mock.patch('contentstore.models.prewarm_course_safe_exec_cache') as mock_task:
+            self.create_problem('never')
+        mock_task.delay.assert_called_with(unicode(self.course.id))
+
+    def test_no_prewarm_on_publish_by_default(self):
+        with mock.patch('contentstore.models.prewarm_course_safe_exec_cache') as mock_task:
+            self.create_problem('never')
+        self.assertFalse(mock_task.delay.called)
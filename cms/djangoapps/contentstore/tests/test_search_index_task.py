@@ -0,0 +1,117 @@
+"""
+Tests for updating the courseware search index when a course is published.
+"""
+import ddt
+from django.db import IntegrityError
+import mock
+
+from contentstore.models import CoursewareSearchIndexState
+from contentstore.tasks import update_search_index
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+@ddt.ddt
+class UpdateSearchIndexTest(ModuleStoreTestCase):
+    """
+    Test that only the documents which changed are sent to the search engine.
+    """
+    def setUp(self):
+        super(UpdateSearchIndexTest, self).setUp()
+        patcher = mock.patch('xmodule.modulestore.courseware_index.SearchEngine.get_search_engine')
+        self.searcher = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def create_course(self, default_store):
+        """
+        Create and publish a course with a unit, and forget that it was indexed.
+        """
+        self.course = CourseFactory.create(default_store=default_store)
+        self.chapter = ItemFactory.create(parent_location=self.course.location, category='chapter')
+        sequential = ItemFactory.create(parent_location=self.chapter.location, category='sequential')
+        vertical = ItemFactory.create(parent_location=sequential.location, category='vertical')
+        self.html = ItemFactory.create(
+            parent_location=vertical.location, category='html', data='<p>Original content</p>'
+        )
+        CoursewareSearchIndexState.objects.all().delete()
+        self.searcher.reset_mock()
+
+    @staticmethod
+    def document_id(block):
+        """
+        Returns the id of the index document of the given block.
+        """
+        return unicode(block.location.version_agnostic().for_branch(None))
+
+    def indexed_ids(self):
+        """
+        Returns the ids of the documents sent to the search engine.
+        """
+        return [call[0][1]['id'] for call in self.searcher.index.call_args_list]
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_index_changed_documents(self, default_store):
+        self.create_course(default_store)
+        update_search_index(unicode(self.course.id))
+        self.assertIn(self.document_id(self.html), self.indexed_ids())
+
+        # Nothing changed
+        self.searcher.reset_mock()
+        update_search_index(unicode(self.course.id))
+        self.assertFalse(self.searcher.index.called)
+
+        # Publishing the course updates the index of what changed only
+        self.html.data = '<p>Changed content</p>'
+        self.store.update_item(self.html, self.user.id)
+        self.store.publish(self.html.location, self.user.id)
+        self.assertEqual(self.indexed_ids(), [self.document_id(self.html)])
+        self.assertFalse(self.searcher.remove.called)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_remove_deleted_documents(self, default_store):
+        self.create_course(default_store)
+        update_search_index(unicode(self.course.id))
+
+        self.searcher.reset_mock()
+        with self.store.bulk_operations(self.course.id):
+            self.store.delete_item(self.chapter.location, self.user.id)
+        removed_ids = [call[0][1] for call in self.searcher.remove.call_args_list]
+        self.assertIn(self.document_id(self.chapter), removed_ids)
+        self.assertIn(self.document_id(self.html), removed_ids)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_remove_stale_documents(self, default_store):
+        self.create_course(default_store)
+        # e.g. the document of a block indexed under an id depending on the version of the course
+        stale_id = unicode(self.html.location) + '+version'
+        self.searcher.search.return_value = {
+            'results': [{'data': {'id': stale_id}}, {'data': {'id': self.document_id(self.html)}}],
+        }
+        update_search_index(unicode(self.course.id))
+        removed_ids = [call[0][1] for call in self.searcher.remove.call_args_list]
+        self.assertEqual(removed_ids, [stale_id])
+
+        # The index is only searched the first time around
+        self.searcher.reset_mock()
+        update_search_index(unicode(self.course.id))
+        self.assertFalse(self.searcher.search.called)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_retry_failed_documents(self, default_store):
+        self.create_course(default_store)
+        with mock.patch('xmodule.html_module.HtmlDescriptor.index_dictionary', side_effect=Exception):
+            update_search_index(unicode(self.course.id))
+        self.assertNotIn(self.document_id(self.html), self.indexed_ids())
+
+        self.searcher.reset_mock()
+        update_search_index(unicode(self.course.id))
+        self.assertEqual(self.indexed_ids(), [self.document_id(self.html)])
+
+    def test_state_created_concurrently(self):
+        self.create_course(ModuleStoreEnum.Type.split)
+        CoursewareSearchIndexState.objects.create(course_id=self.course.id)
+        with mock.patch.object(CoursewareSearchIndexState.objects, 'get_or_create', side_effect=IntegrityError):
+            update_search_index(unicode(self.course.id))
+        self.assertIn(self.document_id(self.html), self.indexed_ids())
+        self.assertIsNotNone(CoursewareSearchIndexState.objects.get(course_id=self.course.id).hashes)
@@ -116,14 +116,16 @@ class AccessListFallback(Exception):
     pass
 
 
-def get_course_and_check_access(course_key, user, depth=0):
+def get_course_and_check_access(course_key, user, depth=0, **kwargs):
     """
     Internal method used to calculate and return the locator and course module
     for the view functions in this file.
+
+    Any other keyword arguments, such as lazy, are passed to the modulestore.
     """
     if not has_studio_read_access(user, course_key):
         raise PermissionDenied()
-    course_module = modulestore().get_course(course_key, depth=depth)
+    course_module = modulestore().get_course(course_key, depth=depth, **kwargs)
     return course_module
 
 
@@ -250,7 +252,8 @@ def course_handler(request, course_key_string=None):
             if request.method == 'GET':
                 course_key = CourseKey.from_string(course_key_string)
                 with modulestore().bulk_operations(course_key):
-                    course_module = get_course_and_check_access(course_key, request.user, depth=None)
+                    # The outline only needs the structure of the course, not the content of its components
+                    course_module = get_course_and_check_access(course_key, request.user, depth=None, lazy=True)
                     return JsonResponse(_course_outline_json(request, course_module))
             elif request.method == 'POST':  # not sure if this is only post. If one will have ids, it goes after access
                 return _create_or_rerun_course(request)
@@ -489,8 +492,9 @@ def course_index(request, course_key):
     """
     # A depth of None implies the whole course. The course outline needs this in order to compute has_changes.
     # A unit may not have a draft version, but one of its components could, and hence the unit itself has changes.
+    # The outline only needs the structure of the course, so the content of its components is loaded lazily.
     with modulestore().bulk_operations(course_key):
-        course_module = get_course_and_check_access(course_key, request.user, depth=None)
+        course_module = get_course_and_check_access(course_key, request.user, depth=None, lazy=True)
         lms_link = get_lms_link_for_item(course_module.location)
         reindex_link = None
         if settings.FEATURES.get('ENABLE_COURSEWARE_INDEX', False):
@@ -164,6 +164,8 @@ MKTG_URLS = ENV_TOKENS.get('MKTG_URLS', MKTG_URLS)
 TECH_SUPPORT_EMAIL = ENV_TOKENS.get('TECH_SUPPORT_EMAIL', TECH_SUPPORT_EMAIL)
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_CACHE.update(ENV_TOKENS.get('SAFE_EXEC_CACHE', {}))
+SPLIT_STRUCTURE_CACHE.update(ENV_TOKENS.get('SPLIT_STRUCTURE_CACHE', {}))
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -253,6 +255,7 @@ if AWS_SECRET_ACCESS_KEY == "":
 DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+STATIC_CONTENT_DISK_CACHE = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE', STATIC_CONTENT_DISK_CACHE)
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
@@ -279,6 +282,7 @@ BROKER_URL = "{0}://{1}:{2}@{3}/{4}".format(CELERY_BROKER_TRANSPORT,
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS.update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
+TRACKING_ASYNC_DISPATCH = ENV_TOKENS.get("TRACKING_ASYNC_DISPATCH", TRACKING_ASYNC_DISPATCH)
 
 SUBDOMAIN_BRANDING = ENV_TOKENS.get('SUBDOMAIN_BRANDING', {})
 VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
@@ -326,6 +330,9 @@ API_DATE_FORMAT = ENV_TOKENS.get('API_DATE_FORMAT', API_DATE_FORMAT)
 # Example: {'CN': 'http://api.xuetangx.com/edx/video?s3_url='}
 VIDEO_CDN_URL = ENV_TOKENS.get('VIDEO_CDN_URL', {})
 
+# Course roles shared between requests
+ROLE_CACHE_TIMEOUT = ENV_TOKENS.get('ROLE_CACHE_TIMEOUT', ROLE_CACHE_TIMEOUT)
+
 if FEATURES['ENABLE_COURSEWARE_INDEX']:
     # Use ElasticSearch for the search engine
     SEARCH_ENGINE = "search.elastic.ElasticSearchEngine"
@@ -312,6 +312,14 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Assets too large to cache in memcache are cached on local disk by
+# contentserver.middleware.StaticContentServer: in the ROOT directory, using
+# at most MAX_SIZE bytes.  The disk cache is off if ROOT is None.
+STATIC_CONTENT_DISK_CACHE = {
+    'ROOT': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -343,6 +351,19 @@ MODULESTORE = {
     }
 }
 
+# Course structures of the split modulestore never change once written, so each
+# process caches them by version, and shares them through the 'split_structures'
+# cache if there is one.
+SPLIT_STRUCTURE_CACHE = {
+    'ENABLED': True,
+    # Bytes of compressed structures kept in the memory of each process.
+    'MAX_LOCAL_SIZE': 64 * 1024 * 1024,
+    # Lifetime of the structures in the 'split_structures' cache, None for its default.
+    'TIMEOUT': None,
+    # Load the published structure of a course into the caches when it is published.
+    'PREWARM_ON_PUBLISH': True,
+}
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -724,6 +745,7 @@ INSTALLED_APPS = (
     'edx_jsme',    # Molecular Structure
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
 )
 
 
@@ -737,6 +759,20 @@ MKTG_URL_LINK_MAP = {
 
 COURSES_WITH_UNSAFE_CODE = []
 
+# Caching of the results of the code of problems, which is stored in the
+# 'safe_exec' cache if there is one, else in the default cache.
+SAFE_EXEC_CACHE = {
+    # Results larger than this many bytes of JSON aren't cached.
+    'MAX_ENTRY_SIZE': 100 * 1024,
+    # Lifetime of the cached results, None for the default of the cache.
+    'TIMEOUT': None,
+    # Run the code of the problems of a course for all their seeds when it is
+    # published, so that students never wait for the sandbox.
+    'PREWARM_ON_PUBLISH': False,
+    # Never run the code of a problem for more than this many seeds when prewarming.
+    'PREWARM_MAX_SEEDS': 1000,
+}
+
 ############################## EVENT TRACKING #################################
 
 TRACK_MAX_EVENT = 50000
@@ -754,6 +790,18 @@ TRACKING_BACKENDS = {
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
 
+# Set ENABLED to send tracking events to the TRACKING_BACKENDS from worker
+# threads, rather than on the request thread.  MAX_EVENT_AGES are the seconds,
+# by backend name, after which an event still waiting in the queue is dropped
+# rather than sent.  They don't bound the time a backend takes to send an
+# event: a send which hangs stalls its worker thread.
+TRACKING_ASYNC_DISPATCH = {
+    'ENABLED': False,
+    'WORKERS_PER_BACKEND': 1,
+    'MAX_QUEUE_SIZE': 10000,
+    'MAX_EVENT_AGES': {},
+}
+
 EVENT_TRACKING_ENABLED = True
 EVENT_TRACKING_BACKENDS = {
     'logger': {
@@ -915,3 +963,7 @@ ELASTIC_FIELD_MAPPINGS = {
         "type": "date"
     }
 }
+
+# Seconds for which the course roles of each user are shared between requests through
+# the default cache, or 0 to load them from the database in every request.
+ROLE_CACHE_TIMEOUT = 0
@@ -97,6 +97,10 @@ update_module_store_settings(
     },
 )
 
+# Tests count the queries made to Mongo, which the structure cache would make
+# depend on the tests run before.
+SPLIT_STRUCTURE_CACHE['ENABLED'] = False
+
 CONTENTSTORE = {
     'ENGINE': 'xmodule.contentstore.mongo.MongoContentStore',
     'DOC_STORE_CONFIG': {
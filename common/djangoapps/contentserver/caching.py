@@ -0,0 +1,406 @@
+"""
+Caching of assets served by the StaticContentServer.
+
+Small assets are cached whole in memcache. Larger ones are cached on local
+disk, and only their metadata is kept in memcache.
+"""
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Assets smaller than this are cached whole in memcache
+MEMCACHE_MAX_CONTENT_LENGTH = 1048576
+
+# Size of the reads made when serving an asset from disk
+DISK_CHUNK_SIZE = 64 * 1024
+
+# Prefix of the files that assets are written to before being moved into the disk cache,
+# and of the lock files claiming the filling of a cache file
+TEMP_FILE_PREFIX = '.tmp'
+
+# Seconds after which a temporary file is considered abandoned by the process writing it
+TEMP_FILE_TIMEOUT = 10 * 60
+
+
+def content_etag(content):
+    """
+    Return a strong ETag for `content`.
+
+    An asset's last_modified_at changes whenever it is uploaded, so two
+    responses with the same ETag have the same bytes.
+    """
+    return '"{}"'.format(_content_hash(content))
+
+
+def _content_hash(content):
+    """
+    Return a digest of the location and version of `content`.
+    """
+    version = u'{location}|{last_modified_at}|{length}'.format(
+        location=content.location,
+        last_modified_at=content.last_modified_at.isoformat() if content.last_modified_at else '',
+        length=content.length,
+    )
+    return hashlib.sha1(version.encode('utf-8')).hexdigest()
+
+
+def metadata_only(content):
+    """
+    Return a copy of `content` without its data, to put in memcache in place
+    of an asset that is cached on disk.
+    """
+    return StaticContent(
+        content.location, content.name, content.content_type, None,
+        last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+        import_path=content.import_path, length=content.length, locked=content.locked
+    )
+
+
+def is_metadata_only(content):
+    """
+    Whether `content` came from memcache without its data (see `metadata_only`).
+    """
+    return type(content) == StaticContent and content.data is None
+
+
+class DiskCachedContent(StaticContentStream):
+    """
+    An asset streamed from a file in the AssetDiskCache.
+
+    The file is only open while its data is streamed: it is closed once read,
+    or once the response streaming it is closed. Responses which don't send
+    the data, such as 304s, don't open it at all.
+    """
+    def __init__(self, path, *args, **kwargs):
+        super(DiskCachedContent, self).__init__(*args, **kwargs)
+        self.path = path
+
+    def stream_data(self):
+        with open(self.path, 'rb') as cached_file:
+            while True:
+                chunk = cached_file.read(DISK_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        with open(self.path, 'rb') as cached_file:
+            cached_file.seek(first_byte)
+            remaining = last_byte - first_byte + 1
+            while remaining > 0:
+                chunk = cached_file.read(min(DISK_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def close(self):
+        """
+        Nothing to close, as the file is only open while it is streamed.
+        """
+        pass
+
+
+class DiskCachingContent(StaticContentStream):
+    """
+    An asset streamed from the modulestore, whose data is copied to an
+    AssetDiskCache as it is streamed whole. Ranges of it are streamed without
+    being cached.
+    """
+    def __init__(self, disk_cache, content):
+        super(DiskCachingContent, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked
+        )
+        self.disk_cache = disk_cache
+        self.content = content
+
+    def stream_data(self):
+        return self.disk_cache.stream_to_cache(self.content)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        return self.content.stream_data_in_range(first_byte, last_byte)
+
+    def close(self):
+        self.content.close()
+
+
+class AssetDiskCache(object):
+    """
+    A cache of asset files on local disk, with least recently used files
+    evicted to keep it within a size budget.
+
+    Files are named after the location and last_modified_at of their asset,
+    so uploading a new version of an asset never serves the old one. They are
+    filled while their asset is first streamed to a client, and only ever
+    renamed into place complete, so several processes can share the directory.
+
+    Each process keeps an estimate of the size of the cache, from the last
+    time it measured it plus the files it added since, and only walks the
+    directory to evict files when that estimate goes over budget. The files
+    added by other processes in the meantime can make the cache go over budget
+    until then.
+    """
+    # The caches configured by settings, by root and size
+    _configured = {}
+
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        # Estimated size of the cache, or None if it was never measured
+        self._size = None
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Return the AssetDiskCache configured by settings.STATIC_CONTENT_DISK_CACHE,
+        or None if there isn't one.
+        """
+        config = getattr(settings, 'STATIC_CONTENT_DISK_CACHE', None) or {}
+        if not config.get('ROOT'):
+            return None
+        # The same instance is shared by the requests, for its size estimate
+        key = (config['ROOT'], config['MAX_SIZE'])
+        if key not in cls._configured:
+            cls._configured[key] = cls(*key)
+        return cls._configured[key]
+
+    def path_for(self, content):
+        """
+        Return the path of the file caching `content`.
+        """
+        content_hash = _content_hash(content)
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def get(self, content):
+        """
+        Return a DiskCachedContent for the asset that `content` describes, or
+        None if it isn't cached.
+        """
+        path = self.path_for(content)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            # Reading a file makes it the most recently used one, so it isn't
+            # evicted before it's streamed.
+            os.utime(path, None)
+        except OSError:
+            pass
+        return self._content_for_file(content, path)
+
+    def caching(self, content):
+        """
+        Return a DiskCachingContent streaming the data of `content` (a
+        StaticContentStream) which copies it to the cache as it is streamed
+        whole, or None if it can't be cached.
+        """
+        if content.length is None or content.length > self.max_size:
+            return None
+        return DiskCachingContent(self, content)
+
+    def set(self, content):
+        """
+        Copy the data of `content` (a StaticContentStream) to the cache, and
+        return a DiskCachedContent for it. Returns None if it can't be cached,
+        in which case the stream of `content` may have been consumed.
+        """
+        caching_content = self.caching(content)
+        if caching_content is None:
+            return None
+        for __ in caching_content.stream_data():
+            pass
+        return self.get(content)
+
+    def stream_to_cache(self, content):
+        """
+        Yield the data of `content`, copying it to the cache on the way.
+
+        Only one request at a time fills the file of an asset: the others
+        stream the data without copying it. The file is only moved into place
+        if all the data was streamed, so a client going away, or the cache
+        failing to write, never stops the data from being served.
+        """
+        path = self.path_for(content)
+        lock_path = os.path.join(os.path.dirname(path), TEMP_FILE_PREFIX + os.path.basename(path) + '.lock')
+        temp_file = self._claim(content, lock_path)
+        if temp_file is None:
+            for chunk in content.stream_data():
+                yield chunk
+            return
+
+        try:
+            for chunk in content.stream_data():
+                if temp_file is not None:
+                    try:
+                        temp_file.write(chunk)
+                    except (IOError, OSError):
+                        log.exception(u"Could not cache %s on disk", content.location)
+                        _discard(temp_file)
+                        temp_file = None
+                yield chunk
+
+            if temp_file is not None:
+                try:
+                    temp_file.close()
+                    if os.path.getsize(temp_file.name) == content.length:
+                        os.rename(temp_file.name, path)
+                        self._added(content.length)
+                except (IOError, OSError):
+                    log.exception(u"Could not cache %s on disk", content.location)
+        finally:
+            if temp_file is not None:
+                _discard(temp_file)
+            _remove(lock_path)
+
+    def _claim(self, content, lock_path):
+        """
+        Claim the filling of the cache file of `content` by creating its lock
+        file, and return a temporary file to write its data to. Returns None
+        if another request is filling it, or the cache can't be written.
+
+        The lock of a request which never finished is taken over once it's
+        older than TEMP_FILE_TIMEOUT. Should that request still be going, both
+        fill their own temporary file, and the cache file is renamed into
+        place complete either way.
+        """
+        directory = os.path.dirname(lock_path)
+        try:
+            try:
+                os.makedirs(directory)
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    raise
+
+            if not _create_exclusive(lock_path):
+                if not _is_abandoned(lock_path):
+                    return None
+                _remove(lock_path)
+                if not _create_exclusive(lock_path):
+                    return None
+
+            try:
+                return tempfile.NamedTemporaryFile(dir=directory, prefix=TEMP_FILE_PREFIX, delete=False)
+            except (IOError, OSError):
+                _remove(lock_path)
+                raise
+        except (IOError, OSError):
+            log.exception(u"Could not cache %s on disk", content.location)
+            return None
+
+    def _added(self, length):
+        """
+        Account for a file of `length` bytes added to the cache, evicting
+        files if that takes the cache over budget.
+        """
+        if self._size is None or self._size + length > self.max_size:
+            self._size = self._evict()
+        else:
+            self._size += length
+
+    def _evict(self):
+        """
+        Delete the least recently used files until the cache fits its budget,
+        and return the size of the files left.
+        """
+        cached_files = []
+        total_size = 0
+        for directory, __, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename.startswith(TEMP_FILE_PREFIX):
+                    # Still being written by some process, unless that process died
+                    if _is_abandoned(path):
+                        _remove(path)
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Deleted by another process
+                    continue
+                cached_files.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        cached_files.sort()
+        for __, size, path in cached_files:
+            if total_size <= self.max_size:
+                break
+            try:
+                # Processes serving the file keep it open until they're done.
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+        return total_size
+
+    @staticmethod
+    def _content_for_file(content, path):
+        """
+        Return a DiskCachedContent reading the data of `content` from the file at `path`.
+        """
+        return DiskCachedContent(
+            path, content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked
+        )
+
+
+def _create_exclusive(path):
+    """
+    Create an empty file at `path`, and return whether it didn't exist yet.
+    """
+    try:
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+        return False
+    return True
+
+
+def _is_abandoned(path):
+    """
+    Whether the temporary file at `path` is older than TEMP_FILE_TIMEOUT.
+    """
+    try:
+        return os.path.getmtime(path) < time.time() - TEMP_FILE_TIMEOUT
+    except OSError:
+        # Already gone
+        return False
+
+
+def _discard(temp_file):
+    """
+    Close and delete `temp_file`.
+    """
+    try:
+        temp_file.close()
+    except (IOError, OSError):
+        pass
+    _remove(temp_file.name)
+
+
+def _remove(path):
+    """
+    Delete the file at `path`, if it's still there.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
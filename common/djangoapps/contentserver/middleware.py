@@ -3,6 +3,7 @@ Middleware to serve assets.
 """
 
 import logging
+from uuid import uuid4
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
@@ -15,6 +16,9 @@ from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
+from contentserver.caching import (
+    AssetDiskCache, MEMCACHE_MAX_CONTENT_LENGTH, content_etag, is_metadata_only, metadata_only
+)
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -40,7 +44,12 @@ class StaticContentServer(object):
                 return response
 
             # first look in our cache so we don't have to round-trip to the DB
+            disk_cache = AssetDiskCache.from_settings()
             content = get_cached_content(loc)
+            if content is not None and is_metadata_only(content):
+                # Large assets are cached on disk, with only their metadata in memcache
+                content = disk_cache.get(content) if disk_cache is not None else None
+
             if content is None:
                 # nope, not in cache, let's fetch from DB
                 try:
@@ -50,16 +59,19 @@ class StaticContentServer(object):
                     response.status_code = 404
                     return response
 
-                # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
-                # this is because I haven't been able to find a means to stream data out of memcached
+                # since we fetched it from DB, let's cache it going forward: in memcache if it's < 1MB,
+                # as I haven't been able to find a means to stream data out of memcached, else on disk
                 if content.length is not None:
-                    if content.length < 1048576:
+                    if content.length < MEMCACHE_MAX_CONTENT_LENGTH:
                         # since we've queried as a stream, let's read in the stream into memory to set in cache
                         content = content.copy_to_in_mem()
                         set_cached_content(content)
-            else:
-                # NOP here, but we may wish to add a "cache-hit" counter in the future
-                pass
+                    elif disk_cache is not None:
+                        # The asset is copied to disk as it's streamed to the client
+                        caching_content = disk_cache.caching(content)
+                        if caching_content is not None:
+                            set_cached_content(metadata_only(content))
+                            content = caching_content
 
             # Check that user has access to content
             if getattr(content, "locked", False):
@@ -78,13 +90,18 @@ class StaticContentServer(object):
             # convert over the DB persistent last modified timestamp to a HTTP compatible
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            etag = content_etag(content)
 
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # ETags or timestamps, if they are the same then just return a 304 (Not Modified)
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if_none_match = [tag.strip() for tag in request.META['HTTP_IF_NONE_MATCH'].split(',')]
+                if etag in if_none_match or '*' in if_none_match:
+                    return _not_modified(etag, last_modified_at_str)
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+                    return _not_modified(etag, last_modified_at_str)
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -93,11 +110,10 @@ class StaticContentServer(object):
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
-            if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
+            response_content_type = content.content_type
+            # A Range conditional on If-Range only applies to the version of the content that the client has
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if request.META.get('HTTP_RANGE') and if_range in (None, etag, last_modified_at_str):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -110,24 +126,27 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
+                        # Unsatisfiable ranges are ignored, unless none of them are satisfiable
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
+                        if len(ranges) == 1:
+                            first, last = ranges[0]
                             response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
                             response.status_code = 206  # Partial Content
+                        elif ranges:
+                            # According to Http/1.1 spec content for multiple ranges should be sent as a
+                            # multipart message. http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            boundary = uuid4().hex
+                            body, length = multipart_byteranges(content, ranges, boundary)
+                            response = HttpResponse(body)
+                            response_content_type = 'multipart/byteranges; boundary=' + boundary
+                            response['Content-Length'] = str(length)
+                            response.status_code = 206  # Partial Content
                         else:
                             log.warning(
                                 u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
@@ -141,12 +160,61 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            response['Content-Type'] = response_content_type
             response['Last-Modified'] = last_modified_at_str
+            response['ETag'] = etag
 
             return response
 
 
+def _not_modified(etag, last_modified_at_str):
+    """
+    Return a 304 (Not Modified) response for content with the given validators.
+    """
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified_at_str
+    return response
+
+
+def multipart_byteranges(content, ranges, boundary):
+    """
+    Returns an iterator over a multipart/byteranges body holding the given
+    (first, last) byte ranges of `content`, and the length of that body.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    parts = []
+    length = 0
+    for first, last in ranges:
+        part_header = (
+            u'--{boundary}\r\n'
+            u'Content-Type: {content_type}\r\n'
+            u'Content-Range: bytes {first}-{last}/{length}\r\n'
+            u'\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        ).encode('utf-8')
+        parts.append((part_header, first, last))
+        # The part's data is followed by a CRLF
+        length += len(part_header) + (last - first + 1) + 2
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+    length += len(closing)
+
+    def body():
+        """
+        Yields the parts, reading each range of `content` in turn.
+        """
+        for part_header, first, last in parts:
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    return body(), length
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
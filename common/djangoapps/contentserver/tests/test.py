@@ -4,12 +4,17 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.cache import cache
 from django.test.client import Client
 from django.test.utils import override_settings
+from mock import Mock, patch
 
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
@@ -17,6 +22,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_from_xml
 
+from contentserver.caching import AssetDiskCache
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -146,7 +152,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message of the ranges.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,10 +160,90 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        boundary = resp['Content-Type'].split('boundary=')[1]
+
+        body = resp.content
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+        self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked), body)
+        self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+            first=max(0, self.length_unlocked - 100), last=self.length_unlocked - 1, length=self.length_unlocked), body)
+        self.assertTrue(body.endswith('--{}--\r\n'.format(boundary)))
+
+    def test_etag(self):
+        """
+        Test that assets have a strong ETag, which makes conditional requests return 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_range(self):
+        """
+        Test that a range request only returns partial content if If-Range matches the asset.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual(resp.status_code, 206)
+
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"other"')
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
+    @patch('contentserver.middleware.MEMCACHE_MAX_CONTENT_LENGTH', 1)
+    def test_disk_cache(self):
+        """
+        Test that assets too large for memcache are served from the disk cache.
+        """
+        cache.clear()
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root)
+        with override_settings(STATIC_CONTENT_DISK_CACHE={'ROOT': cache_root, 'MAX_SIZE': 1024 * 1024}):
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            full_content = resp.content
+
+            with patch('contentserver.middleware.AssetManager.find') as mock_find:
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp.content, full_content)
+
+                resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-3')
+                self.assertEqual(resp.status_code, 206)
+                self.assertEqual(resp.content, full_content[1:4])
+            self.assertFalse(mock_find.called)
+
+    @patch('contentserver.middleware.MEMCACHE_MAX_CONTENT_LENGTH', 1)
+    def test_disk_cache_range_request(self):
+        """
+        Test that range requests of assets not on disk yet are served without caching them.
+        """
+        cache.clear()
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root)
+        with override_settings(STATIC_CONTENT_DISK_CACHE={'ROOT': cache_root, 'MAX_SIZE': 1024 * 1024}):
+            full_content = self.client.get(self.url_unlocked).content
+            shutil.rmtree(cache_root)
+
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-3')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, full_content[1:4])
+            self.assertFalse(os.path.exists(cache_root))
+
+            self.assertEqual(self.client.get(self.url_unlocked).content, full_content)
+            with patch('contentserver.middleware.AssetManager.find') as mock_find:
+                self.assertEqual(self.client.get(self.url_unlocked).content, full_content)
+            self.assertFalse(mock_find.called)
+
     @ddt.data(
         'bytes 0-',
         'bits=0-',
@@ -236,3 +322,129 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache.
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.disk_cache = AssetDiskCache(self.root, 25)
+
+    def _content(self, name, data, chunk_size=None):
+        """
+        Return a mock StaticContentStream of `data`, streamed in chunks of `chunk_size`.
+        """
+        chunk_size = chunk_size or len(data)
+        return Mock(
+            location=u'/c4x/org/course/asset/{}'.format(name),
+            last_modified_at=None,
+            length=len(data),
+            stream_data=Mock(side_effect=lambda: iter([
+                data[start:start + chunk_size] for start in range(0, len(data), chunk_size)
+            ])),
+        )
+
+    def _files(self):
+        """
+        Return the names of the files in the cache, including temporary ones.
+        """
+        return [filename for __, __, filenames in os.walk(self.root) for filename in filenames]
+
+    def test_get_and_set(self):
+        content = self._content('a', 'some data')
+        self.assertIsNone(self.disk_cache.get(content))
+        cached_content = self.disk_cache.set(content)
+        self.assertEqual(''.join(cached_content.stream_data()), 'some data')
+        self.assertEqual(''.join(self.disk_cache.get(content).stream_data_in_range(5, 8)), 'data')
+
+    def test_too_large(self):
+        self.assertIsNone(self.disk_cache.set(self._content('a', 'x' * 26)))
+
+    def test_eviction(self):
+        first = self._content('first', 'x' * 10)
+        second = self._content('second', 'x' * 10)
+        self.disk_cache.set(first)
+        self.disk_cache.set(second)
+
+        # Make the first file the least recently used one
+        os.utime(self.disk_cache.path_for(first), (0, 0))
+        self.disk_cache.set(self._content('third', 'x' * 10))
+        self.assertIsNone(self.disk_cache.get(first))
+        self.assertIsNotNone(self.disk_cache.get(second))
+
+    def test_files_only_open_while_streamed(self):
+        content = self._content('a', 'some data')
+        self.disk_cache.set(content)
+        opened_files = []
+
+        def record_open(*args):
+            """
+            Open the file, recording it.
+            """
+            opened_files.append(open(*args))
+            return opened_files[-1]
+
+        with patch('contentserver.caching.open', create=True, side_effect=record_open):
+            cached_content = self.disk_cache.get(content)
+            self.assertEqual(opened_files, [])
+
+            # Closing the stream (as closing its response does) closes the file
+            stream = cached_content.stream_data()
+            self.assertEqual(stream.next(), 'some data')
+            self.assertFalse(opened_files[0].closed)
+            stream.close()
+            self.assertTrue(opened_files[0].closed)
+
+    def test_filled_while_streamed(self):
+        content = self._content('a', 'some data', chunk_size=5)
+        stream = self.disk_cache.caching(content).stream_data()
+        self.assertEqual(stream.next(), 'some ')
+        self.assertIsNone(self.disk_cache.get(content))
+        self.assertEqual(''.join(stream), 'data')
+        self.assertEqual(''.join(self.disk_cache.get(content).stream_data()), 'some data')
+
+    def test_one_fill_at_a_time(self):
+        content = self._content('a', 'some data', chunk_size=5)
+        first_stream = self.disk_cache.caching(content).stream_data()
+        first_stream.next()
+
+        # Other requests stream the data without writing it
+        self.assertEqual(''.join(self.disk_cache.caching(content).stream_data()), 'some data')
+        self.assertIsNone(self.disk_cache.get(content))
+        self.assertEqual(len(self._files()), 2)
+
+        list(first_stream)
+        self.assertIsNotNone(self.disk_cache.get(content))
+        self.assertEqual(self._files(), [os.path.basename(self.disk_cache.path_for(content))])
+
+    def test_stream_closed_before_end(self):
+        content = self._content('a', 'some data', chunk_size=5)
+        stream = self.disk_cache.caching(content).stream_data()
+        stream.next()
+        stream.close()
+        self.assertIsNone(self.disk_cache.get(content))
+        self.assertEqual(self._files(), [])
+
+    def test_abandoned_fill(self):
+        content = self._content('a', 'some data', chunk_size=5)
+        abandoned_stream = self.disk_cache.caching(content).stream_data()
+        abandoned_stream.next()
+        for directory, __, filenames in os.walk(self.root):
+            for filename in filenames:
+                os.utime(os.path.join(directory, filename), (0, 0))
+
+        # The lock of the abandoned fill is taken over, and its temporary file deleted by eviction
+        self.assertIsNotNone(self.disk_cache.set(content))
+        self.assertEqual(self._files(), [os.path.basename(self.disk_cache.path_for(content))])
+
+    def test_eviction_only_when_over_budget(self):
+        with patch.object(self.disk_cache, '_evict', wraps=self.disk_cache._evict) as mock_evict:
+            self.disk_cache.set(self._content('first', 'x' * 10))
+            self.disk_cache.set(self._content('second', 'x' * 10))
+            self.assertEqual(mock_evict.call_count, 1)
+
+            self.disk_cache.set(self._content('third', 'x' * 10))
+            self.assertEqual(mock_evict.call_count, 2)
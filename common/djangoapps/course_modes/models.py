@@ -8,7 +8,10 @@ from django.db import models
 from collections import namedtuple, defaultdict
 from django.utils.translation import ugettext_lazy as _
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from request_cache.decorators import request_cached
 from xmodule_django.models import CourseKeyField
 
 Mode = namedtuple('Mode',
@@ -130,12 +133,15 @@ class CourseMode(models.Model):
         return (all_modes, unexpired_modes)
 
     @classmethod
+    @request_cached()
     def paid_modes_for_course(cls, course_id):
         """
         Returns a list of non-expired modes for a course ID that have a set minimum price.
 
         If no modes have been set, returns an empty list.
 
+        The list is memoized for the duration of the request, so it must not be modified.
+
         Args:
             course_id (CourseKey): The course to find paid modes for.
 
@@ -155,11 +161,14 @@ class CourseMode(models.Model):
         return [mode.to_tuple() for mode in found_course_modes]
 
     @classmethod
+    @request_cached()
     def modes_for_course(cls, course_id):
         """
         Returns a list of the non-expired modes for a given course id
 
         If no modes have been set in the table, returns the default mode
+
+        The list is memoized for the duration of the request, so it must not be modified.
         """
         now = datetime.now(pytz.UTC)
         found_course_modes = cls.objects.filter(Q(course_id=course_id) &
@@ -430,3 +439,13 @@ class CourseModesArchive(models.Model):
     expiration_date = models.DateField(default=None, null=True, blank=True)
 
     expiration_datetime = models.DateTimeField(default=None, null=True, blank=True)
+
+
+@receiver(post_save, sender=CourseMode)
+@receiver(post_delete, sender=CourseMode)
+def clear_memoized_modes(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forgets the memoized modes of the courses when a course mode changes.
+    """
+    CourseMode.modes_for_course.clear()
+    CourseMode.paid_modes_for_course.clear()
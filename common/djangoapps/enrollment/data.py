@@ -6,10 +6,10 @@ source to be used throughout the API.
 import logging
 from django.contrib.auth.models import User
 from opaque_keys.edx.keys import CourseKey
-from xmodule.modulestore.django import modulestore
 from enrollment.errors import CourseNotFoundError, CourseEnrollmentClosedError, CourseEnrollmentFullError, \
     CourseEnrollmentExistsError, UserNotFoundError
 from enrollment.serializers import CourseEnrollmentSerializer, CourseField
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from student.models import CourseEnrollment, NonExistentCourseError, CourseEnrollmentException, EnrollmentClosedError, \
     CourseFullError, AlreadyEnrolledError
 
@@ -28,10 +28,13 @@ def get_course_enrollments(user_id):
         A serializable list of dictionaries of all aggregated enrollment data for a user.
 
     """
-    qset = CourseEnrollment.objects.filter(
+    enrollments = list(CourseEnrollment.objects.filter(
         user__username=user_id, is_active=True
-    ).order_by('created')
-    return CourseEnrollmentSerializer(qset).data  # pylint: disable=no-member
+    ).order_by('created'))
+    overviews = CourseOverview.get_select_courses(enrollment.course_id for enrollment in enrollments)
+    for enrollment in enrollments:
+        enrollment.course_overview = overviews.get(enrollment.course_id)
+    return CourseEnrollmentSerializer(enrollments).data  # pylint: disable=no-member
 
 
 def get_course_enrollment(username, course_id):
@@ -154,7 +157,7 @@ def get_course_enrollment_info(course_id):
 
     """
     course_key = CourseKey.from_string(course_id)
-    course = modulestore().get_course(course_key)
+    course = CourseOverview.get_from_id(course_key)
     if course is None:
         msg = u"Requested enrollment information for unknown course {course}".format(course=course_id)
         log.warning(msg)
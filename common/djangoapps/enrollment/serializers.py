@@ -28,7 +28,7 @@ class StringListField(serializers.CharField):
 class CourseField(serializers.RelatedField):
     """Read-Only representation of course enrollment information.
 
-    Aggregates course information from the CourseDescriptor as well as the Course Modes configured
+    Aggregates course information from the CourseOverview as well as the Course Modes configured
     for enrolling in the course.
 
     """
@@ -50,7 +50,7 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
     """Serializes CourseEnrollment models
 
     Aggregates all data from the Course Enrollment table, and pulls in the serialization for
-    the Course Descriptor and course modes, to give a complete representation of course enrollment.
+    the Course Overview and course modes, to give a complete representation of course enrollment.
 
     """
     course_details = serializers.SerializerMethodField('get_course_details')
@@ -58,7 +58,7 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
 
     def get_course_details(self, model):
         field = CourseField()
-        return field.to_native(model.course)
+        return field.to_native(model.course_overview)
 
     def get_username(self, model):
         """Retrieves the username from the associated model."""
@@ -0,0 +1,151 @@
+"""
+Memoization of function results for the duration of a request.
+
+The results of a function decorated with ``request_cached`` are kept in the
+request cache, keyed by its arguments, so that repeated calls within a request
+cost a dict lookup. Results are only memoized while the RequestCache middleware
+is handling a request: outside of one (in celery tasks, management commands or
+tests calling functions directly) the function is always called.
+
+    @request_cached()
+    def get_thing(user, course_key):
+        ...
+
+    get_thing.invalidate(user, course_key)  # forget the result of one call
+    get_thing.clear()                       # forget all the results
+
+By default the key of a call is built from its arguments, which may be strings,
+numbers, None, classes, opaque keys, saved model instances (keyed by their
+primary key), anonymous users, or tuples of those. Calls with other arguments
+are not memoized. A ``key_func`` taking the arguments of the function can be
+given instead; it returns a hashable key, or None if the call must not be
+memoized.
+
+Exceptions are not memoized, and memoized results are shared by all the callers
+within the request, so they must not be modified.
+"""
+import functools
+import numbers
+
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Model
+from opaque_keys import OpaqueKey
+
+from request_cache.middleware import RequestCache, MEMOIZED_KEY, STATS_KEY
+
+
+class _Uncacheable(Exception):
+    """
+    Raised when an argument can't be part of the key of a call.
+    """
+    pass
+
+
+def _argument_key(arg):
+    """
+    Returns the part of the key of a call for the argument ``arg``.
+    """
+    if isinstance(arg, Model):
+        if arg.pk is None:
+            raise _Uncacheable()
+        return (arg.__class__, arg.pk)
+    if isinstance(arg, AnonymousUser):
+        return AnonymousUser
+    if arg is None or isinstance(arg, (basestring, numbers.Number, type, OpaqueKey)):
+        return arg
+    if isinstance(arg, tuple):
+        return tuple(_argument_key(item) for item in arg)
+    raise _Uncacheable()
+
+
+def default_cache_key(*args, **kwargs):
+    """
+    Returns the key of a call with the given arguments, or None if one of them
+    can't be part of a key.
+    """
+    try:
+        return (
+            tuple(_argument_key(arg) for arg in args),
+            tuple(sorted((name, _argument_key(arg)) for name, arg in kwargs.iteritems())),
+        )
+    except _Uncacheable:
+        return None
+
+
+def _memoized(name, create=True):
+    """
+    Returns the dict of the memoized results of the function ``name`` in the
+    current request, or None if there is no request or no results yet and
+    ``create`` is False.
+    """
+    if not RequestCache.is_active():
+        return None
+    memoized = RequestCache.get_request_cache().data.setdefault(MEMOIZED_KEY, {})
+    if create:
+        return memoized.setdefault(name, {})
+    return memoized.get(name)
+
+
+def _record(name, hit):
+    """
+    Counts a hit or a miss of the function ``name`` in the current request.
+    """
+    stats = RequestCache.get_request_cache().data.setdefault(STATS_KEY, {}).setdefault(name, [0, 0])
+    stats[0 if hit else 1] += 1
+
+
+def request_cached(key_func=default_cache_key, name=None):
+    """
+    Decorator memoizing the results of the decorated function for the duration
+    of the current request.
+
+    Arguments:
+        key_func (function): returns the key of a call from its arguments, or None
+            if the call must not be memoized
+        name (str): the name of the memoized results in the request cache,
+            defaults to the module and name of the function
+
+    The decorated function has an ``invalidate(*args, **kwargs)`` method which
+    forgets the result of the call with the given arguments, and a ``clear()``
+    method which forgets all its results.
+    """
+    def decorator(func):
+        cache_name = name or u'{}.{}'.format(func.__module__, func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            memoized = _memoized(cache_name)
+            key = key_func(*args, **kwargs) if memoized is not None else None
+            if key is None:
+                return func(*args, **kwargs)
+
+            try:
+                result = memoized[key]
+            except KeyError:
+                _record(cache_name, hit=False)
+                # The function may clear the results, so this stores its result
+                # in the dict of results it started with, which is then forgotten.
+                result = memoized[key] = func(*args, **kwargs)
+            else:
+                _record(cache_name, hit=True)
+            return result
+
+        def invalidate(*args, **kwargs):
+            """
+            Forgets the memoized result of the call with the given arguments.
+            """
+            memoized = _memoized(cache_name, create=False)
+            if memoized:
+                memoized.pop(key_func(*args, **kwargs), None)
+
+        def clear():
+            """
+            Forgets all the memoized results of the function.
+            """
+            if RequestCache.is_active():
+                RequestCache.get_request_cache().data.get(MEMOIZED_KEY, {}).pop(cache_name, None)
+
+        wrapper.invalidate = invalidate
+        wrapper.clear = clear
+        return wrapper
+    return decorator
@@ -1,21 +1,57 @@
+import logging
 import threading
 
+log = logging.getLogger(__name__)
+
 _request_cache_threadlocal = threading.local()
 _request_cache_threadlocal.data = {}
 
+# The key of the memoized results of the request_cached functions in the request cache,
+# and the key of their hit and miss counts.
+MEMOIZED_KEY = 'request_cached'
+STATS_KEY = 'request_cached_stats'
+
 
 class RequestCache(object):
     @classmethod
     def get_request_cache(cls):
         return _request_cache_threadlocal
 
+    @classmethod
+    def is_active(cls):
+        """
+        Returns whether the current thread is handling a request, in which case
+        the results of request_cached functions are memoized until its end.
+        """
+        return getattr(_request_cache_threadlocal, 'active', False)
+
     def clear_request_cache(self):
         _request_cache_threadlocal.data = {}
 
     def process_request(self, request):
         self.clear_request_cache()
+        _request_cache_threadlocal.active = True
         return None
 
     def process_response(self, request, response):
+        self.log_memoization_stats(request)
+        _request_cache_threadlocal.active = False
         self.clear_request_cache()
         return response
+
+    @staticmethod
+    def log_memoization_stats(request):
+        """
+        Logs the number of calls of each request_cached function during the
+        request which were answered from the request cache.
+        """
+        stats = getattr(_request_cache_threadlocal, 'data', {}).get(STATS_KEY)
+        if stats and log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                u"Request cache hits for %s: %s",
+                getattr(request, 'path', None),
+                u", ".join(
+                    u"{} {}/{}".format(name, hits, hits + misses)
+                    for name, (hits, misses) in sorted(stats.iteritems())
+                )
+            )
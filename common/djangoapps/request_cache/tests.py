@@ -0,0 +1,130 @@
+"""
+Tests for the request cache and the memoization of functions in it.
+"""
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TestCase
+from mock import Mock, patch
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from request_cache.decorators import default_cache_key, request_cached
+from request_cache.middleware import RequestCache, STATS_KEY
+
+
+class RequestCachedTest(TestCase):
+    """
+    Tests of the request_cached decorator.
+    """
+    def setUp(self):
+        super(RequestCachedTest, self).setUp()
+        self.middleware = RequestCache()
+        self.middleware.process_request(Mock())
+        self.addCleanup(self.middleware.process_response, Mock(), Mock())
+
+        self.calls = []
+
+        @request_cached()
+        def double(value):
+            """
+            Records the call and returns twice the value.
+            """
+            self.calls.append(value)
+            return value * 2
+
+        self.double = double
+
+    def test_memoized(self):
+        self.assertEqual(self.double(2), 4)
+        self.assertEqual(self.double(2), 4)
+        self.assertEqual(self.double(3), 6)
+        self.assertEqual(self.calls, [2, 3])
+
+    def test_not_memoized_outside_requests(self):
+        self.middleware.process_response(Mock(), Mock())
+        self.double(2)
+        self.double(2)
+        self.assertEqual(self.calls, [2, 2])
+
+    def test_cleared_between_requests(self):
+        self.double(2)
+        self.middleware.process_response(Mock(), Mock())
+        self.middleware.process_request(Mock())
+        self.double(2)
+        self.assertEqual(self.calls, [2, 2])
+
+    def test_invalidate(self):
+        self.double(2)
+        self.double(3)
+        self.double.invalidate(2)
+        self.double(2)
+        self.double(3)
+        self.assertEqual(self.calls, [2, 3, 2])
+
+    def test_clear(self):
+        self.double(2)
+        self.double(3)
+        self.double.clear()
+        self.double(2)
+        self.double(3)
+        self.assertEqual(self.calls, [2, 3, 2, 3])
+
+    def test_exceptions_not_memoized(self):
+        @request_cached()
+        def fail(value):
+            """
+            Records the call and fails.
+            """
+            self.calls.append(value)
+            raise ValueError()
+
+        for __ in range(2):
+            with self.assertRaises(ValueError):
+                fail(1)
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_key_func(self):
+        @request_cached(key_func=lambda value: value if value > 0 else None)
+        def record(value):
+            """
+            Records the call.
+            """
+            self.calls.append(value)
+
+        for value in (1, 1, -1, -1):
+            record(value)
+        self.assertEqual(self.calls, [1, -1, -1])
+
+    def test_stats(self):
+        self.double(2)
+        self.double(2)
+        self.double(2)
+        stats = RequestCache.get_request_cache().data[STATS_KEY]
+        self.assertEqual(stats.values(), [[2, 1]])
+
+        with patch('request_cache.middleware.log') as mock_log:
+            mock_log.isEnabledFor.return_value = True
+            self.middleware.process_response(Mock(path='/courses'), Mock())
+        self.assertIn(u'2/3', mock_log.debug.call_args[0][2])
+
+
+class DefaultCacheKeyTest(TestCase):
+    """
+    Tests of the keys of the calls of the request_cached functions.
+    """
+    def test_model_instances(self):
+        user = User.objects.create(username='test')
+        self.assertEqual(default_cache_key(user), default_cache_key(User.objects.get(id=user.id)))
+        self.assertNotEqual(default_cache_key(user), default_cache_key(user.id))
+        self.assertIsNone(default_cache_key(User(username='unsaved')))
+
+    def test_arguments(self):
+        course_key = SlashSeparatedCourseKey('org', 'course', 'run')
+        self.assertEqual(
+            default_cache_key(AnonymousUser(), course_key, mode=u'honor'),
+            default_cache_key(AnonymousUser(), SlashSeparatedCourseKey('org', 'course', 'run'), mode=u'honor'),
+        )
+        self.assertIsNotNone(default_cache_key(User, None, 1.5, ('a', 2)))
+
+    def test_uncacheable_arguments(self):
+        self.assertIsNone(default_cache_key([1, 2]))
+        self.assertIsNone(default_cache_key(value={}))
+        self.assertIsNone(default_cache_key(object()))
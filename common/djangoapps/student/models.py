@@ -30,6 +30,7 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db import models, IntegrityError, transaction
 from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext_noop
@@ -50,9 +51,12 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
 from functools import total_ordering
+from lazy import lazy
 
 from certificates.models import GeneratedCertificate
 from course_modes.models import CourseMode
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from request_cache.decorators import request_cached
 
 from ratelimitbackend import admin
 
@@ -1005,6 +1009,7 @@ class CourseEnrollment(models.Model):
             )
 
     @classmethod
+    @request_cached()
     def is_enrolled(cls, user, course_key):
         """
         Returns True if the user is enrolled in the course (the entry must exist
@@ -1015,6 +1020,9 @@ class CourseEnrollment(models.Model):
                adding an enrollment for it.
 
         `course_id` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
+
+        The result is memoized for the duration of the request, until an
+        enrollment changes.
         """
         try:
             record = CourseEnrollment.objects.get(user=user, course_id=course_key)
@@ -1154,6 +1162,14 @@ class CourseEnrollment(models.Model):
     def course(self):
         return modulestore().get_course(self.course_id)
 
+    @lazy
+    def course_overview(self):
+        """
+        Returns the CourseOverview of the course of this enrollment, or None if
+        the course doesn't exist.
+        """
+        return CourseOverview.get_from_id(self.course_id)
+
 
 class CourseEnrollmentAllowed(models.Model):
     """
@@ -1330,6 +1346,16 @@ def create_comments_service_user(user):
             exc_info=True
         )
 
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def clear_memoized_enrollments(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forgets the memoized enrollment checks when an enrollment changes.
+    """
+    CourseEnrollment.is_enrolled.clear()
+
+
 # Define login and logout handlers here in the models file, instead of the views file,
 # so that they are more likely to be loaded when a Studio user brings up the Studio admin
 # page to login.  These are currently the only signals available, so we need to continue
@@ -4,8 +4,14 @@ adding users, removing users, and listing members
 """
 
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 import logging
 
 from student.models import CourseAccessRole
@@ -37,16 +43,71 @@ def register_access_role(cls):
 class RoleCache(object):
     """
     A cache of the CourseAccessRoles held by a particular user
+
+    If settings.ROLE_CACHE_TIMEOUT is set, the roles of the user are also shared between
+    requests through the django cache for that many seconds. They are deleted from it
+    whenever the roles of the user change, but a request which loaded them before the
+    change may cache them again, so the timeout should be short.
+
+    A RoleCache created by prefetch_roles only holds the roles of the user in one course,
+    its org and the global roles, and loads all of them when asked about any other role.
     """
-    def __init__(self, user):
-        self._roles = set(
-            CourseAccessRole.objects.filter(user=user).all()
-        )
+    def __init__(self, user, roles=None, course_key=None):
+        self._user = user
+        self._course_key = course_key
+        if roles is None:
+            roles = self._load_roles(user)
+        self._roles = set(roles)
+
+    @staticmethod
+    def _shared_key(user_id):
+        """
+        The key of the roles of the user in the django cache.
+        """
+        return u'student.roles.{}'.format(user_id)
+
+    @classmethod
+    def _load_roles(cls, user):
+        """
+        Return the CourseAccessRoles of the user, from the django cache if they are shared.
+        """
+        timeout = getattr(settings, 'ROLE_CACHE_TIMEOUT', None)
+        if not timeout:
+            return CourseAccessRole.objects.filter(user=user).all()
+
+        roles = cache.get(cls._shared_key(user.id))
+        if roles is None:
+            roles = list(CourseAccessRole.objects.filter(user=user))
+            cache.set(cls._shared_key(user.id), roles, timeout)
+        return roles
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """
+        Delete the roles of the user from the django cache.
+        """
+        if getattr(settings, 'ROLE_CACHE_TIMEOUT', None):
+            cache.delete(cls._shared_key(user_id))
+
+    def _holds_roles_for(self, course_id, org):
+        """
+        Return whether this RoleCache holds the roles of its user in the course course_id,
+        or in the org if course_id is None.
+        """
+        if self._course_key is None:
+            return True
+        if course_id is None:
+            return org in (self._course_key.org, '')
+        return course_id == self._course_key
 
     def has_role(self, role, course_id, org):
         """
         Return whether this RoleCache contains a role with the specified role, course_id, and org
         """
+        if not self._holds_roles_for(course_id, org):
+            self._roles = set(self._load_roles(self._user))
+            self._course_key = None
+
         return any(
             access_role.role == role and
             access_role.course_id == course_id and
@@ -55,6 +116,43 @@ class RoleCache(object):
         )
 
 
+def prefetch_roles(users, course_key):
+    """
+    Load the roles of the users in the course, its org and their global roles with a
+    single query, and cache them on the users, so that checking them doesn't query the
+    database user by user.
+
+    Users whose roles are already cached are skipped.
+    """
+    users = [
+        user for user in users
+        if user.is_authenticated() and user.id is not None and not hasattr(user, '_roles')
+    ]
+    if not users:
+        return
+
+    roles_by_user = defaultdict(list)
+    access_roles = CourseAccessRole.objects.filter(
+        Q(course_id=course_key) | Q(course_id=CourseKeyField.Empty, org__in=[course_key.org, '']),
+        user__in=users,
+    )
+    for access_role in access_roles:
+        roles_by_user[access_role.user_id].append(access_role)
+
+    for user in users:
+        # pylint: disable=protected-access
+        user._roles = RoleCache(user, roles=roles_by_user[user.id], course_key=course_key)
+
+
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def invalidate_role_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Delete the shared roles of a user when they change, e.g. in add_users and remove_users.
+    """
+    RoleCache.invalidate(instance.user_id)
+
+
 class AccessRole(object):
     """
     Object representing a role with particular access to a resource
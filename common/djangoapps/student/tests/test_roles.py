@@ -2,14 +2,17 @@
 Tests of student.roles
 """
 import ddt
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
 from student.tests.factories import AnonymousUserFactory
 
 from student.roles import (
     GlobalStaff, CourseRole, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole
+    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole, prefetch_roles
 )
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -191,3 +194,79 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+
+class PrefetchRolesTestCase(TestCase):
+    """
+    Tests of prefetch_roles
+    """
+    COURSE_KEY = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+    OTHER_KEY = SlashSeparatedCourseKey('edX', 'toy', '2013_Fall')
+
+    def setUp(self):
+        super(PrefetchRolesTestCase, self).setUp()
+        self.users = [UserFactory() for __ in range(3)]
+        CourseStaffRole(self.COURSE_KEY).add_users(self.users[0])
+        OrgInstructorRole(self.COURSE_KEY.org).add_users(self.users[1])
+        CourseStaffRole(self.OTHER_KEY).add_users(self.users[2])
+        self.users = [User.objects.get(id=user.id) for user in self.users]
+
+    def test_prefetch(self):
+        with self.assertNumQueries(1):
+            prefetch_roles(self.users, self.COURSE_KEY)
+            self.assertEqual(
+                [CourseStaffRole(self.COURSE_KEY).has_user(user) for user in self.users],
+                [True, False, False]
+            )
+            self.assertEqual(
+                [CourseInstructorRole(self.COURSE_KEY).has_user(user) for user in self.users],
+                [False, False, False]
+            )
+            self.assertEqual(
+                [OrgInstructorRole(self.COURSE_KEY.org).has_user(user) for user in self.users],
+                [False, True, False]
+            )
+
+    def test_other_course(self):
+        prefetch_roles(self.users, self.COURSE_KEY)
+        # The roles in other courses are loaded when they are checked
+        with self.assertNumQueries(1):
+            self.assertTrue(CourseStaffRole(self.OTHER_KEY).has_user(self.users[2]))
+            self.assertFalse(CourseStaffRole(self.COURSE_KEY).has_user(self.users[2]))
+
+    def test_skips_cached_users(self):
+        self.assertTrue(CourseStaffRole(self.COURSE_KEY).has_user(self.users[0]))
+        with self.assertNumQueries(0):
+            prefetch_roles([self.users[0], AnonymousUserFactory()], self.COURSE_KEY)
+
+
+@override_settings(ROLE_CACHE_TIMEOUT=60)
+class SharedRoleCacheTestCase(TestCase):
+    """
+    Tests of the roles shared between requests through the django cache
+    """
+    COURSE_KEY = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+
+    def setUp(self):
+        super(SharedRoleCacheTestCase, self).setUp()
+        cache.clear()
+        self.user = UserFactory()
+
+    def fresh_user(self):
+        """
+        Return a new copy of the user, as loaded by another request.
+        """
+        return User.objects.get(id=self.user.id)
+
+    def test_shared(self):
+        self.assertFalse(CourseStaffRole(self.COURSE_KEY).has_user(self.fresh_user()))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertFalse(CourseStaffRole(self.COURSE_KEY).has_user(user))
+
+    def test_invalidated(self):
+        self.assertFalse(CourseStaffRole(self.COURSE_KEY).has_user(self.fresh_user()))
+        CourseStaffRole(self.COURSE_KEY).add_users(self.fresh_user())
+        self.assertTrue(CourseStaffRole(self.COURSE_KEY).has_user(self.fresh_user()))
+        CourseStaffRole(self.COURSE_KEY).remove_users(self.fresh_user())
+        self.assertFalse(CourseStaffRole(self.COURSE_KEY).has_user(self.fresh_user()))
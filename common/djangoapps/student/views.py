@@ -84,6 +84,7 @@ from external_auth.login_and_register import (
 
 from bulk_email.models import Optout, CourseAuthorization
 import shoppingcart
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.user_api.models import UserPreference
 from lang_pref import LANGUAGE_KEY
 from notification_prefs.views import enable_notifications
@@ -111,7 +112,6 @@ from student.helpers import (
     auth_pipeline_urls, set_logged_in_cookie,
     check_verify_status_by_course
 )
-from xmodule.error_module import ErrorDescriptor
 from shoppingcart.models import DonationConfiguration, CourseRegistrationCode
 from openedx.core.djangoapps.user_api.api import profile as profile_api
 
@@ -269,32 +269,31 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
 
 def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     """
-    Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
-    a student's dashboard.
+    Get the relevant set of (CourseOverview, CourseEnrollment) pairs to be
+    displayed on a student's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        store = modulestore()
-        with store.bulk_operations(enrollment.course_id):
-            course = store.get_course(enrollment.course_id)
-            if course and not isinstance(course, ErrorDescriptor):
-
-                # if we are in a Microsite, then filter out anything that is not
-                # attributed (by ORG) to that Microsite
-                if course_org_filter and course_org_filter != course.location.org:
-                    continue
-                # Conversely, if we are not in a Microsite, then let's filter out any enrollments
-                # with courses attributed (by ORG) to Microsites
-                elif course.location.org in org_filter_out_set:
-                    continue
-
-                yield (course, enrollment)
-            else:
-                log.error(
-                    u"User %s enrolled in %s course %s",
-                    user.username,
-                    "broken" if course else "non-existent",
-                    enrollment.course_id
-                )
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    overviews = CourseOverview.get_select_courses(enrollment.course_id for enrollment in enrollments)
+    for enrollment in enrollments:
+        course_overview = overviews.get(enrollment.course_id)
+        if course_overview:
+
+            # if we are in a Microsite, then filter out anything that is not
+            # attributed (by ORG) to that Microsite
+            if course_org_filter and course_org_filter != course_overview.location.org:
+                continue
+            # Conversely, if we are not in a Microsite, then let's filter out any enrollments
+            # with courses attributed (by ORG) to Microsites
+            elif course_overview.location.org in org_filter_out_set:
+                continue
+
+            yield (course_overview, enrollment)
+        else:
+            log.error(
+                u"User %s enrolled in broken or non-existent course %s",
+                user.username,
+                enrollment.course_id
+            )
 
 
 def _cert_info(user, course, cert_status, course_mode):
@@ -3,12 +3,11 @@
 from __future__ import absolute_import
 
 import logging
-import json
 
 from django.conf import settings
 
 from track.backends import BaseBackend
-from track.utils import DateTimeJSONEncoder
+from track.utils import encode_event
 
 log = logging.getLogger('track.backends.logger')
 
@@ -33,11 +32,9 @@ class LoggerBackend(BaseBackend):
         self.event_logger = logging.getLogger(name)
 
     def send(self, event):
-        event_str = json.dumps(event, cls=DateTimeJSONEncoder)
-
         # TODO: remove trucation of the serialized event, either at a
         # higher level during the emittion of the event, or by
         # providing warnings when the events exceed certain size.
-        event_str = event_str[:settings.TRACK_MAX_EVENT]
+        event_str = encode_event(event, settings.TRACK_MAX_EVENT)
 
         self.event_logger.info(event_str)
@@ -2,8 +2,14 @@
 
 from __future__ import absolute_import
 
+import atexit
 import logging
+import os
+import threading
+import time
+from Queue import Queue, Empty, Full
 
+from dogapi import dog_stats_api
 import pymongo
 from pymongo import MongoClient
 from pymongo.errors import PyMongoError
@@ -13,6 +19,10 @@ from track.backends import BaseBackend
 
 log = logging.getLogger(__name__)
 
+# What to do with an event sent while the queue of a batching backend is full
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
 
 class MongoBackend(BaseBackend):
     """Class for a MongoDB event tracker Backend"""
@@ -30,6 +40,13 @@ class MongoBackend(BaseBackend):
           - `database`: name of the database
           - `collection`: name of the collection
           - `extra`: parameters to pymongo.MongoClient not listed above
+          - `batch_size`: if given, events are queued, and inserted by a
+            background thread in batches of up to this many events
+          - `flush_interval`: the longest time, in seconds, that a queued
+            event waits for its batch to fill up (default 1)
+          - `max_queue_size`: the most events that can be queued (default 10000)
+          - `overflow`: what happens to an event sent when the queue is
+            full: 'drop' it (the default), or 'block' until there's room
 
         """
 
@@ -73,6 +90,23 @@ class MongoBackend(BaseBackend):
 
         self._create_indexes()
 
+        # Batching
+        self.batch_size = kwargs.get('batch_size')
+        self.flush_interval = kwargs.get('flush_interval', 1)
+        self.overflow = kwargs.get('overflow', OVERFLOW_DROP)
+        if self.overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError('Invalid overflow policy for MongoDB event tracker backend: %s' % self.overflow)
+
+        self.counters = {'queued': 0, 'flushed': 0, 'dropped': 0}
+        self._counters_lock = threading.Lock()
+        self._queue = Queue(kwargs.get('max_queue_size', 10000))
+        self._worker = None
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self._stopping = threading.Event()
+        if self.batch_size:
+            atexit.register(self.close)
+
     def _create_indexes(self):
         """Ensures the proper fields are indexed"""
         # WARNING: The collection will be locked during the index
@@ -86,12 +120,99 @@ class MongoBackend(BaseBackend):
         self.collection.ensure_index('event_type')
 
     def send(self, event):
-        """Insert the event in to the Mongo collection"""
+        """Insert the event in to the Mongo collection, or queue it for insertion"""
+        if not self.batch_size or self._stopping.is_set():
+            # Once closed, no background thread empties the queue anymore
+            self._insert([event])
+            return
+
+        self._ensure_worker()
+        try:
+            self._queue.put(event, block=(self.overflow == OVERFLOW_BLOCK))
+        except Full:
+            self._increment('dropped')
+        else:
+            self._increment('queued')
+
+    def flush(self):
+        """Insert all the queued events on the calling thread"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            if not batch:
+                return
+            self._insert(batch)
+
+    def close(self):
+        """Stop the background thread, and insert the events still queued"""
+        self._stopping.set()
+        if self._worker is not None and self._worker_pid == os.getpid():
+            self._worker.join(self.flush_interval * 2)
+        self.flush()
+
+    def _ensure_worker(self):
+        """
+        Start the background thread that inserts queued events, unless it is
+        already running in this process. Backends are created before web
+        server processes fork, and threads don't survive a fork.
+        """
+        if self._worker_pid == os.getpid() or self._stopping.is_set():
+            return
+        with self._worker_lock:
+            if self._worker_pid != os.getpid():
+                self._worker = threading.Thread(target=self._run, name='track-mongodb-flush')
+                self._worker.daemon = True
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _run(self):
+        """
+        Insert queued events in batches, as soon as `batch_size` events are
+        queued or the first event queued has waited `flush_interval` seconds.
+        """
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except Empty:
+                    break
+
+            self._insert(batch)
+
+    def _insert(self, events):
+        """Insert the events in to the Mongo collection"""
         try:
-            self.collection.insert(event, manipulate=False)
+            if len(events) == 1:
+                self.collection.insert(events[0], manipulate=False)
+            else:
+                self.collection.insert(events, manipulate=False, continue_on_error=True)
         except PyMongoError:
-            # The event will be lost in case of a connection error.
+            # The events will be lost in case of a connection error.
             # pymongo will re-connect/re-authenticate automatically
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+            if self.batch_size:
+                self._increment('dropped', len(events))
+        else:
+            if self.batch_size:
+                self._increment('flushed', len(events))
+
+    def _increment(self, counter, value=1):
+        """Add `value` to the counter, and report it to datadog"""
+        with self._counters_lock:
+            self.counters[counter] += value
+        dog_stats_api.increment('track.backends.mongodb.{0}'.format(counter), value)
@@ -38,3 +38,63 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+
+class TestBatchingMongoBackend(TestCase):
+    def setUp(self):
+        self.mongo_patcher = patch('track.backends.mongodb.MongoClient')
+        self.addCleanup(self.mongo_patcher.stop)
+        self.mongo_patcher.start()
+
+    def _create_backend(self, **kwargs):
+        backend = MongoBackend(**kwargs)
+        self.addCleanup(backend.close)
+        return backend
+
+    def inserted(self, backend):
+        """Return the arguments of each insert into the collection"""
+        return [args[0] for _, args, _ in backend.collection.insert.mock_calls]
+
+    @patch('track.backends.mongodb.MongoBackend._ensure_worker')
+    def test_flush_in_batches(self, _mock_ensure_worker):
+        backend = self._create_backend(batch_size=2)
+        events = [{'test': 1}, {'test': 2}, {'test': 3}]
+        for event in events:
+            backend.send(event)
+        self.assertEqual(self.inserted(backend), [])
+
+        backend.flush()
+        self.assertEqual(self.inserted(backend), [events[:2], events[2]])
+        self.assertEqual(backend.counters, {'queued': 3, 'flushed': 3, 'dropped': 0})
+
+    @patch('track.backends.mongodb.MongoBackend._ensure_worker')
+    def test_full_queue_drops_events(self, _mock_ensure_worker):
+        backend = self._create_backend(batch_size=2, max_queue_size=1)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        backend.flush()
+
+        self.assertEqual(self.inserted(backend), [{'test': 1}])
+        self.assertEqual(backend.counters, {'queued': 1, 'flushed': 1, 'dropped': 1})
+
+    def test_background_flush(self):
+        backend = self._create_backend(batch_size=2, flush_interval=0.01)
+        events = [{'test': 1}, {'test': 2}]
+        for event in events:
+            backend.send(event)
+        backend.close()
+
+        self.assertEqual(sum(len(batch) if isinstance(batch, list) else 1 for batch in self.inserted(backend)), 2)
+        self.assertEqual(backend.counters['flushed'], 2)
+
+    def test_send_after_close(self):
+        backend = self._create_backend(batch_size=2, max_queue_size=1, overflow='block')
+        backend.close()
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+
+        self.assertEqual(self.inserted(backend), [{'test': 1}, {'test': 2}])
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            MongoBackend(batch_size=2, overflow='explode')
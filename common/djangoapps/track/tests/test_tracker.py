@@ -1,3 +1,5 @@
+import time
+
 from django.conf import settings
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -106,6 +108,82 @@ class TestTrackerDjangoInstantiation(TestCase):
         return tracker.backends
 
 
+ASYNC_SETTINGS = {
+    'ENABLED': True,
+    'WORKERS_PER_BACKEND': 2,
+    'MAX_QUEUE_SIZE': 100,
+    'MAX_EVENT_AGES': {},
+}
+
+
+@override_settings(TRACKING_ASYNC_DISPATCH=ASYNC_SETTINGS)
+class TestAsyncDispatch(TestCase):
+    """Test that events can be sent to the backends from worker threads."""
+
+    def tearDown(self):
+        # pylint: disable=protected-access
+        tracker._initialize_backends_from_django_settings()
+        super(TestAsyncDispatch, self).tearDown()
+
+    def _wait_for_workers(self):
+        """Wait until every queued event has been handled."""
+        for worker in tracker.workers.values():
+            worker.queue.join()
+
+    @override_settings(TRACKING_BACKENDS=MULTI_SETTINGS)
+    def test_async_send(self):
+        # pylint: disable=protected-access
+        tracker._initialize_backends_from_django_settings()
+        self.assertEqual(set(tracker.workers), set(MULTI_SETTINGS))
+
+        event_count = 10
+        for _ in xrange(event_count):
+            tracker.send({})
+        self._wait_for_workers()
+
+        for backend in tracker.backends.values():
+            self.assertEqual(backend.count, event_count)
+
+    @override_settings(TRACKING_BACKENDS={
+        'error': {'ENGINE': 'track.tests.test_tracker.ErrorBackend'},
+        'dummy': {'ENGINE': 'track.tests.test_tracker.DummyBackend'},
+    })
+    def test_failing_backend_is_isolated(self):
+        # pylint: disable=protected-access
+        tracker._initialize_backends_from_django_settings()
+
+        tracker.send({})
+        self._wait_for_workers()
+
+        self.assertEqual(tracker.backends['dummy'].count, 1)
+
+    def test_max_event_age(self):
+        backend = DummyBackend()
+        worker = tracker.BackendWorker('dummy', backend, max_event_age=5)
+        worker.queue.put((time.time() - 10, {}))
+        worker.queue.put((time.time(), {}))
+        worker.flush()
+
+        self.assertEqual(backend.count, 1)
+
+    def test_full_queue(self):
+        backend = DummyBackend()
+        worker = tracker.BackendWorker('dummy', backend, max_queue_size=1)
+        # pylint: disable=protected-access
+        worker._ensure_threads = lambda: None
+        worker.put({})
+        worker.put({})
+        worker.flush()
+
+        self.assertEqual(backend.count, 1)
+
+
+class ErrorBackend(BaseBackend):
+    # pylint: disable=unused-argument
+    def send(self, event):
+        raise Exception('Backend failure')
+
+
 class DummyBackend(BaseBackend):
     def __init__(self, **options):
         super(DummyBackend, self).__init__(**options)
@@ -1,11 +1,12 @@
-from datetime import datetime
+from datetime import datetime, date
 import json
 
-from pytz import UTC
+import ddt
+from pytz import UTC, timezone
 
 from django.test import TestCase
 
-from track.utils import DateTimeJSONEncoder
+from track.utils import DateTimeJSONEncoder, encode_datetime, encode_event
 
 
 class TestDateTimeJSONEncoder(TestCase):
@@ -35,3 +36,77 @@ class TestDateTimeJSONEncoder(TestCase):
         self.assertEqual(from_json['a_datetime'], an_iso_datetime)
         self.assertEqual(from_json['a_tz_datetime'], an_iso_datetime)
         self.assertEqual(from_json['a_date'], an_iso_date)
+
+
+@ddt.ddt
+class TestEncodeEvent(TestCase):
+    def setUp(self):
+        self.event = {
+            'event_type': 'problem_check',
+            'time': datetime(2012, 05, 01, 07, 27, 10, 20000),
+            'event': {'answers': {'1_2_1': 'choice_1'}, 'state': {'seed': 1}},
+            'context': {'course_id': 'a/b/c', 'org_id': 'a', 'user_id': 5},
+        }
+
+    def assert_encoded_as_dumps(self, event, max_length):
+        """
+        Check that encode_event(event) has the same JSON as json.dumps, truncated to max_length.
+        """
+        encoded = encode_event(event, max_length)
+        expected = json.dumps(event, cls=DateTimeJSONEncoder)
+        self.assertEqual(len(encoded), min(len(expected), max_length))
+        if len(expected) <= max_length:
+            self.assertEqual(json.loads(encoded), json.loads(expected))
+        return encoded
+
+    def test_same_as_dumps(self):
+        self.assert_encoded_as_dumps(self.event, 50000)
+
+    def test_without_context(self):
+        del self.event['context']
+        self.assertEqual(encode_event(self.event, 50000), json.dumps(self.event, cls=DateTimeJSONEncoder))
+
+    def test_only_context(self):
+        self.assertEqual(json.loads(encode_event({'context': {'a': 1}}, 50000)), {'context': {'a': 1}})
+
+    def test_datetime_encoding(self):
+        for value in (
+            datetime(2012, 05, 01, 07, 27, 10, 20000),
+            datetime(2012, 05, 01, 07, 27, 10, 20000, tzinfo=UTC),
+            datetime(2012, 05, 01, 03, 27, 10, 20000, tzinfo=timezone('US/Eastern')),
+            datetime(2012, 05, 01, 07, 27, 10),
+            date(2012, 05, 01),
+        ):
+            self.assertEqual(encode_datetime(value), DateTimeJSONEncoder().default(value))
+
+    def test_not_serializable(self):
+        with self.assertRaises(TypeError):
+            encode_event({'event': object()}, 50000)
+
+    def test_changed_context(self):
+        encode_event(self.event, 50000)
+        self.event['context'] = dict(self.event['context'], user_id=6)
+        encoded = self.assert_encoded_as_dumps(self.event, 50000)
+        self.assertEqual(json.loads(encoded)['context']['user_id'], 6)
+
+    def test_nested_context_changed_in_place(self):
+        self.event['context']['module'] = {'display_name': 'first'}
+        encode_event(self.event, 50000)
+        self.event['context']['module']['display_name'] = 'second'
+        encoded = self.assert_encoded_as_dumps(self.event, 50000)
+        self.assertEqual(json.loads(encoded)['context']['module']['display_name'], 'second')
+
+    @ddt.data(
+        ('event', 'a' * 1000),
+        ('event', u'\xe9' * 1000),
+        ('event', '\xc3\xa9' * 1000),
+        ('event', {'answer': 'a' * 1000}),
+        ('event', {'state': {'student_answers': {'1_2_1': 'a' * 1000}}}),
+        ('event', ['a' * 1000, 'b']),
+        ('context', {'path': 'a' * 1000}),
+    )
+    @ddt.unpack
+    def test_truncation(self, key, value):
+        self.event[key] = value
+        encoded = self.assert_encoded_as_dumps(self.event, 500)
+        self.assertIn(json.dumps(value)[:20], encoded)
@@ -16,10 +16,28 @@ below::
       }
   }
 
+Events can also be sent to the backends asynchronously, by worker threads,
+with the TRACKING_ASYNC_DISPATCH setting::
+
+  TRACKING_ASYNC_DISPATCH = {
+      'ENABLED': True,
+      'WORKERS_PER_BACKEND': 1,
+      'MAX_QUEUE_SIZE': 10000,
+      'MAX_EVENT_AGES': {
+          'tracker_name': 5,
+      }
+  }
+
 """
 
+import atexit
 import inspect
+import logging
+import os
+import threading
+import time
 from importlib import import_module
+from Queue import Queue, Empty, Full
 
 from dogapi import dog_stats_api
 
@@ -30,9 +48,13 @@ from track.backends import BaseBackend
 
 __all__ = ['send']
 
+log = logging.getLogger(__name__)
 
 backends = {}
 
+# When dispatching asynchronously, the BackendWorker of each backend, by name
+workers = {}
+
 
 def _initialize_backends_from_django_settings():
     """
@@ -41,6 +63,7 @@ def _initialize_backends_from_django_settings():
 
     """
     backends.clear()
+    workers.clear()
 
     config = getattr(settings, 'TRACKING_BACKENDS', {})
 
@@ -51,6 +74,18 @@ def _initialize_backends_from_django_settings():
             options = values.get('OPTIONS', {})
             backends[name] = _instantiate_backend_from_name(engine, options)
 
+    async_config = getattr(settings, 'TRACKING_ASYNC_DISPATCH', None) or {}
+    if async_config.get('ENABLED'):
+        max_event_ages = async_config.get('MAX_EVENT_AGES', {})
+        for name, backend in backends.iteritems():
+            workers[name] = BackendWorker(
+                name,
+                backend,
+                num_threads=async_config.get('WORKERS_PER_BACKEND', 1),
+                max_queue_size=async_config.get('MAX_QUEUE_SIZE', 10000),
+                max_event_age=max_event_ages.get(name),
+            )
+
 
 def _instantiate_backend_from_name(name, options):
     """
@@ -83,6 +118,100 @@ def _instantiate_backend_from_name(name, options):
     return backend
 
 
+class BackendWorker(object):
+    """
+    Sends events to a backend from a pool of threads, so that a slow or
+    failing backend holds up neither requests nor the other backends.
+
+    Events are dropped if the backend falls `max_queue_size` events behind,
+    or if they've waited in the queue longer than `max_event_age` seconds by
+    the time a thread picks them up. The time the backend takes to send an
+    event isn't bounded: a send which hangs stalls its thread, and once all
+    `num_threads` are stalled, the queue fills up and new events are dropped.
+    """
+    def __init__(self, name, backend, num_threads=1, max_queue_size=10000, max_event_age=None):
+        self.name = name
+        self.backend = backend
+        self.num_threads = num_threads
+        self.max_event_age = max_event_age
+        self.queue = Queue(max_queue_size)
+        self._threads_pid = None
+        self._lock = threading.Lock()
+
+    def put(self, event):
+        """
+        Queue an event to be sent to the backend, without blocking.
+        """
+        self._ensure_threads()
+        try:
+            self.queue.put_nowait((time.time(), event))
+        except Full:
+            dog_stats_api.increment('track.send.backend.{0}.dropped'.format(self.name))
+
+    def flush(self):
+        """
+        Send the events still queued from the calling thread.
+        """
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except Empty:
+                return
+            self._send(*item)
+            self.queue.task_done()
+
+    def _ensure_threads(self):
+        """
+        Start the threads unless they are already running in this process.
+        Backends are created before web server processes fork, and threads
+        don't survive a fork.
+        """
+        if self._threads_pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads_pid != os.getpid():
+                for __ in xrange(self.num_threads):
+                    thread = threading.Thread(target=self._run, name='track-{0}'.format(self.name))
+                    thread.daemon = True
+                    thread.start()
+                self._threads_pid = os.getpid()
+
+    def _run(self):
+        """
+        Send queued events to the backend, forever.
+        """
+        while True:
+            item = self.queue.get()
+            dog_stats_api.histogram('track.send.backend.{0}.queue_depth'.format(self.name), self.queue.qsize())
+            self._send(*item)
+            self.queue.task_done()
+
+    def _send(self, queued_at, event):
+        """
+        Send an event to the backend, unless it has waited too long in the queue.
+        """
+        if self.max_event_age is not None and time.time() - queued_at > self.max_event_age:
+            dog_stats_api.increment('track.send.backend.{0}.expired'.format(self.name))
+            return
+
+        try:
+            with dog_stats_api.timer('track.send.backend.{0}'.format(self.name)):
+                self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u'Error sending event to tracking backend %s', self.name)
+
+
+def _flush_workers():
+    """
+    Send the events still queued for each backend.
+    """
+    for worker in workers.itervalues():
+        worker.flush()
+
+
+atexit.register(_flush_workers)
+
+
 @dog_stats_api.timed('track.send')
 def send(event):
     """
@@ -91,6 +220,11 @@ def send(event):
     """
     dog_stats_api.increment('track.send.count')
 
+    if workers:
+        for worker in workers.itervalues():
+            worker.put(event)
+        return
+
     for name, backend in backends.iteritems():
         with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
             backend.send(event)
@@ -1,7 +1,9 @@
 """Utility functions and classes for track backends"""
 
-from datetime import datetime, date
+import copy
+from datetime import datetime, date, timedelta
 import json
+import threading
 
 from pytz import UTC
 
@@ -28,3 +30,125 @@ class DateTimeJSONEncoder(json.JSONEncoder):
             return obj.isoformat()
 
         return super(DateTimeJSONEncoder, self).default(obj)
+
+
+# Timezone offset of datetimes that are already in UTC
+ZERO = timedelta(0)
+
+
+def encode_datetime(obj):
+    """
+    Serialize datetime and date objects of iso format, as DateTimeJSONEncoder
+    does, for use as the `default` of a JSONEncoder.
+    """
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            return obj.isoformat() + '+00:00'
+        elif obj.utcoffset() == ZERO:
+            return obj.replace(tzinfo=None).isoformat() + '+00:00'
+        return obj.astimezone(UTC).isoformat()
+    elif isinstance(obj, date):
+        return obj.isoformat()
+
+    raise TypeError(repr(obj) + " is not JSON serializable")
+
+
+_encode = json.JSONEncoder(default=encode_datetime).encode
+_local = threading.local()
+
+
+def encode_event(event, max_length):
+    """
+    Serialize `event` to JSON, truncated to `max_length` characters.
+
+    The result is the same JSON as `json.dumps(event, cls=DateTimeJSONEncoder)`,
+    except that the "context" of the event comes first:
+
+    * The context is encoded once for all the events that share it, which is
+      usually all the events of a request.
+    * Strings of the event and of its "event" payload that are longer than
+      `max_length` are cut before they are encoded, since no more than that
+      can be kept of them.
+    """
+    context = event.get('context')
+    if isinstance(context, dict):
+        event = dict(event)
+        del event['context']
+        encoded_context = _encode_context(context, max_length)
+    else:
+        encoded_context = None
+
+    if _has_long_strings(event, max_length):
+        event = _shorten_strings(event, max_length)
+    encoded_event = _encode(event)
+
+    if encoded_context is None:
+        pass
+    elif event:
+        encoded_event = '{"context": ' + encoded_context + ', ' + encoded_event[1:]
+    else:
+        encoded_event = '{"context": ' + encoded_context + '}'
+    return encoded_event[:max_length]
+
+
+def _encode_context(context, max_length):
+    """
+    Return the JSON of `context`, reusing that of the last context encoded by
+    this thread if it is equal.
+
+    A deep copy of the context is kept to compare with, since the values of
+    a context, such as its nested dicts, can be changed in place between events.
+    """
+    cached = getattr(_local, 'context', None)
+    if cached is not None and cached[0] == context and cached[1] == max_length:
+        return cached[2]
+
+    encoded_context = _encode(_shorten_strings(context, max_length))
+    _local.context = (copy.deepcopy(context), max_length, encoded_context)
+    return encoded_context
+
+
+def _has_long_strings(event, max_length):
+    """
+    Whether a string of `event` or of its "event" payload is longer than `max_length`.
+    """
+    for value in event.itervalues():
+        if isinstance(value, basestring) and len(value) > max_length:
+            return True
+    payload = event.get('event')
+    if isinstance(payload, dict):
+        for value in payload.itervalues():
+            if isinstance(value, basestring) and len(value) > max_length:
+                return True
+    return False
+
+
+def _shorten_strings(obj, max_length):
+    """
+    Return `obj`, or a copy of it where the strings are cut to `max_length` characters.
+
+    Every character of a string takes at least one character of JSON, so what
+    is cut would have been truncated from the serialized event anyway.
+    """
+    if isinstance(obj, unicode):
+        if len(obj) > max_length:
+            return obj[:max_length]
+    elif isinstance(obj, str):
+        if len(obj) > max_length:
+            # Don't leave half of a UTF-8 character at the end
+            return obj[:max_length].decode('utf-8', 'ignore')
+    elif isinstance(obj, dict):
+        shortened = None
+        for key, value in obj.iteritems():
+            short_value = _shorten_strings(value, max_length)
+            if short_value is not value:
+                if shortened is None:
+                    shortened = dict(obj)
+                shortened[key] = short_value
+        if shortened is not None:
+            return shortened
+    elif isinstance(obj, (list, tuple)):
+        shortened = [_shorten_strings(value, max_length) for value in obj]
+        if any(short_value is not value for short_value, value in zip(shortened, obj)):
+            return shortened
+    return obj
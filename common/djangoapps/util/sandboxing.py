@@ -1,5 +1,16 @@
+import gettext
+import logging
 import re
+
 from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
+from lxml import etree
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem, is_student_independent
+from capa.safe_exec import SafeExecCache
+from xmodule.contentstore.django import contentstore
+
+log = logging.getLogger(__name__)
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
@@ -38,3 +49,67 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+_safe_exec_cache = None
+
+
+def get_safe_exec_cache():
+    """
+    Return the SafeExecCache of the results of the code of problems.
+
+    The results are stored in the 'safe_exec' cache if there is one, else in
+    the default cache, and limited by settings.SAFE_EXEC_CACHE.
+    """
+    global _safe_exec_cache  # pylint: disable=global-statement
+    if _safe_exec_cache is None:
+        try:
+            cache = get_cache('safe_exec')
+        except InvalidCacheBackendError:
+            cache = get_cache('default')
+        _safe_exec_cache = SafeExecCache(
+            cache,
+            max_entry_size=settings.SAFE_EXEC_CACHE['MAX_ENTRY_SIZE'],
+            timeout=settings.SAFE_EXEC_CACHE['TIMEOUT'],
+        )
+    return _safe_exec_cache
+
+
+def prewarm_safe_exec_cache(descriptor, seeds):
+    """
+    Run the code of the capa problem `descriptor` for each of `seeds`, so that
+    its results are cached for the students who get these seeds.
+
+    Only problem code marked as student independent is run, as the results of
+    the other code can't be shared by students. Returns the number of seeds the
+    problem was loaded for, whether or not its results were already cached.
+    """
+    if '<script' not in descriptor.data or not is_student_independent(etree.XML(descriptor.data)):
+        return 0
+
+    course_key = descriptor.location.course_key
+    capa_system = LoncapaSystem(
+        ajax_url=None,
+        anonymous_student_id=None,
+        cache=get_safe_exec_cache(),
+        can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+        get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+        DEBUG=False,
+        filestore=descriptor.runtime.resources_fs,
+        i18n=gettext.NullTranslations(),
+        node_path=getattr(settings, 'NODE_PATH', ''),
+        render_template=lambda template, context: u'',
+        seed=None,
+        STATIC_URL=settings.STATIC_URL,
+        xqueue=None,
+    )
+    loaded = 0
+    for seed in seeds:
+        try:
+            LoncapaProblem(descriptor.data, id=descriptor.location.html_id(), capa_system=capa_system, seed=seed)
+        except Exception:  # pylint: disable=broad-except
+            # Students will see the error when they load the problem
+            log.warning(u"Could not run the code of %s for seed %s", descriptor.location, seed, exc_info=True)
+            break
+        loaded += 1
+    return loaded
@@ -3,7 +3,8 @@ Tests for sandboxing.py in util app
 """
 
 from django.test import TestCase
-from util.sandboxing import can_execute_unsafe_code
+import mock
+from util.sandboxing import can_execute_unsafe_code, get_safe_exec_cache
 from django.test.utils import override_settings
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -33,3 +34,16 @@ class SandboxingTest(TestCase):
         """
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
+
+    @override_settings(SAFE_EXEC_CACHE={'MAX_ENTRY_SIZE': 1000, 'TIMEOUT': 60})
+    @mock.patch('util.sandboxing._safe_exec_cache', None)
+    def test_safe_exec_cache(self):
+        """
+        Test that the results of problem code are cached in the default cache, with the configured limits
+        """
+        safe_exec_cache = get_safe_exec_cache()
+        self.assertEqual(safe_exec_cache.max_entry_size, 1000)
+        self.assertEqual(safe_exec_cache.timeout, 60)
+        safe_exec_cache.set('key', (None, {'a': 1}))
+        self.assertEqual(safe_exec_cache.get('key'), (None, {'a': 1}))
+        self.assertIs(get_safe_exec_cache(), safe_exec_cache)
@@ -6,7 +6,6 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 
 import math
 import operator
-import numbers
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +72,14 @@ SUFFIXES = {
 }
 
 
+# Number of parsed expressions that `parse_expression` keeps
+PARSE_CACHE_SIZE = 1000
+_parse_cache = {}
+
+# Built by `_get_grammar` when it is first needed
+_grammar = None
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -122,7 +129,7 @@ def eval_atom(parse_result):
     In the case of parenthesis, ignore them.
     """
     # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    result = next(k for k in parse_result if not isinstance(k, basestring))
     return result
 
 
@@ -136,7 +143,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if not isinstance(k, basestring)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -155,10 +162,15 @@ def eval_parallel(parse_result):
     """
     if len(parse_result) == 1:
         return parse_result[0]
-    if 0 in parse_result:
+    inputs = [e for e in parse_result if not isinstance(e, basestring)]
+    if any(isinstance(e, numpy.ndarray) for e in inputs):
+        # Evaluating all the samples at once: NaN for the samples with a zero
+        has_zero = reduce(numpy.logical_or, [e == 0 for e in inputs])
+        reciprocals = [1. / numpy.where(e == 0, 1, e) for e in inputs]
+        return numpy.where(has_zero, float('nan'), 1. / sum(reciprocals))
+    if 0 in inputs:
         return float('nan')
-    reciprocals = [1. / e for e in parse_result
-                   if isinstance(e, numbers.Number)]
+    reciprocals = [1. / e for e in inputs]
     return 1. / sum(reciprocals)
 
 
@@ -173,12 +185,12 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        if not isinstance(token, basestring):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +203,12 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        if not isinstance(token, basestring):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -221,7 +233,8 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     Evaluate an expression; that is, take a string of math and return a float.
 
     -Variables are passed as a dictionary from string to value. They must be
-     python numbers.
+     python numbers, or numpy arrays to evaluate the expression at several
+     points at once (see `vectorized_evaluator`).
     -Unary functions are passed as a dictionary from string to function.
     """
     # No need to go further.
@@ -229,8 +242,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    math_interpreter = parse_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
@@ -258,6 +270,113 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+def vectorized_evaluator(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression at several points in one pass; return a list of floats.
+
+    -`variables_list` is a list of dictionaries like the `variables` of
+     `evaluator`, all with the same variables.
+
+    Where `evaluator` would raise an error for some point, this raises an
+    error too, though maybe not the same one: any floating point error (as
+    numpy reports them) is raised as a FloatingPointError.
+    """
+    if not variables_list:
+        return []
+
+    variables = {
+        name: numpy.array([point[name] for point in variables_list])
+        for name in variables_list[0]
+    }
+    with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+        result = evaluator(variables, functions, math_expr, case_sensitive)
+
+    if isinstance(result, numpy.ndarray):
+        return result.tolist()
+    # The expression doesn't depend on the variables
+    return [result] * len(variables_list)
+
+
+def parse_expression(math_expr, case_sensitive=False):
+    """
+    Return a ParseAugmenter that has parsed `math_expr`.
+
+    Parses are memoized, so the ParseAugmenter may be shared with other
+    callers and must not be modified.
+    """
+    key = (math_expr, case_sensitive)
+    math_interpreter = _parse_cache.get(key)
+    if math_interpreter is None:
+        math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        math_interpreter.parse_algebra()
+        if len(_parse_cache) >= PARSE_CACHE_SIZE:
+            _parse_cache.clear()
+        _parse_cache[key] = math_interpreter
+    return math_interpreter
+
+
+def _get_grammar():
+    """
+    Return the pyparsing grammar of algebraic expressions.
+
+    It is only built once, as building it takes longer than most parses.
+    """
+    global _grammar  # pylint: disable=global-statement
+    if _grammar is not None:
+        return _grammar
+
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    _grammar = expr + stringEnd
+    return _grammar
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -278,23 +397,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -307,57 +409,18 @@ class ParseAugmenter(object):
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree = _get_grammar().parseString(self.math_expr)[0]
+
+        # Find the variables and functions used in the tree.
+        nodes = [self.tree]
+        while nodes:
+            node = nodes.pop()
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            nodes.extend(child for child in node if isinstance(child, ParseResults))
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
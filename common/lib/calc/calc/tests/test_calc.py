@@ -559,3 +559,63 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_parse_memoized(self):
+        """
+        Check that expressions are only parsed once
+        """
+        first = calc.parse_expression('x + sin(y)')
+        self.assertIs(first, calc.parse_expression('x + sin(y)'))
+        self.assertIsNot(first, calc.parse_expression('x + sin(y)', case_sensitive=True))
+        self.assertEqual(first.variables_used, set(['x', 'y']))
+        self.assertEqual(first.functions_used, set(['sin']))
+
+        # The memoized parse gives the same results for other variables
+        self.assertEqual(calc.evaluator({'x': 1, 'y': 0}, {}, 'x + sin(y)'), 1)
+        self.assertEqual(calc.evaluator({'x': 2, 'y': 0}, {}, 'x + sin(y)'), 2)
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluator({'x': 2}, {}, 'x + sin(y)')
+
+
+class VectorizedEvaluatorTest(unittest.TestCase):
+    """
+    Run tests for calc.vectorized_evaluator
+    """
+    points = [{'x': 1.0, 'y': 2.0}, {'x': -3.5, 'y': 0.5}, {'x': 4.0, 'y': 10.0}]
+
+    def assert_same_as_evaluator(self, math_expr, points=None):
+        """
+        Check that vectorized_evaluator gives what evaluator gives at each point
+        """
+        points = points or self.points
+        results = calc.vectorized_evaluator(points, {}, math_expr)
+        self.assertEqual(len(results), len(points))
+        for point, result in zip(points, results):
+            expected = calc.evaluator(point, {}, math_expr)
+            if numpy.isnan(expected):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertAlmostEqual(result, expected, places=10)
+
+    def test_expressions(self):
+        for math_expr in (
+            'x + 2*y', '-x - y + 3', 'x/y * 2', 'y^2^0.5', 'x^2', 'sin(x) + cos(y)^2',
+            'sqrt(y) * ln(y)', 'x || y', '(x || 0) + 1', 'i*x + j', 'pi*T', '5k', '',
+        ):
+            self.assert_same_as_evaluator(math_expr)
+
+    def test_no_points(self):
+        self.assertEqual(calc.vectorized_evaluator([], {}, 'x'), [])
+
+    def test_errors(self):
+        """
+        Points where evaluator raises an error make vectorized_evaluator raise one
+        """
+        with self.assertRaises(FloatingPointError):
+            calc.vectorized_evaluator(self.points, {}, '1/(x-1)')
+        with self.assertRaises(FloatingPointError):
+            calc.vectorized_evaluator(self.points, {}, 'x^0.5')
+        with self.assertRaises(TypeError):
+            calc.vectorized_evaluator(self.points, {}, 'fact(y)')
+        with self.assertRaises(calc.UndefinedVariable):
+            calc.vectorized_evaluator(self.points, {}, 'z')
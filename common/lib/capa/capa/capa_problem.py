@@ -58,6 +58,22 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+
+def is_student_independent(tree):
+    """
+    Return whether all the Python scripts of the problem `tree` are marked with
+    student_independent="true".
+
+    With this attribute, the author states that the results of the scripts
+    only depend on the seed, so that they are cached for all the students who
+    get the same seed. anonymous_student_id isn't available to such scripts.
+    """
+    scripts = [
+        script for script in tree.findall('.//script')
+        if not any(lang in script.get('type', '') for lang in ('javascript', 'perl'))
+    ]
+    return bool(scripts) and all(script.get('student_independent') == 'true' for script in scripts)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -654,6 +670,12 @@ class LoncapaProblem(object):
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
 
+            # The results of code that the author marked as not depending on the
+            # student are cached for all the students who get the same seed.
+            student_independent = is_student_independent(tree)
+            if student_independent:
+                del context['anonymous_student_id']
+
             try:
                 safe_exec(
                     all_code,
@@ -670,6 +692,9 @@ class LoncapaProblem(object):
                 msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
                 raise responsetypes.LoncapaProblemError(msg)
 
+            if student_independent:
+                context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
         context['python_path'] = python_path
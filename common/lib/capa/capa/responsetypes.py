@@ -11,6 +11,7 @@ Used by capa_problem.py
 # standard library imports
 import abc
 import cgi
+import hashlib
 import inspect
 import json
 import logging
@@ -36,7 +37,7 @@ from shapely.geometry import Point, MultiPoint
 import dogstats_wrapper as dog_stats_api
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import evaluator, vectorized_evaluator, UndefinedVariable
 from . import correctmap
 from .registry import TagRegistry
 from datetime import datetime
@@ -58,6 +59,16 @@ registry = TagRegistry()
 CorrectMap = correctmap.CorrectMap  # pylint: disable=invalid-name
 CORRECTMAP_PY = None
 
+# Number of instructor's answers whose results at the samples FormulaResponse keeps
+INSTRUCTOR_RESULTS_CACHE_SIZE = 1000
+_instructor_results_cache = {}
+
+# Secret mixed into the seeds of the samples of FormulaResponse, so that students
+# can't work out the samples of a problem from its seed and location. It is drawn
+# once per process, which keeps the samples, and so the instructor's results at
+# them, the same for all the checks of a problem made by that process.
+_FORMULA_SAMPLES_SECRET = os.urandom(16)
+
 # Make '_' a no-op so we can scrape strings
 _ = lambda text: text
 
@@ -2390,6 +2401,12 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = self.capa_system.i18n.ugettext
 
+        try:
+            return vectorized_evaluator(var_dict_list, dict(), answer, case_sensitive=self.case_sensitive)
+        except Exception:  # pylint: disable=broad-except
+            # Evaluate the test cases one by one below, to report the error
+            pass
+
         out = []
         for var_dict in var_dict_list:
             try:
@@ -2445,7 +2462,12 @@ class FormulaResponse(LoncapaResponse):
         """
         Returns a list of dictionaries mapping variables to random values in range,
         as expected by tupleize_answers.
+
+        The values only depend on the seed of the problem, the id of this
+        response and a secret of this process, so that the results of the
+        instructor's answer can be cached (see instructor_results).
         """
+        rng = random.Random(self._samples_seed(samples))
         variables = samples.split('@')[0].split(',')
         numsamples = int(samples.split('@')[1].split('#')[1])
         sranges = zip(*map(lambda x: map(float, x.split(",")),
@@ -2458,11 +2480,18 @@ class FormulaResponse(LoncapaResponse):
             # ranges give numerical ranges for testing
             for var in ranges:
                 # TODO: allow specified ranges (i.e. integers and complex numbers) for random variables
-                value = random.uniform(*ranges[var])
+                value = rng.uniform(*ranges[var])
                 var_dict[str(var)] = value
             out.append(var_dict)
         return out
 
+    def _samples_seed(self, samples):
+        """
+        Returns the seed of the values which randomize_variables draws for `samples`.
+        """
+        seed = repr((self.context.get('seed'), self.id, samples))
+        return int(hashlib.sha256(_FORMULA_SAMPLES_SECRET + seed).hexdigest(), 16)
+
     def check_formula(self, expected, given, samples):
         """
         Given an expected answer string, a given (student-produced) answer
@@ -2471,7 +2500,7 @@ class FormulaResponse(LoncapaResponse):
         """
         var_dict_list = self.randomize_variables(samples)
         student_result = self.tupleize_answers(given, var_dict_list)
-        instructor_result = self.tupleize_answers(expected, var_dict_list)
+        instructor_result = self.instructor_results(expected, samples, var_dict_list)
 
         correct = all(compare_with_tolerance(student, instructor, self.tolerance)
                       for student, instructor in zip(student_result, instructor_result))
@@ -2480,6 +2509,25 @@ class FormulaResponse(LoncapaResponse):
         else:
             return "incorrect"
 
+    def instructor_results(self, expected, samples, var_dict_list):
+        """
+        Returns tupleize_answers(expected, var_dict_list), where var_dict_list
+        comes from randomize_variables(samples).
+
+        The results are cached by response, seed, and the text of the expected
+        answer and samples, since rescoring a problem evaluates the same
+        instructor's answer at the same samples for each student. Changing the
+        answer or the samples of the problem changes the key.
+        """
+        key = (self.id, self.context.get('seed'), expected, samples, self.case_sensitive)
+        results = _instructor_results_cache.get(key)
+        if results is None:
+            results = self.tupleize_answers(expected, var_dict_list)
+            if len(_instructor_results_cache) >= INSTRUCTOR_RESULTS_CACHE_SIZE:
+                _instructor_results_cache.clear()
+            _instructor_results_cache[key] = results
+        return results
+
     def compare_answer(self, ans1, ans2):
         """
         An external interface for comparing whether a and b are equal.
@@ -0,0 +1,64 @@
+"""A cache of safe_exec results."""
+
+import json
+import logging
+
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# Results that take more than this many bytes of JSON aren't cached by default.
+DEFAULT_MAX_ENTRY_SIZE = 100 * 1024
+
+
+class SafeExecCache(object):
+    """
+    A cache of the results of safe_exec, to pass as its `cache`.
+
+    The results are stored in `cache`, an object with .get(key) and
+    .set(key, value[, timeout]) methods, such as a Django cache. A cache shared
+    by all the processes means each problem only has to be run once per seed.
+
+    Results that take more than `max_entry_size` bytes of JSON are not cached,
+    and `timeout` is the lifetime of the entries, or None for the default of
+    `cache`.
+
+    The hits, misses and results too large to cache are counted, both on the
+    object and as the `capa.safe_exec.cache.*` metrics.
+    """
+    def __init__(self, cache, max_entry_size=DEFAULT_MAX_ENTRY_SIZE, timeout=None):
+        self.cache = cache
+        self.max_entry_size = max_entry_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.oversized = 0
+
+    def get(self, key):
+        """
+        Return the result cached under `key`, or None.
+        """
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+            dog_stats_api.increment('capa.safe_exec.cache.miss')
+        else:
+            self.hits += 1
+            dog_stats_api.increment('capa.safe_exec.cache.hit')
+        return value
+
+    def set(self, key, value):
+        """
+        Cache `value` under `key`, unless it is too large.
+        """
+        size = len(json.dumps(value))
+        if size > self.max_entry_size:
+            self.oversized += 1
+            dog_stats_api.increment('capa.safe_exec.cache.oversized')
+            log.info("Not caching a safe_exec result of %d bytes", size)
+            return
+
+        if self.timeout is None:
+            self.cache.set(key, value)
+        else:
+            self.cache.set(key, value, self.timeout)
@@ -9,7 +9,7 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, SafeExecCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -166,6 +166,36 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_safe_exec_cache(self):
+        cache = {}
+        safe_exec_cache = SafeExecCache(DictCache(cache))
+        g = {}
+        safe_exec("a = 17", g, random_seed=1, cache=safe_exec_cache)
+        self.assertEqual((safe_exec_cache.hits, safe_exec_cache.misses), (0, 1))
+        self.assertEqual(cache.values(), [(None, {'a': 17})])
+
+        g = {}
+        safe_exec("a = 17", g, random_seed=1, cache=safe_exec_cache)
+        self.assertEqual(g['a'], 17)
+        self.assertEqual((safe_exec_cache.hits, safe_exec_cache.misses), (1, 1))
+
+        # Another seed is another result
+        safe_exec("a = 17", {}, random_seed=2, cache=safe_exec_cache)
+        self.assertEqual((safe_exec_cache.hits, safe_exec_cache.misses), (1, 2))
+        self.assertEqual(len(cache), 2)
+
+    def test_safe_exec_cache_size_limit(self):
+        cache = {}
+        safe_exec_cache = SafeExecCache(DictCache(cache), max_entry_size=100)
+        g = {}
+        safe_exec("a = 'x' * 1000", g, cache=safe_exec_cache)
+        self.assertEqual(len(g['a']), 1000)
+        self.assertEqual(cache, {})
+        self.assertEqual(safe_exec_cache.oversized, 1)
+
+        safe_exec("a = 'x' * 10", g, cache=safe_exec_cache)
+        self.assertEqual(len(cache), 1)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -91,6 +91,32 @@ class CapaHtmlRenderTest(unittest.TestCase):
         span_element = rendered_html.find('span')
         self.assertEqual(span_element.text, 'Welcome student')
 
+    def test_anonymous_student_id_with_script(self):
+        # The results of code marked as student independent are cached for all the
+        # students, the results of the other code for each student
+        for code, attrs, cached_results in (
+                ("a = 1", 'student_independent="true"', 1),
+                ("a = 1", '', 2),
+                ("a = anonymous_student_id", '', 2),
+        ):
+            xml_str = textwrap.dedent("""
+                <problem>
+                <script type="loncapa/python" {attrs}>{code}</script>
+                <span>$a $anonymous_student_id</span>
+                </problem>
+            """.format(code=code, attrs=attrs))
+            cache = {}
+            for student in ("student", "other_student"):
+                capa_system = test_capa_system()
+                capa_system.anonymous_student_id = student
+                capa_system.cache = mock.Mock(get=cache.get, set=cache.__setitem__)
+                problem = new_loncapa_problem(xml_str, capa_system=capa_system)
+
+                rendered_html = etree.XML(problem.get_html())
+                expected_a = 1 if code == "a = 1" else student
+                self.assertEqual(rendered_html.find('span').text, '{} {}'.format(expected_a, student))
+            self.assertEqual(len(cache), cached_results)
+
     def test_render_script(self):
         # Generate some XML with a <script> tag
         xml_str = textwrap.dedent("""
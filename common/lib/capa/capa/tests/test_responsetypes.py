@@ -530,6 +530,57 @@ class FormulaResponseTest(ResponseTest):
         self.assertTrue(problem.responders.values()[0].validate_answer('14*x'))
         self.assertFalse(problem.responders.values()[0].validate_answer('3*y+2*x'))
 
+    def test_instructor_results_cached(self):
+        """
+        Test that the instructor's answer is evaluated once for the same samples and seed.
+        """
+        sample_dict = {'x': (1, 2)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=10,
+                                     tolerance="1%",
+                                     answer="x^2 + 1")
+        with mock.patch.dict('capa.responsetypes._instructor_results_cache', clear=True):
+            with mock.patch('capa.responsetypes.vectorized_evaluator', wraps=calc.vectorized_evaluator) as evaluator:
+                self.assert_grade(problem, "x*x + 1", "correct")
+                self.assert_grade(problem, "x + 1", "incorrect")
+                # Another student's problem with the same seed
+                self.assert_grade(self.build_problem(sample_dict=sample_dict,
+                                                     num_samples=10,
+                                                     tolerance="1%",
+                                                     answer="x^2 + 1"), "1 + x^2", "correct")
+
+        evaluated = [call[0][2] for call in evaluator.call_args_list]
+        self.assertEqual(evaluated, ["x*x + 1", "x^2 + 1", "x + 1", "1 + x^2"])
+
+    def test_samples_depend_on_seed(self):
+        """
+        Test that the samples are the same for problems with the same seed and location.
+        """
+        sample_dict = {'x': (1, 2)}
+        responders = [
+            new_loncapa_problem(self.xml_factory.build_xml(sample_dict=sample_dict, num_samples=5,
+                                                           tolerance="1%", answer="x"), seed=seed).responders.values()[0]
+            for seed in (1, 1, 2)
+        ]
+        samples = [responder.randomize_variables(responder.samples) for responder in responders]
+        self.assertEqual(samples[0], samples[1])
+        self.assertNotEqual(samples[0], samples[2])
+        self.assertEqual(len(samples[0]), 5)
+        self.assertTrue(all(1 <= sample['x'] <= 2 for sample in samples[0]))
+
+    def test_samples_not_predictable(self):
+        """
+        Test that the samples can't be worked out from the seed alone.
+        """
+        xml = self.xml_factory.build_xml(sample_dict={'x': (1, 2)}, num_samples=5, tolerance="1%", answer="x")
+        responder = new_loncapa_problem(xml, seed=1).responders.values()[0]
+        samples = responder.randomize_variables(responder.samples)
+
+        rng = random.Random(1)
+        self.assertNotEqual([sample['x'] for sample in samples], [rng.uniform(1, 2) for __ in range(5)])
+        with mock.patch('capa.responsetypes._FORMULA_SAMPLES_SECRET', 'another secret'):
+            self.assertNotEqual(responder.randomize_variables(responder.samples), samples)
+
 
 class StringResponseTest(ResponseTest):
     xml_factory_class = StringResponseXMLFactory
@@ -59,6 +59,19 @@ def randomization_bin(seed, problem_id):
     return int(r_hash.hexdigest()[:7], 16) % NUM_RANDOMIZATION_BINS
 
 
+def randomization_seeds(rerandomize):
+    """
+    Return the seeds that `CapaMixin.choose_new_seed` can pick for a problem
+    with the given `rerandomize` setting, when the runtime has a seed.
+    """
+    if rerandomize == RANDOMIZATION.NEVER:
+        return [1]
+    elif rerandomize == RANDOMIZATION.PER_STUDENT:
+        return range(NUM_RANDOMIZATION_BINS)
+    else:
+        return range(MAX_RANDOMIZATION_BINS)
+
+
 class Randomization(String):
     """
     Define a field to store how to randomize a problem.
@@ -1,3 +1,6 @@
+import datetime
+import hashlib
+
 import pymongo
 import gridfs
 from gridfs.errors import NoFile
@@ -42,6 +45,12 @@ class MongoContentStore(ContentStore):
         self.fs = gridfs.GridFS(_db, bucket)
 
         self.fs_files = _db[bucket + ".files"]  # the underlying collection GridFS uses
+        self.fs_chunks = _db[bucket + ".chunks"]
+
+        # The bytes of the assets are stored once per distinct content, in blobs which the asset
+        # files reference and which are deleted when the last asset referencing them is
+        self.blob_fs = gridfs.GridFS(_db, bucket + ".blobs")
+        self.blob_files = _db[bucket + ".blobs.files"]
 
     def close_connections(self):
         """
@@ -60,31 +69,113 @@ class MongoContentStore(ContentStore):
     def save(self, content):
         content_id, content_son = self.asset_db_key(content.location)
 
+        # The data is hashed before being stored, so iterables are read into memory once
+        chunks = list(content.data) if hasattr(content.data, '__iter__') else [content.data]
+        blob = self._put_blob(lambda: iter(chunks))
+
         # The way to version files in gridFS is to not use the file id as the _id but just as the filename.
         # Then you can upload as many versions as you like and access by date or version. Because we use
-        # the location as the _id, we must delete before adding (there's no replace method in gridFS)
-        self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
-
+        # the location as the _id, the asset file is replaced, releasing the data of the previous one
         thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
-        with self.fs.new_file(_id=content_id, filename=unicode(content.location), content_type=content.content_type,
-                              displayname=content.name, content_son=content_son,
-                              thumbnail_location=thumbnail_location,
-                              import_path=content.import_path,
-                              # getattr b/c caching may mean some pickled instances don't have attr
-                              locked=getattr(content, 'locked', False)) as fp:
-            if hasattr(content.data, '__iter__'):
-                for chunk in content.data:
-                    fp.write(chunk)
-            else:
-                fp.write(content.data)
+        self._put_reference(
+            blob, content_id, filename=unicode(content.location), contentType=content.content_type,
+            displayname=content.name, content_son=content_son,
+            thumbnail_location=thumbnail_location,
+            import_path=content.import_path,
+            # getattr b/c caching may mean some pickled instances don't have attr
+            locked=getattr(content, 'locked', False)
+        )
 
         return content
 
     def delete(self, location_or_id):
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
-        # Deletes of non-existent files are considered successful
-        self.fs.delete(location_or_id)
+        # The asset file is removed before its data is released, so that only one of concurrent
+        # deletes releases it. Deletes of non-existent files are considered successful
+        asset = self.fs_files.find_and_modify({'_id': location_or_id}, remove=True)
+        if asset is not None:
+            self._release_data(asset)
+
+    def _release_data(self, asset):
+        """
+        Releases the bytes of the given asset file, which was removed or replaced: its reference to a
+        blob, or its own chunks.
+        """
+        if asset.get('blob_id') is not None:
+            self._release_blob(asset['blob_id'])
+        else:
+            self.fs_chunks.remove({'files_id': asset['_id']})
+
+    def _put_blob(self, get_chunks):
+        """
+        Returns the blob with the bytes of the chunks of data which get_chunks iterates over, with a new
+        reference to it taken for the caller. get_chunks is called once to hash the data, and again to
+        store it, unless there is a blob with the same content already.
+        """
+        digest = hashlib.sha256()
+        for chunk in get_chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        blob = self._acquire_blob({'digest': digest, 'refcount': {'$gt': 0}})
+        if blob is None:
+            # the blob can only be found by its digest once all its chunks are written
+            with self.blob_fs.new_file(digest=digest, refcount=1) as fp:
+                for chunk in get_chunks():
+                    fp.write(chunk)
+            blob = self.blob_files.find_one({'_id': fp._id})
+        return blob
+
+    def _acquire_blob(self, query):
+        """
+        Takes a new reference to the blob matching the given query, and returns it, or None if there
+        is no such blob.
+        """
+        return self.blob_files.find_and_modify(query, {'$inc': {'refcount': 1}}, new=True)
+
+    def _release_blob(self, blob_id):
+        """
+        Releases a reference to the given blob, and deletes it if it was the last one.
+        """
+        blob = self.blob_files.find_and_modify({'_id': blob_id}, {'$inc': {'refcount': -1}}, new=True)
+        if blob is not None and blob['refcount'] <= 0:
+            # only if no reference was taken to it in the meantime
+            result = self.blob_files.remove({'_id': blob_id, 'refcount': {'$lte': 0}})
+            if result.get('n'):
+                self.blob_fs.delete(blob_id)
+
+    def _put_reference(self, blob, asset_id, **attrs):
+        """
+        Creates or replaces the asset file with the given id and attributes, referencing the given blob
+        for its bytes, and releases the data of the asset file it replaces. The reference to the blob
+        taken for it is released if the asset file can't be saved.
+        """
+        attrs.update({
+            '_id': asset_id,
+            'blob_id': blob['_id'],
+            'length': blob['length'],
+            'chunkSize': blob['chunkSize'],
+            'md5': blob['md5'],
+            'uploadDate': datetime.datetime.utcnow(),
+        })
+        try:
+            previous = self.fs_files.find_and_modify({'_id': asset_id}, attrs, upsert=True)
+        except Exception:
+            self._release_blob(blob['_id'])
+            raise
+        if previous is not None:
+            self._release_data(previous)
+
+    def _open_data(self, fp):
+        """
+        Returns the file with the bytes of the given asset file: the blob it references, or the asset
+        file itself if it was stored with its own chunks.
+        """
+        blob_id = getattr(fp, 'blob_id', None)
+        if blob_id is None:
+            return fp
+        return self.blob_fs.get(blob_id)
 
     def find(self, location, throw_on_not_found=True, as_stream=False):
         content_id, __ = self.asset_db_key(location)
@@ -99,7 +190,7 @@ class MongoContentStore(ContentStore):
                         thumbnail_location[4]
                     )
                 return StaticContentStream(
-                    location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
+                    location, fp.displayname, fp.content_type, self._open_data(fp), last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
                     length=fp.length, locked=getattr(fp, 'locked', False)
@@ -113,7 +204,8 @@ class MongoContentStore(ContentStore):
                             thumbnail_location[4]
                         )
                     return StaticContent(
-                        location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
+                        location, fp.displayname, fp.content_type, self._open_data(fp).read(),
+                        last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
                         length=fp.length, locked=getattr(fp, 'locked', False)
@@ -163,7 +255,7 @@ class MongoContentStore(ContentStore):
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
             for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key', 'blob_id']:
                     policy.setdefault(asset['asset_key'].name, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
@@ -192,7 +284,7 @@ class MongoContentStore(ContentStore):
             items = self.fs_files.find(query)
             assets_to_delete = assets_to_delete + items.count()
             for asset in items:
-                self.fs.delete(asset[prefix])
+                self.delete(asset['_id'])
 
             self.fs_files.remove(query)
         return assets_to_delete
@@ -271,7 +363,7 @@ class MongoContentStore(ContentStore):
         :param location:  a c4x asset location
         """
         for attr in attr_dict.iterkeys():
-            if attr in ['_id', 'md5', 'uploadDate', 'length']:
+            if attr in ['_id', 'md5', 'uploadDate', 'length', 'blob_id']:
                 raise AttributeError("{} is a protected attribute.".format(attr))
         asset_db_key, __ = self.asset_db_key(location)
         # catch upsert error and raise NotFoundError if asset doesn't exist
@@ -299,14 +391,19 @@ class MongoContentStore(ContentStore):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
 
-        This implementation fairly expensively copies all of the data
+        The copies reference the blobs of the source assets, so no bytes are copied, except for the
+        source assets stored with their own chunks, which are moved to blobs first.
         """
         source_query = query_for_course(source_course_key)
-        # it'd be great to figure out how to do all of this on the db server and not pull the bits over
         for asset in self.fs_files.find(source_query):
             asset_key = self.make_id_son(asset)
+            blob = None
+            if asset.get('blob_id') is not None:
+                blob = self._acquire_blob({'_id': asset['blob_id']})
+            if blob is None:
+                blob = self._move_to_blob(asset_key)
+
             # don't convert from string until fs access
-            source_content = self.fs.get(asset_key)
             if isinstance(asset_key, basestring):
                 asset_key = AssetKey.from_string(asset_key)
                 __, asset_key = self.asset_db_key(asset_key)
@@ -322,9 +419,8 @@ class MongoContentStore(ContentStore):
                     dest_course_key.make_asset_key(asset_key['category'], asset_key['name']).for_branch(None)
                 )
 
-            self.fs.put(
-                source_content.read(),
-                _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
+            self._put_reference(
+                blob, asset_id, filename=asset['filename'], contentType=asset['contentType'],
                 displayname=asset['displayname'], content_son=asset_key,
                 # thumbnail is not technically correct but will be functionally correct as the code
                 # only looks at the name which is not course relative.
@@ -334,6 +430,25 @@ class MongoContentStore(ContentStore):
                 locked=asset.get('locked', False)
             )
 
+    def _move_to_blob(self, asset_id):
+        """
+        Moves the bytes of the given asset file, stored with its own chunks, to a blob, streaming them
+        chunk by chunk, and makes the asset file reference it. Returns the blob, with a new reference
+        to it taken for the caller.
+        """
+        def read_chunks():
+            """
+            Returns an iterator over the chunks of the asset file.
+            """
+            source = self.fs.get(asset_id)
+            return iter(lambda: source.read(source.chunk_size), '')
+
+        blob = self._put_blob(read_chunks)
+        self._acquire_blob({'_id': blob['_id']})
+        self.fs_files.update({'_id': asset_id}, {'$set': {'blob_id': blob['_id']}})
+        self.fs_chunks.remove({'files_id': asset_id})
+        return blob
+
     def delete_all_course_assets(self, course_key):
         """
         Delete all assets identified via this course_key. Dangerous operation which may remove assets
@@ -344,7 +459,7 @@ class MongoContentStore(ContentStore):
         matching_assets = self.fs_files.find(course_query)
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
-            self.fs.delete(asset_key)
+            self.delete(asset_key)
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -412,6 +527,8 @@ class MongoContentStore(ContentStore):
             [('content_son.org', pymongo.ASCENDING), ('content_son.course', pymongo.ASCENDING), ('display_name', pymongo.ASCENDING)],
             sparse=True
         )
+        # Index needed to find the blob with the same content as new assets
+        self.blob_files.create_index([('digest', pymongo.ASCENDING)], sparse=True)
 
 
 def query_for_course(course_key, category=None):
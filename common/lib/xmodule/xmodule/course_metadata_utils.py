@@ -0,0 +1,178 @@
+"""
+Simple utility functions that operate on course metadata.
+
+These functions are used both by CourseDescriptor, on the values of its fields,
+and by the course overviews of the LMS, on the values denormalized from those
+fields, so that both compute things like the start date text the same way.
+"""
+from datetime import datetime
+from math import exp
+
+import dateutil.parser
+from django.utils.timezone import UTC
+
+from .fields import Date
+
+
+DEFAULT_START_DATE = datetime(2030, 1, 1, tzinfo=UTC())
+
+
+def has_course_started(start_date):
+    """
+    Returns True if the current time is after the given course start date.
+    """
+    return datetime.now(UTC()) > start_date
+
+
+def has_course_ended(end_date):
+    """
+    Returns True if the current time is after the given course end date.
+    Returns False if there is no end date.
+    """
+    if end_date is None:
+        return False
+
+    return datetime.now(UTC()) > end_date
+
+
+def course_start_date_is_default(start, advertised_start):
+    """
+    Returns True if the start date of a course is still the default, i.e. start
+    has not been modified and advertised_start has not been set.
+    """
+    return advertised_start is None and start == DEFAULT_START_DATE
+
+
+def _add_timezone_string(date_time):
+    """
+    Adds 'UTC' string to the end of start/end date and time texts.
+    """
+    return date_time + u" UTC"
+
+
+def course_start_datetime_text(start_date, advertised_start, format_string, ugettext, strftime):
+    """
+    Returns the text of the start date and time of a course in UTC.  Prefers
+    advertised_start, then falls back to start_date.
+
+    Arguments:
+        start_date (datetime): the start date of the course
+        advertised_start (str): the advertised start date of the course, or None
+        format_string (str): the date format, e.g. "SHORT_DATE" or "DATE_TIME"
+        ugettext (function): the gettext function of the i18n service
+        strftime (function): the locale-aware strftime of the i18n service
+    """
+    _ = ugettext
+
+    def try_parse_iso_8601(text):
+        try:
+            result = Date().from_json(text)
+            if result is None:
+                result = text.title()
+            else:
+                result = strftime(result, format_string)
+                if format_string == "DATE_TIME":
+                    result = _add_timezone_string(result)
+        except ValueError:
+            result = text.title()
+
+        return result
+
+    if isinstance(advertised_start, basestring):
+        return try_parse_iso_8601(advertised_start)
+    elif course_start_date_is_default(start_date, advertised_start):
+        # Translators: TBD stands for 'To Be Determined' and is used when a course
+        # does not yet have an announced start date.
+        return _('TBD')
+    else:
+        when = advertised_start or start_date
+
+        if format_string == "DATE_TIME":
+            return _add_timezone_string(strftime(when, format_string))
+
+        return strftime(when, format_string)
+
+
+def course_end_datetime_text(end_date, format_string, strftime):
+    """
+    Returns the text of the end date or date and time of a course, or an empty
+    string if the course has no end date.
+    """
+    if end_date is None:
+        return ''
+    else:
+        date_time = strftime(end_date, format_string)
+        return date_time if format_string == "SHORT_DATE" else _add_timezone_string(date_time)
+
+
+def may_certify_for_course(certificates_display_behavior, certificates_show_before_end, has_ended):
+    """
+    Returns True if it is acceptable to show the student a certificate download
+    link for a course.
+    """
+    show_early = (
+        certificates_display_behavior in ('early_with_info', 'early_no_info') or
+        certificates_show_before_end
+    )
+    return show_early or has_ended
+
+
+def sorting_dates(announcement, advertised_start, start):
+    """
+    Returns the announcement date, the (advertised) start date and the current
+    time, as used to compute the "newness" of a course.
+    """
+    try:
+        start = dateutil.parser.parse(advertised_start)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=UTC())
+    except (ValueError, AttributeError, TypeError):
+        pass
+
+    now = datetime.now(UTC())
+
+    return announcement, start, now
+
+
+def course_is_newish(is_new, announcement, advertised_start, start):
+    """
+    Returns whether a course has been flagged as new. If there is no flag,
+    returns a heuristic value considering the announcement and the start dates.
+    """
+    if is_new is None:
+        # Use a heuristic if the course has not been flagged
+        announcement, start, now = sorting_dates(announcement, advertised_start, start)
+        if announcement and (now - announcement).days < 30:
+            # The course has been announced for less that month
+            return True
+        elif (now - start).days < 1:
+            # The course has not started yet
+            return True
+        else:
+            return False
+    elif isinstance(is_new, basestring):
+        return is_new.lower() in ['true', 'yes', 'y']
+    else:
+        return bool(is_new)
+
+
+def course_sorting_score(announcement, advertised_start, start):
+    """
+    Returns a number that can be used to sort courses according to how "new"
+    they are. The "newness" score is computed using a heuristic that takes into
+    account the announcement and (advertised) start dates of the course.
+
+    The lower the number the "newer" the course.
+    """
+    # Make courses that have an announcement date have a lower
+    # score than courses than don't, older courses should have a
+    # higher score.
+    announcement, start, now = sorting_dates(announcement, advertised_start, start)
+    scale = 300.0  # about a year
+    if announcement:
+        days = (now - announcement).days
+        score = -exp(-days / scale)
+    else:
+        days = (now - start).days
+        score = exp(days / scale)
+    return score
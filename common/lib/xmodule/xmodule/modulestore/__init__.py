@@ -1091,6 +1091,15 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
         """
         return {}
 
+    def get_course_keys(self, **kwargs):
+        """
+        Returns a list of the keys of the courses in this modulestore.
+
+        Default impl--the keys of the loaded courses. Modulestores which can list
+        their courses without loading them should override this.
+        """
+        return [course.id for course in self.get_courses(**kwargs)]
+
     def get_course(self, course_id, depth=0, **kwargs):
         """
         See ModuleStoreRead.get_course
@@ -1,10 +1,11 @@
 """ Code to allow module store to interface with courseware index """
 from __future__ import absolute_import
 
+import hashlib
+import json
 import logging
 
 from django.utils.translation import ugettext as _
-from opaque_keys.edx.locator import CourseLocator
 from search.search_engine_base import SearchEngine
 
 from . import ModuleStoreEnum
@@ -14,6 +15,9 @@ from .exceptions import ItemNotFoundError
 INDEX_NAME = "courseware_index"
 DOCUMENT_TYPE = "courseware_content"
 
+# Number of documents fetched at once when searching the documents of a course
+SEARCH_PAGE_SIZE = 500
+
 log = logging.getLogger('edx.modulestore')
 
 
@@ -31,90 +35,165 @@ class CoursewareSearchIndexer(object):
     """
 
     @staticmethod
-    def add_to_search_index(modulestore, location, delete=False, raise_on_error=False):
+    def content_hash(document):
         """
-        Add to courseware search index from given location and its children
+        Returns a hash of the content of the given index document, to tell
+        whether it changed since it was last indexed.
         """
-        error_list = []
-        # TODO - inline for now, need to move this out to a celery task
-        searcher = SearchEngine.get_search_engine(INDEX_NAME)
-        if not searcher:
-            return
+        return hashlib.md5(json.dumps(document, sort_keys=True, default=unicode)).hexdigest()
 
-        if isinstance(location, CourseLocator):
-            course_key = location
-        else:
-            course_key = location.course_key
+    @staticmethod
+    def _course_documents(course, error_list):
+        """
+        Returns the index documents of the blocks of the given course, which
+        must have been loaded with all its descendants, by document id.
 
+        The blocks whose documents failed to be created are mapped to None.
+        """
         location_info = {
-            "course": unicode(course_key),
+            "course": unicode(course.id),
         }
+        documents = {}
 
-        def _fetch_item(item_location):
-            """ Fetch the item from the modulestore location, log if not found, but continue """
-            try:
-                if isinstance(item_location, CourseLocator):
-                    item = modulestore.get_course(item_location)
-                else:
-                    item = modulestore.get_item(item_location, revision=ModuleStoreEnum.RevisionOption.published_only)
-            except ItemNotFoundError:
-                log.warning('Cannot find: %s', item_location)
-                return None
-
-            return item
-
-        def index_item_location(item_location, current_start_date):
-            """ add this item to the search index """
-            item = _fetch_item(item_location)
-            if not item:
-                return
+        items = [(course, None)]
+        while items:
+            item, current_start_date = items.pop()
 
             is_indexable = hasattr(item, "index_dictionary")
             # if it's not indexable and it does not have children, then ignore
             if not is_indexable and not item.has_children:
-                return
+                continue
 
             # if it has a defined start, then apply it and to it's children
             if item.start and (not current_start_date or item.start > current_start_date):
                 current_start_date = item.start
 
             if item.has_children:
-                for child_loc in item.children:
-                    index_item_location(child_loc, current_start_date)
+                items.extend((child, current_start_date) for child in item.get_children())
 
-            item_index = {}
-            item_index_dictionary = item.index_dictionary() if is_indexable else None
+            if not is_indexable:
+                continue
 
-            # if it has something to add to the index, then add it
-            if item_index_dictionary:
-                try:
+            # the ids don't depend on the version of the course, so that the
+            # documents of the blocks keep their ids across publishes
+            item_id = unicode(item.scope_ids.usage_id.version_agnostic().for_branch(None))
+            try:
+                item_index_dictionary = item.index_dictionary()
+
+                # if it has something to add to the index, then add it
+                if item_index_dictionary:
+                    item_index = {}
                     item_index.update(location_info)
                     item_index.update(item_index_dictionary)
-                    item_index['id'] = unicode(item.scope_ids.usage_id)
+                    item_index['id'] = item_id
                     if current_start_date:
                         item_index['start_date'] = current_start_date
+                    documents[item_id] = item_index
+            except Exception as err:  # pylint: disable=broad-except
+                # broad exception so that index operation does not fail on one item of many
+                log.warning('Could not index item: %s - %s', item.location, unicode(err))
+                error_list.append(_('Could not index item: {}').format(item.location))
+                documents[item_id] = None
 
-                    searcher.index(DOCUMENT_TYPE, item_index)
-                except Exception as err:  # pylint: disable=broad-except
-                    # broad exception so that index operation does not fail on one item of many
-                    log.warning('Could not index item: %s - %s', item_location, unicode(err))
-                    error_list.append(_('Could not index item: {}').format(item_location))
+        return documents
+
+    @staticmethod
+    def _indexed_ids(searcher, course_id):
+        """
+        Returns the ids of the documents of the given course which are in the index.
+        """
+        ids = set()
+        while True:
+            response = searcher.search(
+                field_dictionary={"course": course_id}, doc_type=DOCUMENT_TYPE, size=SEARCH_PAGE_SIZE, from_=len(ids)
+            )
+            page_ids = set(result["data"]["id"] for result in response["results"]).difference(ids)
+            ids.update(page_ids)
+            if not page_ids or len(response["results"]) < SEARCH_PAGE_SIZE:
+                return ids
+
+    @classmethod
+    def _remove_stale_documents(cls, searcher, course_ids, documents, hashes):
+        """
+        Removes the documents of the course which are in the index but aren't
+        among its documents now, such as those indexed under the ids which
+        depended on the version of the course.
 
-        def remove_index_item_location(item_location):
-            """ remove this item from the search index """
-            item = _fetch_item(item_location)
-            if item:
-                if item.has_children:
-                    for child_loc in item.children:
-                        remove_index_item_location(child_loc)
+        The ids of the documents which fail to be removed are added to the
+        hashes, so that removing them is tried again the next time around.
+        """
+        try:
+            indexed_ids = set()
+            for course_id in course_ids:
+                indexed_ids.update(cls._indexed_ids(searcher, course_id))
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning('Could not search the documents of course: %s - %s', course_ids, unicode(err))
+            return
 
-                searcher.remove(DOCUMENT_TYPE, unicode(item.scope_ids.usage_id))
+        for item_id in indexed_ids.difference(documents):
+            try:
+                searcher.remove(DOCUMENT_TYPE, item_id)
+            except Exception as err:  # pylint: disable=broad-except
+                log.warning('Could not remove item: %s - %s', item_id, unicode(err))
+                hashes[item_id] = None
 
+    @classmethod
+    def index_course(cls, modulestore, course_key, indexed_hashes=None):
+        """
+        Indexes the published content of the given course, which is loaded
+        from the modulestore at once.
+
+        indexed_hashes are the content hashes of the documents of the course
+        which are already in the index, by document id, as returned by the
+        previous call. Only the documents whose content changed since then are
+        sent to the search engine, and those which are gone are removed from
+        it. If it is None, all the documents are sent, and the documents of the
+        course which the index holds besides them are removed.
+
+        Returns the content hashes of the documents in the index now, or None
+        if there is no search engine, and the list of the indexing errors. The
+        documents which failed to be indexed are left out of the hashes, so
+        that they are indexed again the next time around.
+        """
+        error_list = []
+        searcher = SearchEngine.get_search_engine(INDEX_NAME)
+        if not searcher:
+            return None, error_list
+
+        first_run = indexed_hashes is None
+        indexed_hashes = indexed_hashes or {}
+        hashes = {}
         try:
-            if delete:
-                remove_index_item_location(location)
-            else:
-                index_item_location(location, None)
+            with modulestore.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+                with modulestore.bulk_operations(course_key):
+                    course = modulestore.get_course(course_key, depth=None)
+                    if course is None:
+                        raise ItemNotFoundError(course_key)
+                    documents = cls._course_documents(course, error_list)
+
+            for item_id, item_index in documents.iteritems():
+                if item_index is None:
+                    continue
+                content_hash = cls.content_hash(item_index)
+                if indexed_hashes.get(item_id) != content_hash:
+                    try:
+                        searcher.index(DOCUMENT_TYPE, item_index)
+                    except Exception as err:  # pylint: disable=broad-except
+                        log.warning('Could not index item: %s - %s', item_id, unicode(err))
+                        error_list.append(_('Could not index item: {}').format(item_id))
+                        continue
+                hashes[item_id] = content_hash
+
+            for item_id in set(indexed_hashes).difference(documents):
+                try:
+                    searcher.remove(DOCUMENT_TYPE, item_id)
+                except Exception as err:  # pylint: disable=broad-except
+                    log.warning('Could not remove item: %s - %s', item_id, unicode(err))
+                    hashes[item_id] = indexed_hashes[item_id]
+
+            if first_run:
+                course_ids = set([unicode(course_key), unicode(course.id)])
+                cls._remove_stale_documents(searcher, course_ids, documents, hashes)
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -123,13 +202,18 @@ class CoursewareSearchIndexer(object):
                 unicode(err)
             )
             error_list.append(_('General indexing error occurred'))
+            # what was indexed before is still there, as far as we know
+            indexed_hashes = dict(indexed_hashes)
+            indexed_hashes.update(hashes)
+            hashes = indexed_hashes
 
-        if raise_on_error and error_list:
-            raise SearchIndexingError(_('Error(s) present during indexing'), error_list)
+        return hashes, error_list
 
     @classmethod
     def do_course_reindex(cls, modulestore, course_key):
         """
         (Re)index all content within the given course
         """
-        return cls.add_to_search_index(modulestore, course_key, delete=False, raise_on_error=True)
+        __, error_list = cls.index_course(modulestore, course_key)
+        if error_list:
+            raise SearchIndexingError(_('Error(s) present during indexing'), error_list)
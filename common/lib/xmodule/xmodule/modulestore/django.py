@@ -23,6 +23,8 @@ import django.utils
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache, DEFAULT_MAX_LOCAL_SIZE
 from xmodule.util.django import get_current_request_hostname
 import xblock.reference.plugins
 
@@ -149,6 +151,9 @@ def create_modulestore_instance(
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
+    if issubclass(class_, SplitMongoModuleStore):
+        _options['structure_cache'] = get_structure_cache()
+
     if HAS_USER_SERVICE and not user_service:
         xb_user_service = DjangoXBlockUserService(get_current_user())
     else:
@@ -172,6 +177,35 @@ def create_modulestore_instance(
 # A singleton instance of the Mixed Modulestore
 _MIXED_MODULESTORE = None
 
+# A singleton cache of the structures of the split modulestores
+_STRUCTURE_CACHE = None
+
+
+def get_structure_cache():
+    """
+    Returns the cache of the structures of the split modulestores of this process,
+    as configured by settings.SPLIT_STRUCTURE_CACHE, or None if it is disabled.
+
+    The structures are shared with other processes through the 'split_structures'
+    cache, if there is one.
+    """
+    global _STRUCTURE_CACHE  # pylint: disable=global-statement
+    config = getattr(settings, 'SPLIT_STRUCTURE_CACHE', {})
+    if not config.get('ENABLED', False):
+        return None
+
+    if _STRUCTURE_CACHE is None:
+        try:
+            shared_cache = get_cache('split_structures')
+        except InvalidCacheBackendError:
+            shared_cache = None
+        _STRUCTURE_CACHE = StructureCache(
+            shared_cache,
+            max_local_size=config.get('MAX_LOCAL_SIZE', DEFAULT_MAX_LOCAL_SIZE),
+            timeout=config.get('TIMEOUT'),
+        )
+    return _STRUCTURE_CACHE
+
 
 def modulestore():
     """
@@ -280,6 +280,18 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
                     courses[course_id] = course
         return courses.values()
 
+    @strip_key
+    def get_course_keys(self, **kwargs):
+        '''
+        Returns a list of the keys of the courses in this modulestore, without loading the courses
+        where the underlying modulestores can list them.
+        '''
+        course_keys = {}
+        for store in self.modulestores:
+            for course_key in store.get_course_keys(**kwargs):
+                course_keys.setdefault(self._clean_locator_for_mapping(course_key), course_key)
+        return course_keys.values()
+
     @strip_key
     def get_libraries(self, **kwargs):
         """
@@ -908,6 +920,17 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         finally:
             self.thread_cache.default_store = prev_thread_local_store
 
+    def get_branch_setting(self, course_id=None):
+        """
+        Returns the current branch_setting of the given course's store.
+        If course_id is None, the default store is used.  Stores without
+        branches (e.g. XML) only serve published content.
+        """
+        store = self._get_modulestore_for_courselike(course_id)
+        if hasattr(store, 'get_branch_setting'):
+            return store.get_branch_setting(course_id)
+        return ModuleStoreEnum.Branch.published_only
+
     @contextmanager
     def branch_setting(self, branch_setting, course_id=None):
         """
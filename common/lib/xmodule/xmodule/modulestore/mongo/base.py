@@ -15,12 +15,12 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
 from bson.son import SON
 from datetime import datetime
+from functools import partial
 from fs.osfs import OSFS
 from mongodb_proxy import MongoProxy, autoretry_read
 from path import path
@@ -68,6 +68,14 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
     name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
 ))
 
+# The key marking the cached items whose definition data wasn't loaded, to be
+# loaded when it is first accessed
+LAZY_DEFINITION_KEY = 'lazy_definition'
+
+# How long, in seconds, a process may hold the lock on patching the cached metadata
+# inheritance tree of a course
+METADATA_INHERITANCE_PATCH_LOCK_TIMEOUT = 60
+
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
 
@@ -98,15 +106,39 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
     known to the MongoModuleStore (data, children, and metadata)
     """
     def __init__(self, data, parent, children, metadata):
+        """
+        data may be a function returning the data, which is then only called when
+        the content fields are first accessed.
+        """
         super(MongoKeyValueStore, self).__init__()
-        if not isinstance(data, dict):
-            self._data = {'data': data}
+        if callable(data):
+            self._load_data = data
+            self.__data = None
         else:
             self._data = data
         self._parent = parent
         self._children = children
         self._metadata = metadata
 
+    @property
+    def _data(self):
+        """
+        The values of the content fields, loaded on first access if they are lazy.
+        """
+        if self.__data is None:
+            self._data = self._load_data()
+        return self.__data
+
+    @_data.setter
+    def _data(self, data):
+        """
+        Sets the values of the content fields.
+        """
+        if not isinstance(data, dict):
+            self.__data = {'data': data}
+        else:
+            self.__data = data
+
     def get(self, key):
         if key.scope == Scope.children:
             return self._children
@@ -152,6 +184,178 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
             return False
 
 
+class MetadataInheritanceTree(dict):
+    """
+    The metadata inherited by the blocks of a course: a dict mapping the location
+    urls of the blocks to dicts mapping each branch to the dict of the values of
+    the inheritable fields which they inherit in it (for containers, including
+    their own values, which they pass down). The blocks which inherit the same
+    values share the same dict, so the dicts must not be modified.
+
+    The tree also keeps the parents of the blocks, and the inheritable metadata and
+    the children of each revision of the containers, so that it can be patched when
+    a container is updated instead of being computed again. Its version changes on
+    each patch.
+
+    The tree is cached for all the branches: editing the draft of a container only
+    changes the metadata inherited in the branches which see that draft.
+    """
+    BRANCHES = (ModuleStoreEnum.Branch.draft_preferred, ModuleStoreEnum.Branch.published_only)
+    # changed whenever the structure of the tree changes, so that trees cached before are computed again
+    FORMAT_VERSION = 2
+
+    def __init__(self, *args, **kwargs):
+        super(MetadataInheritanceTree, self).__init__(*args, **kwargs)
+        self.format_version = self.FORMAT_VERSION
+        self.root = None
+        self.version = None
+        # location url -> {branch: parent location url}
+        self.parents = {}
+        # container location url -> {revision: its own inheritable metadata}
+        self.own_metadata = {}
+        # container location url -> {revision: [child location urls]}
+        self.children = {}
+
+    @classmethod
+    def is_current(cls, tree):
+        """
+        Returns whether the cached tree is a MetadataInheritanceTree in the current format.
+        """
+        return isinstance(tree, cls) and getattr(tree, 'format_version', None) == cls.FORMAT_VERSION
+
+    def add_container(self, location_url, metadata, children, revision):
+        """
+        Records the inheritable metadata and the children of the given revision of
+        a container.
+        """
+        self.own_metadata.setdefault(location_url, {})[revision] = metadata
+        self.children.setdefault(location_url, {})[revision] = children
+
+    def get_metadata(self, location_url, branch):
+        """
+        Returns the metadata inherited by the block in the given branch.
+        """
+        return self.get(location_url, {}).get(branch, {})
+
+    def get_parent(self, location_url, branch):
+        """
+        Returns the location url of the parent of the block in the given branch,
+        or None if it isn't known.
+        """
+        return self.parents.get(location_url, {}).get(branch)
+
+    def inherit_down(self, location_url, branch):
+        """
+        Computes the metadata inherited in the given branch by the descendants of
+        the container, from the metadata which it inherits itself.
+        """
+        branch_parents = self._branch_parents(branch)
+        stack = [(location_url, self._passed_down(location_url, branch))]
+        visited = set()
+        while stack:
+            url, metadata = stack.pop()
+            # guard against courses whose containers form cycles
+            if url in visited:
+                continue
+            visited.add(url)
+            # the children of all the revisions of the container, since they are
+            # cached for all of them
+            for revision_children in self.children.get(url, {}).values():
+                for child in revision_children:
+                    if branch_parents.get(child) != url:
+                        # the child was moved to another container
+                        continue
+                    self.parents.setdefault(child, {})[branch] = url
+                    if child in self.own_metadata:
+                        child_metadata = self._with_own_metadata(metadata, child, branch)
+                        self.setdefault(child, {})[branch] = child_metadata
+                        stack.append((child, child_metadata))
+                    else:
+                        # this is a leaf node, which inherits the metadata of its parent as is
+                        self.setdefault(child, {})[branch] = metadata
+
+    def _branch_parents(self, branch):
+        """
+        Returns a dict mapping the location urls of the children of the containers to
+        the location urls of their parents in the given branch.
+
+        A child which was moved in draft from one container to another is listed by a
+        revision of both. It belongs to the container whose revision seen in the branch
+        lists it.
+        """
+        parents = {}
+        for url, revisions in self.children.iteritems():
+            for revision, children in revisions.iteritems():
+                if revision != _seen_revision(revisions, branch):
+                    for child in children:
+                        parents.setdefault(child, url)
+        for url, revisions in self.children.iteritems():
+            for child in revisions[_seen_revision(revisions, branch)]:
+                parents[child] = url
+        return parents
+
+    def patch(self, location_url, metadata, children, revision):
+        """
+        Updates the tree for a change of the inheritable metadata or the children
+        of the given revision of a container, recomputing only the metadata
+        inherited by its descendants.
+        """
+        self.add_container(location_url, metadata, children, revision)
+        for branch in self.BRANCHES:
+            if location_url != self.root:
+                parent_url = self.get_parent(location_url, branch)
+                if parent_url is None:
+                    # the container isn't in the branch yet: the metadata of its
+                    # descendants is computed when it is added to its parent
+                    continue
+                self.setdefault(location_url, {})[branch] = self._with_own_metadata(
+                    self._passed_down(parent_url, branch), location_url, branch
+                )
+            self.inherit_down(location_url, branch)
+
+    def _passed_down(self, location_url, branch):
+        """
+        Returns the metadata which the container passes down to its children in the
+        given branch.
+        """
+        if location_url == self.root:
+            return self._own_metadata(location_url, branch)
+        return self.get_metadata(location_url, branch)
+
+    def _own_metadata(self, location_url, branch):
+        """
+        Returns the own metadata of the revision of the container seen in the branch.
+        """
+        revisions = self.own_metadata.get(location_url)
+        if not revisions:
+            return {}
+        return revisions[_seen_revision(revisions, branch)]
+
+    def _with_own_metadata(self, inherited_metadata, location_url, branch):
+        """
+        Returns the inherited metadata overridden by the metadata of the revision of
+        the container seen in the branch, which is only copied if the container
+        overrides some of it.
+        """
+        own_metadata = self._own_metadata(location_url, branch)
+        if not own_metadata:
+            return inherited_metadata
+        metadata = inherited_metadata.copy()
+        metadata.update(own_metadata)
+        return metadata
+
+
+def _seen_revision(revisions, branch):
+    """
+    Returns which of the revisions of a container is seen in the branch: its draft,
+    if it has one and drafts are preferred, or else its published version. A
+    container which only has a draft is seen as that draft in all the branches.
+    """
+    preferred = MongoRevisionKey.published \
+        if branch == ModuleStoreEnum.Branch.published_only else MongoRevisionKey.draft
+    return preferred if preferred in revisions else next(iter(revisions))
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     """
     A system that has a cache of module json that it will use to load modules
@@ -226,9 +430,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 ]
 
                 parent = None
-                if self.cached_metadata is not None:
+                if isinstance(self.cached_metadata, MetadataInheritanceTree):
                     # fish the parent out of here if it's available
-                    parent_url = self.cached_metadata.get(unicode(location), {}).get('parent', {}).get(
+                    parent_url = self.cached_metadata.get_parent(
+                        unicode(location),
                         ModuleStoreEnum.Branch.published_only if location.revision is None
                         else ModuleStoreEnum.Branch.draft_preferred
                     )
@@ -242,13 +447,11 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                         else ModuleStoreEnum.RevisionOption.draft_preferred
                     )
 
-                data = definition.get('data', {})
-                if isinstance(data, basestring):
-                    data = {'data': data}
-
                 mixed_class = self.mixologist.mix(class_)
-                if data:  # empty or None means no work
-                    data = self._convert_reference_fields_to_keys(mixed_class, location.course_key, data)
+                if json_data.get(LAZY_DEFINITION_KEY):
+                    data = partial(self._load_definition_data, json_data, mixed_class, location)
+                else:
+                    data = self._convert_definition_data(definition.get('data', {}), mixed_class, location)
                 metadata = self._convert_reference_fields_to_keys(mixed_class, location.course_key, metadata)
                 kvs = MongoKeyValueStore(
                     data,
@@ -267,7 +470,14 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
                     # Convert the serialized fields values in self.cached_metadata
                     # to python values
-                    metadata_to_inherit = self.cached_metadata.get(unicode(non_draft_loc), {})
+                    if isinstance(self.cached_metadata, MetadataInheritanceTree):
+                        # a draft is only read when drafts are preferred, and then inherits from the
+                        # drafts of its ancestors too
+                        branch = ModuleStoreEnum.Branch.draft_preferred \
+                            if location.revision == MongoRevisionKey.draft else self.modulestore.get_branch_setting()
+                        metadata_to_inherit = self.cached_metadata.get_metadata(unicode(non_draft_loc), branch)
+                    else:
+                        metadata_to_inherit = self.cached_metadata.get(unicode(non_draft_loc), {})
                     inherit_metadata(module, metadata_to_inherit)
 
                 module._edit_info = json_data.get('edit_info')
@@ -295,6 +505,29 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                     error_msg=exc_info_to_str(sys.exc_info())
                 )
 
+    def _convert_definition_data(self, data, mixed_class, location):
+        """
+        Convert the definition data of an item into the values of the content fields of its block.
+        """
+        if isinstance(data, basestring):
+            data = {'data': data}
+        if data:  # empty or None means no work
+            data = self._convert_reference_fields_to_keys(mixed_class, location.course_key, data)
+        return data
+
+    def _load_definition_data(self, json_data, mixed_class, location):
+        """
+        Load the definition data of an item which was cached without it, and return
+        the values of the content fields of its block.
+
+        The data is also stored in the cached item, for the other blocks loaded from it.
+        """
+        definition = json_data.setdefault('definition', {})
+        if json_data.pop(LAZY_DEFINITION_KEY, False):
+            item = self.modulestore.collection.find_one({'_id': json_data['location']}, {'definition.data': True})
+            definition['data'] = (item or {}).get('definition', {}).get('data', {})
+        return self._convert_definition_data(definition.get('data', {}), mixed_class, location)
+
     def _convert_reference_to_key(self, ref_string):
         """
         Convert a single serialized UsageKey string in a ReferenceField into a UsageKey.
@@ -650,9 +883,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             ('_id.course', course_id.course),
             ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
         ])
-        # if we're only dealing in the published branch, then only get published containers
-        if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
-            query['_id.revision'] = None
+        # the tree is cached for all the branches, so both revisions of the containers are needed
         # we just want the Location, children, and inheritable metadata
         record_filter = {'_id': 1, 'definition.children': 1}
 
@@ -666,61 +897,25 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
-        results_by_url = {}
-        root = None
-
-        # now go through the results and order them by the location url
+        tree = MetadataInheritanceTree()
         for result in resultset:
             # manually pick it apart b/c the db has tag and we want as_published revision regardless
             location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
-
             location_url = unicode(location)
-            if location_url in results_by_url:
-                # found either draft or live to complement the other revision
-                # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
-                # show up under both in this logic: https://openedx.atlassian.net/browse/TNL-1075
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
-                # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
-                results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
-            else:
-                results_by_url[location_url] = result
+            tree.add_container(
+                location_url, result.get('metadata', {}), result.get('definition', {}).get('children', []),
+                result['_id'].get('revision')
+            )
             if location.category == 'course':
-                root = location_url
+                tree.root = location_url
 
         # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+        if tree.root is not None:
+            for branch in tree.BRANCHES:
+                tree.inherit_down(tree.root, branch)
+        tree.version = uuid4().hex
 
-        if root is not None:
-            _compute_inherited_metadata(root)
-
-        return metadata_to_inherit
+        return tree
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
@@ -737,6 +932,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
                 tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                if not MetadataInheritanceTree.is_current(tree):
+                    # cached in an older format
+                    tree = {}
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
@@ -754,6 +952,14 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+
+        return tree
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Puts the metadata inheritance tree of the course in the request cache, if available.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -761,20 +967,83 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
 
-        return tree
+    def _patch_cached_metadata_inheritance_tree(self, course_id, xblock, metadata, children):
+        """
+        Patch the cached metadata inheritance tree of the course for an update of the
+        inheritable metadata or the children of the container xblock.
+
+        The patch is applied to the tree in the caching subsystem, which other processes may
+        have patched since this request cached it, while holding a lock added to the caching
+        subsystem. A process which can't take the lock drops the cached tree instead, to be
+        computed again from the database, and marks the contention, so that the holder of the
+        lock drops the tree it caches too.
+
+        Returns the patched tree.
+        """
+        location_url = unicode(as_published(xblock.location))
+        metadata = {
+            field_name: value for field_name, value in metadata.iteritems() if field_name in InheritanceMixin.fields
+        }
+        cache_subsystem = self.metadata_inheritance_cache_subsystem
+        cache_key = unicode(course_id)
+        lock_key = cache_key + u'.patch_lock'
+        contention_key = cache_key + u'.patch_contention'
+
+        if cache_subsystem is not None:
+            if not cache_subsystem.add(lock_key, True, METADATA_INHERITANCE_PATCH_LOCK_TIMEOUT):
+                log.info("Dropping the metadata inheritance tree of %s after concurrent updates", course_id)
+                cache_subsystem.set(contention_key, True, METADATA_INHERITANCE_PATCH_LOCK_TIMEOUT)
+                cache_subsystem.delete(cache_key)
+                return self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            tree = cache_subsystem.get(cache_key)
+        else:
+            tree = self.request_cache.data.get('metadata_inheritance', {}).get(cache_key) \
+                if self.request_cache is not None else None
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+        try:
+            if not MetadataInheritanceTree.is_current(tree):
+                # there is nothing to patch
+                return self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+
+            if xblock.category == 'course':
+                tree.root = location_url
+            tree.patch(location_url, metadata, children, xblock.location.revision)
+            tree.version = uuid4().hex
+            self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+            if cache_subsystem is not None:
+                cache_subsystem.set(cache_key, tree)
+                if cache_subsystem.get(contention_key):
+                    # another process updated the course without patching the tree
+                    cache_subsystem.delete(cache_key)
+                    cache_subsystem.delete(contention_key)
+            return tree
+        finally:
+            if cache_subsystem is not None:
+                cache_subsystem.delete(lock_key)
+
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, xblock=None, payload=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
+        If given the xblock which was updated, and the payload it was updated with,
+        only the metadata inherited from it is refreshed, if it is a container: the
+        metadata of other blocks isn't inherited.
+
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
-            # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            if xblock is None:
+                # below is done for side effects when runtime is None
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            elif xblock.has_children:
+                cached_metadata = self._patch_cached_metadata_inheritance_tree(
+                    course_id, xblock, payload['metadata'], payload.get('definition.children', [])
+                )
+            else:
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -785,8 +1054,16 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         item['location'] = item['_id']
         del item['_id']
 
+    @staticmethod
+    def _cache_children_fields(lazy):
+        """
+        Returns the fields of the items to query when caching children: all of them,
+        or all but their definition data if they are lazy.
+        """
+        return {'definition.data': False} if lazy else None
+
     @autoretry_read()
-    def _query_children_for_cache_children(self, course_key, items):
+    def _query_children_for_cache_children(self, course_key, items, lazy=False):
         """
         Generate a pymongo in query for finding the items and return the payloads
         """
@@ -796,15 +1073,32 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 course_key.make_usage_key_from_deprecated_string(item).to_deprecated_son() for item in items
             ]}
         }
-        return list(self.collection.find(query))
+        return list(self.collection.find(query, self._cache_children_fields(lazy)))
+
+    @autoretry_read()
+    def _query_course_for_cache_children(self, course_key, lazy=False):
+        """
+        Query all the items of the course in a round-trip, and return a dict mapping
+        their published location urls to their payloads
+        """
+        query = self._course_key_to_son(course_key)
+        query['_id.revision'] = MongoRevisionKey.published
+        return {
+            unicode(as_published(Location._from_deprecated_son(item['_id'], course_key.run))): item
+            for item in self.collection.find(query, self._cache_children_fields(lazy))
+        }
 
-    def _cache_children(self, course_key, items, depth=0):
+    def _cache_children(self, course_key, items, depth=0, lazy=False):
         """
         Returns a dictionary mapping Location -> item data, populated with json data
         for all descendents of items up to the specified depth.
         (0 = no descendents, 1 = children, 2 = grandchildren, etc)
         If depth is None, will load all the children.
         This will make a number of queries that is linear in the depth.
+
+        If lazy, the definition data of the descendents isn't loaded until it is
+        first accessed, and when all the descendents of a course are requested,
+        the whole course is loaded in a single query.
         """
 
         data = {}
@@ -812,6 +1106,10 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         course_key = self.fill_in_run(course_key)
         parent_cache = self._get_parent_cache(self.get_branch_setting())
 
+        course_items = None
+        if lazy and depth is None and any(item['_id']['category'] == 'course' for item in items):
+            course_items = self._query_course_for_cache_children(course_key, lazy=True)
+
         while to_process and depth is None or depth >= 0:
             children = []
             for item in to_process:
@@ -830,8 +1128,14 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # http://www.mongodb.org/display/DOCS/Advanced+Queries#AdvancedQueries-%24or
             # for or-query syntax
             to_process = []
-            if children:
-                to_process = self._query_children_for_cache_children(course_key, children)
+            if children and course_items is not None:
+                # pop the items, so that each is only processed once
+                to_process = [course_items.pop(child) for child in children if child in course_items]
+            elif children:
+                to_process = self._query_children_for_cache_children(course_key, children, lazy=lazy)
+            if lazy:
+                for item in to_process:
+                    item[LAZY_DEFINITION_KEY] = True
 
             # If depth is None, then we just recurse until we hit all the descendents
             if depth is not None:
@@ -878,13 +1182,13 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         )
         return system.load_item(location)
 
-    def _load_items(self, course_key, items, depth=0):
+    def _load_items(self, course_key, items, depth=0, lazy=False):
         """
         Load a list of xmodules from the data in items, with children cached up
-        to specified depth
+        to specified depth, loading their definition data lazily if lazy
         """
         course_key = self.fill_in_run(course_key)
-        data_cache = self._cache_children(course_key, items, depth)
+        data_cache = self._cache_children(course_key, items, depth, lazy=lazy)
 
         # if we are loading a course object, if we're not prefetching children (depth != 0) then don't
         # bother with the metadata inheritance
@@ -920,6 +1224,19 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         )
         return [course for course in base_list if not isinstance(course, ErrorDescriptor)]
 
+    def get_course_keys(self, **kwargs):
+        '''
+        Returns a list of the keys of the courses, including the ones which fail to load.
+        '''
+        return [
+            SlashSeparatedCourseKey(course['_id']['org'], course['_id']['course'], course['_id']['name'])
+            for course in self.collection.find({'_id.category': 'course'}, fields={'_id': True})
+            if not (
+                course['_id']['org'] == 'edx' and
+                course['_id']['course'] == 'templates'
+            )
+        ]
+
     def _find_one(self, location):
         '''Look for a given location in the collection. If the item is not present, raise
         ItemNotFoundError.
@@ -949,7 +1266,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         course_key = self.fill_in_run(course_key)
         location = course_key.make_usage_key('course', course_key.run)
         try:
-            return self.get_item(location, depth=depth)
+            return self.get_item(location, depth=depth, lazy=kwargs.get('lazy', False))
         except ItemNotFoundError:
             return None
 
@@ -990,7 +1307,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         except ItemNotFoundError:
             return False
 
-    def get_item(self, usage_key, depth=0):
+    def get_item(self, usage_key, depth=0, lazy=False):
         """
         Returns an XModuleDescriptor instance for the item at location.
 
@@ -1004,9 +1321,11 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             descendents of the queried modules for more efficient results later
             in the request. The depth is counted in the number of
             calls to get_children() to cache. None indicates to cache all descendents.
+        lazy (bool): whether to load the definition data of the descendents only when
+            it is first accessed, for callers which mostly need the structure of the course.
         """
         item = self._find_one(usage_key)
-        module = self._load_items(usage_key.course_key, [item], depth)[0]
+        module = self._load_items(usage_key.course_key, [item], depth, lazy=lazy)[0]
         return module
 
     @staticmethod
@@ -1359,8 +1678,10 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # update the edit info of the instantiated xblock
             xblock._edit_info = payload['edit_info']
 
-            # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            # update the metadata inheritance tree which is cached
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, xblock=xblock, payload=payload
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -12,7 +12,6 @@ import logging
 from opaque_keys.edx.locations import Location
 from xmodule.exceptions import InvalidVersionError
 from xmodule.modulestore import ModuleStoreEnum
-from xmodule.modulestore.courseware_index import CoursewareSearchIndexer
 from xmodule.modulestore.exceptions import (
     ItemNotFoundError, DuplicateItemError, DuplicateCourseError, InvalidBranchSetting
 )
@@ -77,11 +76,13 @@ class DraftModuleStore(MongoModuleStore):
             xmodule.modulestore.exceptions.ItemNotFoundError if no object
             is found at that usage_key
         """
+        lazy = kwargs.get('lazy', False)
+
         def get_published():
-            return wrap_draft(super(DraftModuleStore, self).get_item(usage_key, depth=depth))
+            return wrap_draft(super(DraftModuleStore, self).get_item(usage_key, depth=depth, lazy=lazy))
 
         def get_draft():
-            return wrap_draft(super(DraftModuleStore, self).get_item(as_draft(usage_key), depth=depth))
+            return wrap_draft(super(DraftModuleStore, self).get_item(as_draft(usage_key), depth=depth, lazy=lazy))
 
         # return the published version if ModuleStoreEnum.RevisionOption.published_only is requested
         if revision == ModuleStoreEnum.RevisionOption.published_only:
@@ -550,9 +551,13 @@ class DraftModuleStore(MongoModuleStore):
             )
         self._delete_subtree(location, as_functions)
 
-        # Remove this location from the courseware search index so that searches
-        # will refrain from showing it as a result
-        CoursewareSearchIndexer.add_to_search_index(self, location, delete=True)
+        # Let the listeners know that published content is gone, e.g. so that
+        # it is removed from the courseware search index
+        if as_published in as_functions:
+            bulk_record = self._get_bulk_ops_record(location.course_key)
+            bulk_record.dirty = True
+            if self.signal_handler and not bulk_record.active:
+                self.signal_handler.send("course_published", course_key=location.course_key)
 
     def _delete_subtree(self, location, as_functions, draft_only=False):
         """
@@ -731,9 +736,6 @@ class DraftModuleStore(MongoModuleStore):
         if self.signal_handler and not bulk_record.active:
             self.signal_handler.send("course_published", course_key=course_key)
 
-        # Now it's been published, add the object to the courseware search index so that it appears in search results
-        CoursewareSearchIndexer.add_to_search_index(self, location)
-
         return self.get_item(as_published(location))
 
     def unpublish(self, location, user_id, **kwargs):
@@ -796,9 +798,11 @@ class DraftModuleStore(MongoModuleStore):
 
         delete_draft_only(location)
 
-    def _query_children_for_cache_children(self, course_key, items):
+    def _query_children_for_cache_children(self, course_key, items, lazy=False):
         # first get non-draft in a round-trip
-        to_process_non_drafts = super(DraftModuleStore, self)._query_children_for_cache_children(course_key, items)
+        to_process_non_drafts = super(DraftModuleStore, self)._query_children_for_cache_children(
+            course_key, items, lazy=lazy
+        )
 
         to_process_dict = {}
         for non_draft in to_process_non_drafts:
@@ -813,7 +817,7 @@ class DraftModuleStore(MongoModuleStore):
                     query.append(as_draft(item_usage_key).to_deprecated_son())
             if query:
                 query = {'_id': {'$in': query}}
-                to_process_drafts = list(self.collection.find(query))
+                to_process_drafts = list(self.collection.find(query, self._cache_children_fields(lazy)))
 
                 # now we have to go through all drafts and replace the non-draft
                 # with the draft. This is because the semantics of the DraftStore is to
@@ -832,6 +836,22 @@ class DraftModuleStore(MongoModuleStore):
 
         return queried_children
 
+    def _query_course_for_cache_children(self, course_key, lazy=False):
+        """
+        Query all the items of the course in a round-trip, and return a dict mapping
+        their published location urls to their payloads, preferring the drafts if the
+        branch setting is draft_preferred
+        """
+        if self.get_branch_setting() != ModuleStoreEnum.Branch.draft_preferred:
+            return super(DraftModuleStore, self)._query_course_for_cache_children(course_key, lazy=lazy)
+
+        course_items = {}
+        for item in self.collection.find(self._course_key_to_son(course_key), self._cache_children_fields(lazy)):
+            item_url = unicode(as_published(Location._from_deprecated_son(item['_id'], course_key.run)))
+            if item['_id'].get('revision') == MongoRevisionKey.draft or item_url not in course_items:
+                course_items[item_url] = item
+        return course_items
+
     def has_published_version(self, xblock):
         """
         Returns True if this xblock has an existing published version regardless of whether the
@@ -2,7 +2,6 @@ import sys
 import logging
 from contracts import contract, new_contract
 from fs.osfs import OSFS
-from lazy import lazy
 from xblock.runtime import KvsFieldData
 from xblock.fields import ScopeIds
 from xblock.core import XBlock
@@ -78,15 +77,6 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
 
-    @lazy
-    @contract(returns="dict(BlockKey: BlockKey)")
-    def _parent_map(self):
-        parent_map = {}
-        for block_key, block in self.course_entry.structure['blocks'].iteritems():
-            for child in block.fields.get('children', []):
-                parent_map[child] = block_key
-        return parent_map
-
     @contract(usage_key="BlockUsageLocator | BlockKey", course_entry_override="CourseEnvelope | None")
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
         """
@@ -201,20 +191,31 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         converted_fields = convert_fields(block_data.fields)
         converted_defaults = convert_fields(block_data.defaults)
-        if block_key in self._parent_map:
-            parent_key = self._parent_map[block_key]
+        structure = self.course_entry.structure
+        parent_keys = self.modulestore.get_parent_index(structure).get(block_key)
+        if parent_keys:
+            parent_key = self.modulestore.pick_parent(parent_keys)
             parent = course_key.make_usage_key(parent_key.type, parent_key.id)
         else:
             parent = None
+
+        # blocks of the structure get the settings they inherit precomputed, others
+        # (e.g. ones being created) look them up on their ancestors
+        inheriting = InheritanceMixin in self.modulestore.xblock_mixins
+        inherited_settings = None
+        if inheriting and block_key in structure['blocks']:
+            inherited_settings = self.modulestore.get_inheritance_index(structure).get(block_key)
+
         kvs = SplitMongoKVS(
             definition_loader,
             converted_fields,
             converted_defaults,
             parent=parent,
-            field_decorator=kwargs.get('field_decorator')
+            field_decorator=kwargs.get('field_decorator'),
+            inherited_settings=inherited_settings,
         )
 
-        if InheritanceMixin in self.modulestore.xblock_mixins:
+        if inheriting and inherited_settings is None:
             field_data = inheriting_field_data(kvs)
         else:
             field_data = KvsFieldData(kvs)
@@ -76,11 +76,14 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        :param structure_cache: an optional StructureCache of the structures read and written
         """
+        self.structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +125,15 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is None:
+            return structure_from_mongo(self.structures.find_one({'_id': key}))
+
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            structure = self.structures.find_one({'_id': key})
+            if structure is not None:
+                self.structure_cache.set(key, structure)
+        return structure_from_mongo(structure)
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -173,7 +184,10 @@ class MongoConnection(object):
         """
         Insert a new structure into the database.
         """
-        self.structures.insert(structure_to_mongo(structure))
+        mongo_structure = structure_to_mongo(structure)
+        self.structures.insert(mongo_structure)
+        if self.structure_cache is not None:
+            self.structure_cache.set(mongo_structure['_id'], mongo_structure)
 
     def get_course_index(self, key, ignore_case=False):
         """
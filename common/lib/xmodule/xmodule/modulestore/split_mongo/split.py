@@ -80,6 +80,7 @@ from xmodule.modulestore import (
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.structure_cache import StructureIndexCache
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -628,15 +629,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, structure_cache=None, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache: an optional StructureCache shared by the stores of the process.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_cache=structure_cache, **doc_store_config)
         self.db = self.db_connection.database
+        self.structure_indexes = StructureIndexCache()
 
         if default_class is not None:
             module_path, __, class_name = default_class.rpartition('.')
@@ -772,6 +775,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Should only be used by testing or something which implements transactional boundary semantics.
         :param course_version_guid: if provided, clear only this entry
         """
+        if course_version_guid:
+            self.structure_indexes.invalidate(course_version_guid)
+        else:
+            self.structure_indexes.clear()
+
         if self.request_cache is None:
             return
 
@@ -904,6 +912,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # get the blocks for each course index (s/b the root)
         return self._get_structures_for_branch_and_locator(branch, self._create_course_locator, **kwargs)
 
+    @autoretry_read()
+    def get_course_keys(self, branch, **kwargs):
+        """
+        Returns a list of the keys of the courses which have the given branch,
+        from their course indexes, without loading their structures.
+
+        :param branch: the branch for which to return course keys.
+        """
+        return [
+            self._create_course_locator(entry, branch)
+            for entry in self.find_matching_course_indexes(branch)
+        ]
+
     def get_libraries(self, branch="library", **kwargs):
         """
         Returns a list of "library" root blocks matching any given qualifiers.
@@ -1048,34 +1069,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
+        structure = course.structure
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
-        def _block_matches_all(block_data):
-            """
-            Check that the block matches all the criteria
-            """
-            # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
-                self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
-
         if settings is None:
             settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
-                    block_ids.append(block_id)
-
+            candidates = self._get_block_index(structure, 'name').get(block_name, [])
+            block_ids = self._match_blocks(course_locator, structure, candidates, qualifiers, settings, content)
             return self._load_items(course, block_ids, **kwargs)
 
         if 'category' in qualifiers:
@@ -1084,15 +1087,98 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
-                items.append(block_id)
 
+        candidates = self._get_items_candidates(structure, qualifiers, settings)
+        items = self._match_blocks(course_locator, structure, candidates, qualifiers, settings, content)
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    def _get_items_candidates(self, structure, qualifiers, settings):
+        """
+        Return the keys of the blocks of the structure which can match the block_type
+        qualifier and the settings of get_items, looked up in the narrowest of the indexes
+        of the structure which apply, or all the blocks if none does.
+        """
+        candidates = None
+        lookups = [('block_type', qualifiers.get('block_type'))]
+        lookups.extend(('settings.' + field_name, value) for field_name, value in settings.iteritems())
+        for index_name, value in lookups:
+            if not isinstance(value, (basestring, int, long, float)):
+                # only plain values can be looked up: None, regexes, functions and
+                # operators such as $exists have to be tested against every block
+                continue
+            index_candidates = self._get_block_index(structure, index_name).get(value, [])
+            if candidates is None or len(index_candidates) < len(candidates):
+                candidates = index_candidates
+        return structure['blocks'].keys() if candidates is None else candidates
+
+    def _get_block_index(self, structure, index_name):
+        """
+        Return a dict mapping values to the list of the keys of the blocks of the structure
+        which have them, computed once per structure version. The lists must not be modified.
+
+        :param index_name: 'block_type', 'name' (the block id), or 'settings.' followed by
+            the name of a settings field; the blocks whose field is a list are indexed under
+            each of its elements, as get_items matches them.
+        """
+        field_name = index_name[len('settings.'):] if index_name.startswith('settings.') else None
+
+        def build_index():
+            """
+            Index the blocks of the structure.
+            """
+            index = {}
+            for block_key, block in structure['blocks'].iteritems():
+                if index_name == 'block_type':
+                    values = [block.block_type]
+                elif index_name == 'name':
+                    values = [block_key.id]
+                elif field_name in block.fields:
+                    values = _flatten(block.fields[field_name])
+                else:
+                    continue
+
+                for value in values:
+                    try:
+                        keys = index.setdefault(value, [])
+                    except TypeError:
+                        # not hashable, so it can't equal the plain values which are looked up
+                        continue
+                    if not keys or keys[-1] != block_key:
+                        keys.append(block_key)
+            return index
+
+        return self.structure_indexes.get(structure['_id'], index_name, build_index)
+
+    def _match_blocks(self, course_key, structure, block_keys, qualifiers, settings, content):
+        """
+        Return the keys among block_keys of the blocks matching the qualifiers, settings
+        and content of get_items. The definitions needed to check the content are
+        fetched together.
+        """
+        blocks = structure['blocks']
+        matches = [
+            block_key for block_key in block_keys
+            if self._block_matches(blocks[block_key], qualifiers) and
+            self._block_matches(blocks[block_key].fields, settings)
+        ]
+        if not content or not matches:
+            return matches
+
+        definition_ids = set(blocks[block_key].definition for block_key in matches)
+        definition_ids.discard(None)
+        definitions = {
+            definition['_id']: definition
+            for definition in self.get_definitions(course_key, list(definition_ids))
+        }
+        return [
+            block_key for block_key in matches
+            if blocks[block_key].definition in definitions and
+            self._block_matches(definitions[blocks[block_key].definition]['fields'], content)
+        ]
+
     def get_parent_location(self, locator, **kwargs):
         """
         Return the location (Locators w/ block_ids) for the parent of this location in this
@@ -1109,12 +1195,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
         if len(parent_ids) == 0:
             return None
-        # find alphabetically least
-        parent_ids.sort(key=lambda parent: (parent.type, parent.id))
+        parent_id = self.pick_parent(parent_ids)
         return BlockUsageLocator.make_relative(
             locator,
-            block_type=parent_ids[0].type,
-            block_id=parent_ids[0].id,
+            block_type=parent_id.type,
+            block_id=parent_id.id,
         )
 
     def get_orphans(self, course_key, **kwargs):
@@ -2144,9 +2229,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     )
                 )
             # remove any remaining orphans
+            parent_index = self._build_parent_index(destination_structure)
             for orphan in orphans:
                 # orphans will include moved as well as deleted xblocks. Only delete the deleted ones.
-                self._delete_if_true_orphan(orphan, destination_structure)
+                self._delete_if_true_orphan(orphan, destination_structure, parent_index)
 
             # update the db
             self.update_structure(destination_course, destination_structure)
@@ -2395,51 +2481,61 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # in case the course is later restored.
         # super(SplitMongoModuleStore, self).delete_course(course_key, user_id)
 
-    @contract(block_map="dict(BlockKey: dict)", block_key=BlockKey)
-    def inherit_settings(
-        self, block_map, block_key, inherited_settings_map, inheriting_settings=None, inherited_from=None
-    ):
-        """
-        Updates block_data with any inheritable setting set by an ancestor and recurses to children.
+    def get_inheritance_index(self, structure):
         """
-        if block_key not in block_map:
-            return
-        block_data = block_map[block_key]
-
-        if inheriting_settings is None:
-            inheriting_settings = {}
+        Return a dict mapping the keys of the blocks of the structure to the values of
+        the inheritable settings set by their ancestors (in json format).
 
-        if inherited_from is None:
-            inherited_from = []
-
-        # the currently passed down values take precedence over any previously cached ones
-        # NOTE: this should show the values which all fields would have if inherited: i.e.,
-        # not set to the locally defined value but to value set by nearest ancestor who sets it
-        inherited_settings_map.setdefault(block_key, {}).update(inheriting_settings)
+        Computed once per structure version; the dicts are shared by the blocks which
+        inherit the same settings, so they must not be modified.
+        """
+        return self.structure_indexes.get(
+            structure['_id'], 'inheritance', lambda: self.inherit_settings(structure)
+        )
 
-        # update the inheriting w/ what should pass to children
-        inheriting_settings = inherited_settings_map[block_key].copy()
-        block_fields = block_data.fields
-        for field_name in inheritance.InheritanceMixin.fields:
-            if field_name in block_fields:
-                inheriting_settings[field_name] = block_fields[field_name]
+    def inherit_settings(self, structure):
+        """
+        Compute the inheritable settings each block of the structure gets from its ancestors
+        (see get_inheritance_index).
+
+        A block inherits from the parent picked by pick_parent, and only gets a new dict
+        if that parent sets inheritable settings, so this visits each block once without
+        copying the settings down the tree.
+        """
+        blocks = structure['blocks']
+        parent_index = self.get_parent_index(structure)
+        inheritable_names = inheritance.InheritanceMixin.fields
+        no_settings = {}
+
+        # the settings which the children of each block inherit
+        passed_down = {}
+        inherited_settings_map = {}
+        for block_key in blocks:
+            # climb up to the nearest ancestor whose settings are known
+            path = []
+            on_path = set()
+            ancestor = block_key
+            while ancestor in blocks and ancestor not in passed_down and ancestor not in on_path:
+                path.append(ancestor)
+                on_path.add(ancestor)
+                parents = parent_index.get(ancestor)
+                ancestor = self.pick_parent(parents) if parents else None
+
+            # and pass the settings down from it
+            settings = passed_down.get(ancestor, no_settings)
+            for key in reversed(path):
+                inherited_settings_map[key] = settings
+                own_settings = [
+                    (field_name, value)
+                    for field_name, value in blocks[key].fields.iteritems()
+                    if field_name in inheritable_names
+                ]
+                if own_settings:
+                    settings = dict(settings)
+                    settings.update(own_settings)
+                passed_down[key] = settings
 
-        for child in block_fields.get('children', []):
-            try:
-                if child in inherited_from:
-                    raise Exception(u'Infinite loop detected when inheriting to {}, having already inherited from {}'.format(child, inherited_from))
-                self.inherit_settings(
-                    block_map,
-                    BlockKey(*child),
-                    inherited_settings_map,
-                    inheriting_settings,
-                    inherited_from + [child]
-                )
-            except KeyError:
-                # here's where we need logic for looking up in other structures when we allow cross pointers
-                # but it's also getting this during course creation if creating top down w/ children set or
-                # migration where the old mongo published had pointers to privates
-                pass
+        return inherited_settings_map
 
     def descendants(self, block_map, block_id, depth, descendent_map):
         """
@@ -2841,11 +2937,39 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Given a structure, find block_key's parent in that structure. Note returns
         the encoded format for parent
         """
-        return [
-            parent_block_key
-            for parent_block_key, value in structure['blocks'].iteritems()
-            if block_key in value.fields.get('children', [])
-        ]
+        return list(self.get_parent_index(structure).get(block_key, []))
+
+    def get_parent_index(self, structure):
+        """
+        Return a dict mapping the keys of the blocks of the structure to the list of
+        the keys of their parents, computed once per structure version.
+        The lists must not be modified.
+        """
+        return self.structure_indexes.get(
+            structure['_id'], 'parents', lambda: self._build_parent_index(structure)
+        )
+
+    @staticmethod
+    def pick_parent(parents):
+        """
+        Pick the parent which a block with several parents reports and inherits from: the
+        alphabetically least one.
+        """
+        return min(parents, key=lambda parent: (parent.type, parent.id))
+
+    @staticmethod
+    def _build_parent_index(structure):
+        """
+        Return a dict mapping the keys of the blocks of the structure to the list of
+        the keys of their parents.
+        """
+        parent_index = {}
+        for parent_block_key, value in structure['blocks'].iteritems():
+            for child in value.fields.get('children', []):
+                parents = parent_index.setdefault(tuple(child), [])
+                if parent_block_key not in parents:
+                    parents.append(parent_block_key)
+        return parent_index
 
     def _sync_children(self, source_parent, destination_parent, new_child):
         """
@@ -2941,13 +3065,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         return fields
 
     @contract(orphan=BlockKey)
-    def _delete_if_true_orphan(self, orphan, structure):
+    def _delete_if_true_orphan(self, orphan, structure, parent_index):
         """
         Delete the orphan and any of its descendants which no longer have parents.
+
+        :param parent_index: the parents of the blocks of the structure (see _build_parent_index),
+            which is kept up to date as blocks are deleted
         """
-        if len(self._get_parents_from_structure(orphan, structure)) == 0:
+        if len(parent_index.get(orphan, [])) == 0:
             for child in structure['blocks'][orphan].fields.get('children', []):
-                self._delete_if_true_orphan(BlockKey(*child), structure)
+                parents = parent_index.get(tuple(child), [])
+                if orphan in parents:
+                    parents.remove(orphan)
+                self._delete_if_true_orphan(BlockKey(*child), structure, parent_index)
             del structure['blocks'][orphan]
 
     @contract(returns=BlockData)
@@ -3050,6 +3180,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         self.db_connection.ensure_indexes()
 
 
+def _flatten(value):
+    """
+    Generate the non-list values nested in value, or value itself if it isn't a list.
+    """
+    if isinstance(value, list):
+        for element in value:
+            for flattened in _flatten(element):
+                yield flattened
+    else:
+        yield value
+
+
 class SparseList(list):
     """
     Enable inserting items into a list in arbitrary order and then retrieving them.
@@ -19,16 +19,20 @@ class SplitMongoKVS(InheritanceKeyValueStore):
     """
 
     @contract(parent="BlockUsageLocator | None")
-    def __init__(self, definition, initial_values, default_values, parent, field_decorator=None):
+    def __init__(self, definition, initial_values, default_values, parent, field_decorator=None,
+                 inherited_settings=None):
         """
 
         :param definition: either a lazyloader or definition id for the definition
         :param initial_values: a dictionary of the locally set values
         :param default_values: any Scope.settings field defaults that are set locally
             (copied from a template block with copy_from_template)
+        :param inherited_settings: the values of the inheritable fields set by the ancestors
+            of the block, if they have been computed. They are shared with other blocks so
+            must not be modified.
         """
         # deepcopy so that manipulations of fields does not pollute the source
-        super(SplitMongoKVS, self).__init__(copy.deepcopy(initial_values))
+        super(SplitMongoKVS, self).__init__(copy.deepcopy(initial_values), inherited_settings)
         self._definition = definition  # either a DefinitionLazyLoader or the db id of the definition.
         # if the db id, then the definition is presumed to be loaded into _fields
 
@@ -115,13 +119,15 @@ class SplitMongoKVS(InheritanceKeyValueStore):
 
     def default(self, key):
         """
-        Check to see if the default should be from the template's defaults (if any)
-        rather than the global default or inheritance.
+        Check to see if the default should be inherited from an ancestor or be from the
+        template's defaults (if any) rather than the global default.
         """
+        if key.field_name in self.inherited_settings:
+            return copy.deepcopy(self.inherited_settings[key.field_name])
         if self._defaults and key.field_name in self._defaults:
             return self._defaults[key.field_name]
-        # If not, try inheriting from a parent, then use the XBlock type's normal default value:
-        return super(SplitMongoKVS, self).default(key)
+        # If not, use the XBlock type's normal default value:
+        raise KeyError(key.field_name)
 
     def _load_definition(self):
         """
@@ -0,0 +1,177 @@
+"""
+A cache of split modulestore course structures, keyed by structure version.
+
+Structures are never modified once they have been written, so a structure
+can be cached for as long as there is room for it. Each process keeps the most
+recently used structures in memory, and can share them with other processes
+through a django cache (e.g. memcached, or a file based cache).
+
+Structures are cached in their Mongo document form, BSON encoded and zlib
+compressed, and a new copy is decoded on every hit because callers modify the
+structures they get.
+
+Indexes computed from the structures are cached by structure version too.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+from bson import BSON
+
+import dogstats_wrapper as dog_stats_api
+
+
+# The default maximum number of bytes of compressed structures kept in memory.
+DEFAULT_MAX_LOCAL_SIZE = 64 * 1024 * 1024
+
+
+class StructureCache(object):
+    """
+    An in-process LRU cache of structures, backed by an optional shared cache.
+    """
+    def __init__(self, shared_cache=None, max_local_size=DEFAULT_MAX_LOCAL_SIZE, timeout=None):
+        """
+        Arguments:
+            shared_cache: a django cache shared with other processes, or None
+            max_local_size (int): the maximum number of bytes of compressed structures
+                kept in memory
+            timeout (int): the lifetime of the structures in the shared cache,
+                None for the default of the cache
+        """
+        self.shared_cache = shared_cache
+        self.max_local_size = max_local_size
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._local_size = 0
+        self._lock = threading.Lock()
+
+    def get(self, structure_id):
+        """
+        Return a new copy of the Mongo document of the structure ``structure_id``,
+        or None if it isn't cached.
+        """
+        data = self._get_local(structure_id)
+        if data is not None:
+            self._record('hit', 'local')
+        elif self.shared_cache is not None:
+            data = self.shared_cache.get(self._shared_key(structure_id))
+            if data is not None:
+                self._record('hit', 'shared')
+                self._set_local(structure_id, data)
+
+        if data is None:
+            self._record('miss')
+            return None
+        return BSON(zlib.decompress(data)).decode(tz_aware=True)
+
+    def set(self, structure_id, structure):
+        """
+        Cache the Mongo document ``structure`` of the structure ``structure_id``.
+        """
+        data = zlib.compress(BSON.encode(structure), 1)
+        self._set_local(structure_id, data)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(structure_id), data, self.timeout)
+
+    def clear(self):
+        """
+        Empty the in-process cache.
+        """
+        with self._lock:
+            self._local.clear()
+            self._local_size = 0
+
+    def _get_local(self, structure_id):
+        """
+        Return the compressed structure from the in-process cache, marking it as
+        the most recently used.
+        """
+        with self._lock:
+            data = self._local.pop(structure_id, None)
+            if data is not None:
+                self._local[structure_id] = data
+            return data
+
+    def _set_local(self, structure_id, data):
+        """
+        Add the compressed structure to the in-process cache, evicting the least
+        recently used structures to make room for it.
+        """
+        if len(data) > self.max_local_size:
+            return
+        with self._lock:
+            previous = self._local.pop(structure_id, None)
+            if previous is not None:
+                self._local_size -= len(previous)
+            while self._local and self._local_size + len(data) > self.max_local_size:
+                __, evicted = self._local.popitem(last=False)
+                self._local_size -= len(evicted)
+            self._local[structure_id] = data
+            self._local_size += len(data)
+
+    @staticmethod
+    def _shared_key(structure_id):
+        """
+        The key of the structure in the shared cache.
+        """
+        return u'split_structure.{}'.format(structure_id)
+
+    @staticmethod
+    def _record(outcome, tier=None):
+        """
+        Record a cache hit or miss.
+        """
+        tags = ['tier:{}'.format(tier)] if tier else []
+        dog_stats_api.increment('split.structure_cache.{}'.format(outcome), tags=tags)
+
+
+# The default maximum number of structures whose indexes are kept in memory.
+DEFAULT_MAX_INDEXED_STRUCTURES = 50
+
+
+class StructureIndexCache(object):
+    """
+    An in-process LRU cache of the indexes computed from structures (such as the
+    parents of their blocks), keyed by structure version and name of the index.
+
+    The structures of the versions being edited by a bulk operation change, so
+    their indexes must be invalidated whenever they are updated.
+    """
+    def __init__(self, max_structures=DEFAULT_MAX_INDEXED_STRUCTURES):
+        self.max_structures = max_structures
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, structure_id, name, compute):
+        """
+        Return the index ``name`` of the structure ``structure_id``, calling
+        ``compute()`` to build it if it isn't cached.
+        """
+        with self._lock:
+            indexes = self._indexes.pop(structure_id, None)
+            if indexes is None:
+                indexes = {}
+                while len(self._indexes) >= self.max_structures:
+                    self._indexes.popitem(last=False)
+            self._indexes[structure_id] = indexes
+            if name in indexes:
+                return indexes[name]
+
+        index = compute()
+        with self._lock:
+            indexes[name] = index
+        return index
+
+    def invalidate(self, structure_id):
+        """
+        Forget the indexes of the structure ``structure_id``.
+        """
+        with self._lock:
+            self._indexes.pop(structure_id, None)
+
+    def clear(self):
+        """
+        Forget the indexes of all structures.
+        """
+        with self._lock:
+            self._indexes.clear()
@@ -16,6 +16,7 @@ from xmodule.contentstore.mongo import MongoContentStore
 from xmodule.contentstore.content import StaticContent
 from xmodule.exceptions import NotFoundError
 import ddt
+from mock import patch
 from __builtin__ import delattr
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 
@@ -197,6 +198,82 @@ class TestContentstore(unittest.TestCase):
         __, count = self.contentstore.get_all_content_for_course(dest_course)
         self.assertEqual(count, len(self.course1_files))
 
+    @ddt.data(True, False)
+    def test_copy_assets_deduplicated(self, deprecated):
+        """
+        copy_all_course_assets only adds references to the blobs of the assets
+        """
+        self.set_up_assets(deprecated)
+        # picture1.jpg is in both courses
+        blob_count = self.contentstore.blob_files.count()
+        self.assertEqual(blob_count, len(set(self.course1_files + self.course2_files)))
+
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertEqual(self.contentstore.blob_files.count(), blob_count)
+
+        # the copies remain once the source course is gone
+        self.contentstore.delete_all_course_assets(self.course1_key)
+        for filename in self.course1_files:
+            with open("{}/static/{}".format(DATA_DIR, filename), "rb") as f:
+                self.assertEqual(self.contentstore.find(dest_course.make_asset_key('asset', filename)).data, f.read())
+        self.contentstore.delete_all_course_assets(dest_course)
+        self.assertEqual(self.contentstore.blob_files.count(), len(self.course2_files))
+
+    @ddt.data(True, False)
+    def test_copy_assets_with_own_chunks(self, deprecated):
+        """
+        copy_all_course_assets moves the bytes of the assets stored with their own chunks to blobs
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', 'own_chunks.txt')
+        asset_id, asset_son = self.contentstore.asset_db_key(asset_key)
+        self.contentstore.fs.put(
+            'x' * 1000000, _id=asset_id, filename=unicode(asset_key), content_type='text/plain',
+            displayname='own_chunks.txt', content_son=asset_son, thumbnail_location=None, import_path=None
+        )
+
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertIsNotNone(self.contentstore.get_attr(asset_key, 'blob_id'))
+        self.assertEqual(self.contentstore.fs_chunks.find({'files_id': asset_id}).count(), 0)
+        for key in (asset_key, dest_course.make_asset_key('asset', 'own_chunks.txt')):
+            self.assertEqual(self.contentstore.find(key).data, 'x' * 1000000)
+
+    @ddt.data(True, False)
+    def test_save_existing_content(self, deprecated):
+        """
+        Saving an asset with the bytes of an existing one references its blob without writing them again
+        """
+        self.set_up_assets(deprecated)
+        blob_count = self.contentstore.blob_files.count()
+        with patch.object(self.contentstore.blob_fs, 'new_file') as mock_new_file:
+            self.save_asset('picture1.jpg', self.course1_key.make_asset_key('asset', 'copy.jpg'), 'copy.jpg', False)
+        self.assertFalse(mock_new_file.called)
+        self.assertEqual(self.contentstore.blob_files.count(), blob_count)
+
+    @ddt.data(True, False)
+    def test_save_replaces_own_chunks(self, deprecated):
+        """
+        Saving an asset stored with its own chunks replaces them with a reference to a blob
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', 'own_chunks.txt')
+        asset_id, asset_son = self.contentstore.asset_db_key(asset_key)
+        self.contentstore.fs.put(
+            'x' * 1000, _id=asset_id, filename=unicode(asset_key), content_type='text/plain',
+            displayname='own_chunks.txt', content_son=asset_son, thumbnail_location=None, import_path=None
+        )
+
+        self.contentstore.save(StaticContent(asset_key, 'own_chunks.txt', 'text/plain', 'y' * 1000))
+        self.assertEqual(self.contentstore.fs_chunks.find({'files_id': asset_id}).count(), 0)
+        self.assertEqual(self.contentstore.find(asset_key).data, 'y' * 1000)
+
+        # deleting it twice releases its blob once
+        self.contentstore.delete(asset_key)
+        self.contentstore.delete(asset_key)
+        self.assertEqual(self.contentstore.blob_files.count(), len(set(self.course1_files + self.course2_files)))
+
     @ddt.data(True, False)
     def test_delete_assets(self, deprecated):
         """
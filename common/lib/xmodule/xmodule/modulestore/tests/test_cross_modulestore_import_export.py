@@ -65,16 +65,42 @@ class MemoryCache(object):
         """
         return self._data.get(key, default)
 
-    def set(self, key, value):
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
         """
         Set a key in the cache.
 
         Args:
             key: The key to update.
             value: The value change the key to.
+            timeout: Ignored.
         """
         self._data[key] = value
 
+    def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        """
+        Set a key in the cache, if it isn't set yet.
+
+        Args:
+            key: The key to add.
+            value: The value to set the key to.
+            timeout: Ignored.
+
+        Returns whether the key was set.
+        """
+        if key in self._data:
+            return False
+        self._data[key] = value
+        return True
+
+    def delete(self, key):
+        """
+        Delete a key from the cache.
+
+        Args:
+            key: The key to delete.
+        """
+        self._data.pop(key, None)
+
 
 class MongoContentstoreBuilder(object):
     """
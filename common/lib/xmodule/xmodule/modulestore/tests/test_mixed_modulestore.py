@@ -845,6 +845,13 @@ class TestMixedModuleStore(CourseComparisonTest):
             published_courses = self.store.get_courses(remove_branch=True)
         self.assertEquals([c.id for c in draft_courses], [c.id for c in published_courses])
 
+    @ddt.data('draft', 'split')
+    def test_get_course_keys(self, default_ms):
+        self.initdb(default_ms)
+        course_keys = self.store.get_course_keys()
+        self.assertEqual(len(course_keys), 3)
+        self.assertEqual(set(course_keys), set(course.id for course in self.store.get_courses()))
+
     @ddt.data('draft', 'split')
     def test_create_child_detached_tabs(self, default_ms):
         """
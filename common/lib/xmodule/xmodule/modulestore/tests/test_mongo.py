@@ -16,6 +16,7 @@ from uuid import uuid4
 from datetime import datetime
 from pytz import UTC
 import unittest
+from mock import patch
 from xblock.core import XBlock
 
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
@@ -35,14 +36,15 @@ from xmodule.modulestore.xml_exporter import export_to_xml
 from xmodule.modulestore.xml_importer import import_from_xml, perform_xlint
 from xmodule.contentstore.mongo import MongoContentStore
 
-from nose.tools import assert_in
+from nose.tools import assert_in, assert_not_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, LAZY_DEFINITION_KEY, MetadataInheritanceTree, MongoRevisionKey
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 
 
 log = logging.getLogger(__name__)
@@ -705,6 +707,147 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_get_course_lazy(self):
+        """
+        Tests that the definition data of the descendants of a course loaded lazily is loaded on first access
+        """
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        html_location = course_key.make_usage_key('html', 'toyhtml')
+        course = self.draft_store.get_course(course_key, depth=None, lazy=True)
+
+        module_data = course.runtime.module_data
+        assert_true(module_data[html_location][LAZY_DEFINITION_KEY])
+        assert_not_in('data', module_data[html_location]['definition'])
+
+        html = course.runtime.load_item(html_location)
+        assert_equals(html.data, self.draft_store.get_item(html_location).data)
+        assert_not_in(LAZY_DEFINITION_KEY, module_data[html_location])
+
+    def test_metadata_inheritance_tree_patched(self):
+        """
+        Tests that updating a block patches the cached metadata inheritance tree instead of computing it again
+        """
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+
+        course = self.draft_store.create_course("TestX", "InheritanceTest", "2015_T1", self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter', block_id='chapter')
+        sequential = self.draft_store.create_child(self.dummy_user, chapter.location, 'sequential', block_id='seq')
+        html = self.draft_store.create_child(self.dummy_user, sequential.location, 'html', block_id='html')
+
+        with patch.object(
+            self.draft_store, '_compute_metadata_inheritance_tree', wraps=self.draft_store._compute_metadata_inheritance_tree
+        ) as mock_compute:
+            chapter = self.draft_store.get_item(chapter.location)
+            chapter.graded = True
+            chapter.days_early_for_beta = 5.0
+            self.draft_store.update_item(chapter, self.dummy_user)
+
+            html = self.draft_store.get_item(html.location)
+            html.display_name = 'Updated'
+            self.draft_store.update_item(html, self.dummy_user)
+        self.assertFalse(mock_compute.called)
+
+        for location in (sequential.location, html.location):
+            block = self.draft_store.get_item(location)
+            self.assertTrue(block.graded)
+            self.assertEqual(block.days_early_for_beta, 5.0)
+
+        tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id)
+        self.assertEqual(tree.get_parent(unicode(html.location), ModuleStoreEnum.Branch.draft_preferred),
+                         unicode(sequential.location))
+
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
+    def test_metadata_inheritance_tree_patch_contention(self):
+        """
+        Tests that the cached metadata inheritance tree is dropped when another process is patching it
+        """
+        cache = MemoryCache()
+        self.draft_store.metadata_inheritance_cache_subsystem = cache
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+
+        course = self.draft_store.create_course("TestX", "InheritanceLock", "2015_T1", self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter', block_id='chapter')
+        html = self.draft_store.create_child(self.dummy_user, chapter.location, 'html', block_id='html')
+
+        cache.add(u'{}.patch_lock'.format(course.id), True)
+        with patch.object(
+            self.draft_store, '_compute_metadata_inheritance_tree', wraps=self.draft_store._compute_metadata_inheritance_tree
+        ) as mock_compute:
+            chapter = self.draft_store.get_item(chapter.location)
+            chapter.graded = True
+            self.draft_store.update_item(chapter, self.dummy_user)
+        self.assertTrue(mock_compute.called)
+        self.assertTrue(cache.get(u'{}.patch_contention'.format(course.id)))
+        self.assertTrue(self.draft_store.get_item(html.location).graded)
+
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
+    def test_metadata_inheritance_tree_moved_child(self):
+        """
+        Tests that a child moved in draft inherits the metadata of its parent in each branch
+        """
+        tree = MetadataInheritanceTree()
+        tree.root = 'course'
+        tree.add_container('course', {}, ['chapter1', 'chapter2'], MongoRevisionKey.published)
+        tree.add_container('chapter1', {'graded': True}, ['html'], MongoRevisionKey.published)
+        tree.add_container('chapter1', {'graded': True}, [], MongoRevisionKey.draft)
+        tree.add_container('chapter2', {'graded': False}, [], MongoRevisionKey.published)
+        tree.add_container('chapter2', {'graded': False}, ['html'], MongoRevisionKey.draft)
+
+        tree.inherit_down('course', ModuleStoreEnum.Branch.draft_preferred)
+        self.assertFalse(tree.get_metadata('html', ModuleStoreEnum.Branch.draft_preferred)['graded'])
+        self.assertEqual(tree.get_parent('html', ModuleStoreEnum.Branch.draft_preferred), 'chapter2')
+
+        tree.inherit_down('course', ModuleStoreEnum.Branch.published_only)
+        self.assertTrue(tree.get_metadata('html', ModuleStoreEnum.Branch.published_only)['graded'])
+        self.assertEqual(tree.get_parent('html', ModuleStoreEnum.Branch.published_only), 'chapter1')
+
+    def test_metadata_inheritance_tree_draft_patched(self):
+        """
+        Tests that patching the draft of a container only changes the metadata inherited in the draft branch
+        """
+        tree = MetadataInheritanceTree()
+        tree.root = 'course'
+        tree.add_container('course', {}, ['vertical'], MongoRevisionKey.published)
+        tree.add_container('vertical', {'visible_to_staff_only': False}, ['html'], MongoRevisionKey.published)
+        for branch in MetadataInheritanceTree.BRANCHES:
+            tree.inherit_down('course', branch)
+
+        tree.patch('vertical', {'visible_to_staff_only': True}, ['html'], MongoRevisionKey.draft)
+        self.assertTrue(tree.get_metadata('html', ModuleStoreEnum.Branch.draft_preferred)['visible_to_staff_only'])
+        self.assertFalse(tree.get_metadata('html', ModuleStoreEnum.Branch.published_only)['visible_to_staff_only'])
+
+    def test_metadata_inheritance_tree_draft_edit(self):
+        """
+        Tests that editing the inheritable metadata of the draft of a unit doesn't change the metadata
+        inherited by its published children
+        """
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+
+        course = self.draft_store.create_course("TestX", "InheritanceDraft", "2015_T1", self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter', block_id='chapter')
+        sequential = self.draft_store.create_child(self.dummy_user, chapter.location, 'sequential', block_id='seq')
+        vertical = self.draft_store.create_child(self.dummy_user, sequential.location, 'vertical', block_id='unit')
+        html = self.draft_store.create_child(self.dummy_user, vertical.location, 'html', block_id='html')
+        self.draft_store.publish(vertical.location, self.dummy_user)
+
+        with patch.object(
+            self.draft_store, '_compute_metadata_inheritance_tree', wraps=self.draft_store._compute_metadata_inheritance_tree
+        ) as mock_compute:
+            vertical = self.draft_store.get_item(vertical.location)
+            vertical.visible_to_staff_only = True
+            self.draft_store.update_item(vertical, self.dummy_user)
+        self.assertFalse(mock_compute.called)
+
+        self.assertTrue(self.draft_store.get_item(html.location).visible_to_staff_only)
+        with self.draft_store.branch_setting(ModuleStoreEnum.Branch.published_only):
+            self.assertFalse(self.draft_store.get_item(html.location).visible_to_staff_only)
+
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
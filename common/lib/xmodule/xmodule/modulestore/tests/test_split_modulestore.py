@@ -10,6 +10,7 @@ import unittest
 import uuid
 
 from contracts import contract
+from mock import patch
 from nose.plugins.attrib import attr
 
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -950,6 +951,44 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         self.assertEqual(len(matches), 6)
 
+    def test_get_items_indexed(self):
+        """
+        get_items looks plain values up in indexes of the structure, and matches the
+        rest of the criteria on the blocks found
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        matches = modulestore().get_items(locator, settings={'display_name': 'Problem 3.2'})
+        self.assertEqual([match.location.block_id for match in matches], ['problem3_2'])
+        matches = modulestore().get_items(
+            locator, qualifiers={'category': 'problem'}, settings={'display_name': re.compile(r'3\.[23]')}
+        )
+        self.assertEqual(len(matches), 2)
+        matches = modulestore().get_items(locator, qualifiers={'category': 'chapter'}, settings={'display_name': 'x'})
+        self.assertEqual(len(matches), 0)
+
+        # the indexes follow the changes to the course
+        problem = modulestore().get_item(locator.make_usage_key('problem', 'problem3_2'))
+        problem.display_name = 'Problem 3.2 renamed'
+        modulestore().update_item(problem, self.user_id)
+        self.assertEqual(len(modulestore().get_items(locator, settings={'display_name': 'Problem 3.2'})), 0)
+        self.assertEqual(len(modulestore().get_items(locator, settings={'display_name': 'Problem 3.2 renamed'})), 1)
+
+    def test_get_items_content(self):
+        """
+        get_items fetches the definitions to match the content of all the candidate blocks at once
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        store = modulestore()
+        with patch.object(store, 'get_definitions', wraps=store.get_definitions) as get_definitions:
+            with patch.object(store, 'get_definition') as get_definition:
+                with_data = store.get_items(locator, qualifiers={'category': 'problem'}, content={'data': {'$exists': True}})
+                without_data = store.get_items(
+                    locator, qualifiers={'category': 'problem'}, content={'data': {'$exists': False}}
+                )
+        self.assertEqual(len(with_data) + len(without_data), 3)
+        self.assertEqual(get_definitions.call_count, 2)
+        self.assertFalse(get_definition.called)
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
@@ -971,6 +1010,21 @@ class SplitModuleItemTests(SplitModuleTest):
         parent = modulestore().get_parent_location(locator)
         self.assertIsNone(parent)
 
+    def test_get_parents_in_bulk_operation(self):
+        '''
+        get_parent_location reflects the changes made earlier in a bulk operation
+        '''
+        course_key = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        chapter = course_key.make_usage_key('chapter', 'chapter1')
+        with modulestore().bulk_operations(course_key):
+            self.assertEqual(modulestore().get_parent_location(chapter).block_id, 'head12345')
+            sequential = modulestore().create_child(
+                self.user_id, chapter, 'sequential', block_id='new_sequential'
+            )
+            self.assertEqual(modulestore().get_parent_location(sequential.location).block_id, 'chapter1')
+            modulestore().delete_item(chapter, self.user_id)
+            self.assertIsNone(modulestore().get_parent_location(chapter))
+
     def test_get_children(self):
         """
         Test the existing get_children method on xdescriptors
@@ -1677,6 +1731,22 @@ class TestInheritance(SplitModuleTest):
         # overridden
         self.assertEqual(node.graceperiod, datetime.timedelta(hours=4))
 
+    def test_inheritance_index(self):
+        """
+        The inherited settings are computed once per structure version, and shared
+        by the blocks whose parents set no inheritable settings
+        """
+        course_key = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        structure = modulestore().get_course(course_key).system.course_entry.structure
+        index = modulestore().get_inheritance_index(structure)
+        self.assertIs(modulestore().get_inheritance_index(structure), index)
+
+        self.assertEqual(index[BlockKey('course', 'head12345')], {})
+        chapter_settings = index[BlockKey('chapter', 'chapter3')]
+        self.assertEqual(chapter_settings['graceperiod'], '2 hours')
+        self.assertIs(index[BlockKey('problem', 'problem1')], chapter_settings)
+        self.assertIs(index[BlockKey('problem', 'problem3_2')], chapter_settings)
+
     def test_inheritance_not_saved(self):
         """
         Was saving inherited settings with updated blocks causing inheritance to be sticky
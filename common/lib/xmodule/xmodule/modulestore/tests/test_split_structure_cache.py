@@ -0,0 +1,159 @@
+"""
+Tests of the cache of split modulestore structures.
+"""
+import datetime
+import unittest
+
+from bson.objectid import ObjectId
+from mock import Mock, patch
+from pytz import UTC
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, structure_from_mongo
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache, StructureIndexCache
+
+
+def mongo_structure(structure_id=None):
+    """
+    Return the Mongo document of a small structure.
+    """
+    return {
+        '_id': structure_id or ObjectId(),
+        'root': ['course', 'course'],
+        'blocks': [
+            {
+                'block_type': 'course',
+                'block_id': 'course',
+                'definition': ObjectId(),
+                'fields': {'children': [['chapter', 'chapter']], 'display_name': u'Course'},
+                'defaults': {},
+                'edit_info': {'edited_on': datetime.datetime(2015, 1, 1, tzinfo=UTC)},
+            },
+        ],
+    }
+
+
+class StructureCacheTest(unittest.TestCase):
+    """
+    Tests of StructureCache.
+    """
+    def setUp(self):
+        super(StructureCacheTest, self).setUp()
+        self.shared_cache = {}
+        self.cache = StructureCache(
+            Mock(get=self.shared_cache.get, set=lambda key, value, timeout: self.shared_cache.update({key: value}))
+        )
+
+    def test_get_set(self):
+        structure = mongo_structure()
+        self.assertIsNone(self.cache.get(structure['_id']))
+        self.cache.set(structure['_id'], structure)
+        self.assertEqual(self.cache.get(structure['_id']), structure)
+
+    def test_get_returns_copies(self):
+        structure = mongo_structure()
+        self.cache.set(structure['_id'], structure)
+        cached = self.cache.get(structure['_id'])
+        cached['blocks'][0]['fields']['display_name'] = u'Changed'
+        self.assertEqual(self.cache.get(structure['_id']), structure)
+
+    def test_shared_cache(self):
+        structure = mongo_structure()
+        self.cache.set(structure['_id'], structure)
+        self.cache.clear()
+        self.assertEqual(self.cache.get(structure['_id']), structure)
+
+        # Another process gets it from the shared cache
+        other_cache = StructureCache(Mock(get=self.shared_cache.get))
+        self.assertEqual(other_cache.get(structure['_id']), structure)
+
+    def test_eviction(self):
+        structures = [mongo_structure() for __ in range(3)]
+        self.cache = StructureCache()
+        self.cache.set(structures[0]['_id'], structures[0])
+        # Make room for two structures only
+        self.cache.max_local_size = self.cache._local_size * 5 / 2  # pylint: disable=protected-access
+        self.cache.set(structures[1]['_id'], structures[1])
+
+        # The least recently used structure is evicted
+        self.assertIsNotNone(self.cache.get(structures[0]['_id']))
+        self.cache.set(structures[2]['_id'], structures[2])
+        self.assertIsNotNone(self.cache.get(structures[0]['_id']))
+        self.assertIsNone(self.cache.get(structures[1]['_id']))
+        self.assertIsNotNone(self.cache.get(structures[2]['_id']))
+
+    @patch('xmodule.modulestore.split_mongo.structure_cache.dog_stats_api')
+    def test_metrics(self, dog_stats_api):
+        structure = mongo_structure()
+        self.cache.get(structure['_id'])
+        self.cache.set(structure['_id'], structure)
+        self.cache.get(structure['_id'])
+        self.cache.clear()
+        self.cache.get(structure['_id'])
+        self.assertEqual(
+            [call_args[0] for call_args in dog_stats_api.increment.call_args_list],
+            [
+                ('split.structure_cache.miss',),
+                ('split.structure_cache.hit',),
+                ('split.structure_cache.hit',),
+            ]
+        )
+        self.assertEqual(dog_stats_api.increment.call_args_list[2][1], {'tags': ['tier:shared']})
+
+
+class StructureIndexCacheTest(unittest.TestCase):
+    """
+    Tests of StructureIndexCache.
+    """
+    def setUp(self):
+        super(StructureIndexCacheTest, self).setUp()
+        self.cache = StructureIndexCache(max_structures=2)
+        self.compute = Mock(side_effect=lambda: object())
+
+    def test_get(self):
+        structure_id = ObjectId()
+        index = self.cache.get(structure_id, 'parents', self.compute)
+        self.assertIs(self.cache.get(structure_id, 'parents', self.compute), index)
+        self.assertIsNot(self.cache.get(structure_id, 'other', self.compute), index)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_invalidate(self):
+        structure_id = ObjectId()
+        index = self.cache.get(structure_id, 'parents', self.compute)
+        self.cache.invalidate(structure_id)
+        self.assertIsNot(self.cache.get(structure_id, 'parents', self.compute), index)
+
+    def test_eviction(self):
+        structure_ids = [ObjectId() for __ in range(3)]
+        indexes = [self.cache.get(structure_id, 'parents', self.compute) for structure_id in structure_ids]
+        self.assertIsNot(self.cache.get(structure_ids[0], 'parents', self.compute), indexes[0])
+        self.assertIs(self.cache.get(structure_ids[2], 'parents', self.compute), indexes[2])
+
+
+class MongoConnectionStructureCacheTest(unittest.TestCase):
+    """
+    Tests that MongoConnection reads and writes structures through its cache.
+    """
+    def setUp(self):
+        super(MongoConnectionStructureCacheTest, self).setUp()
+        with patch('pymongo.MongoClient'):
+            self.connection = MongoConnection('db', 'collection', 'host', structure_cache=StructureCache())
+        self.connection.structures = Mock()
+
+    def test_get_structure(self):
+        structure = mongo_structure()
+        self.connection.structures.find_one.side_effect = lambda query: mongo_structure(query['_id'])
+        for __ in range(2):
+            loaded = self.connection.get_structure(structure['_id'])
+            self.assertEqual(loaded['root'], BlockKey('course', 'course'))
+            self.assertEqual(
+                loaded['blocks'][BlockKey('course', 'course')].fields['children'],
+                [BlockKey('chapter', 'chapter')]
+            )
+        self.connection.structures.find_one.assert_called_once_with({'_id': structure['_id']})
+
+    def test_insert_structure(self):
+        structure = mongo_structure()
+        self.connection.insert_structure(structure_from_mongo(mongo_structure(structure['_id'])))
+        self.assertEqual(self.connection.get_structure(structure['_id']), structure_from_mongo(structure))
+        self.assertFalse(self.connection.structures.find_one.called)
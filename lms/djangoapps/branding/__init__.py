@@ -1,20 +1,16 @@
 from xmodule.modulestore.django import modulestore
-from xmodule.course_module import CourseDescriptor
 from django.conf import settings
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from microsite_configuration import microsite
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 
 
 def get_visible_courses():
     """
-    Return the set of CourseDescriptors that should be visible in this branded instance
+    Return the set of CourseOverviews that should be visible in this branded instance
     """
-    _courses = modulestore().get_courses()
-
-    courses = [c for c in _courses
-               if isinstance(c, CourseDescriptor)]
-    courses = sorted(courses, key=lambda course: course.number)
+    course_keys = modulestore().get_course_keys()
 
     subdomain = microsite.get_value('subdomain', 'default')
 
@@ -28,14 +24,18 @@ def get_visible_courses():
     filtered_by_org = microsite.get_value('course_org_filter')
 
     if filtered_by_org:
-        return [course for course in courses if course.location.org == filtered_by_org]
-    if filtered_visible_ids:
-        return [course for course in courses if course.id in filtered_visible_ids]
+        course_keys = [course_key for course_key in course_keys if course_key.org == filtered_by_org]
+    elif filtered_visible_ids:
+        course_keys = [course_key for course_key in course_keys if course_key in filtered_visible_ids]
     else:
         # Let's filter out any courses in an "org" that has been declared to be
         # in a Microsite
         org_filter_out_set = microsite.get_all_orgs()
-        return [course for course in courses if course.location.org not in org_filter_out_set]
+        course_keys = [course_key for course_key in course_keys if course_key.org not in org_filter_out_set]
+
+    # Courses which failed to load have no overview
+    courses = CourseOverview.get_select_courses(course_keys).values()
+    return sorted(courses, key=lambda course: course.number)
 
 
 def get_university_for_request():
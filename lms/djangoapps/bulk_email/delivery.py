@@ -0,0 +1,128 @@
+"""
+Connections and rate limiting for sending bulk email.
+"""
+import logging
+import socket
+import threading
+import time
+from smtplib import SMTPException
+
+log = logging.getLogger('edx.celery.task')
+
+
+class ConnectionPool(object):
+    """
+    Keeps the email connections opened by the tasks of a worker open once they
+    are done, so that the next tasks reuse them.
+
+    At most `size` connections are kept, which are shared by the tasks the
+    worker runs concurrently.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, get_connection):
+        """
+        Returns an open connection, either kept from a previous task or opened
+        with the given function, which is called like
+        `django.core.mail.get_connection`.
+        """
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                break
+            if self._is_alive(connection):
+                return connection
+            connection.close()
+
+        connection = get_connection()
+        connection.open()
+        return connection
+
+    def release(self, connection, reuse=True):
+        """
+        Gives back a connection returned by `acquire`, which is kept open for
+        the next tasks if `reuse` is True and there is room for it.
+        """
+        if reuse:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(connection)
+                    return
+        connection.close()
+
+    def close_all(self):
+        """
+        Closes the connections kept open.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    @staticmethod
+    def _is_alive(connection):
+        """
+        Returns whether the SMTP server of the connection, if it has one, still
+        answers, as servers drop the connections which stay idle for too long.
+        """
+        smtp = getattr(connection, 'connection', None)
+        if smtp is None:
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except (SMTPException, socket.error):
+            return False
+
+
+class SendRateLimiter(object):
+    """
+    Limits the rate at which emails are sent by all the workers, so that at
+    most `rate` emails are sent during any second.
+
+    The emails sent are counted in the given cache, which must be shared by the
+    workers, per slot of a fraction of a second. An email is only sent once the
+    slots of the last second, and the current slot, count fewer than `rate`.
+    """
+    # The number of slots per second
+    SLOTS = 10
+
+    def __init__(self, cache, rate, key_prefix='bulk_email.send_rate'):
+        self.cache = cache
+        self.capacity = max(1, int(rate))
+        self.key_prefix = key_prefix
+
+    def _key(self, slot):
+        """
+        Returns the cache key of the counter of the given slot.
+        """
+        return u'{}.{}'.format(self.key_prefix, slot)
+
+    def acquire(self):
+        """
+        Counts an email to send, waiting until it can be sent without going over
+        the rate. Returns the time waited, in seconds.
+        """
+        waited = 0
+        while True:
+            now = time.time()
+            slot = int(now * self.SLOTS)
+            key = self._key(slot)
+            self.cache.add(key, 0, 60)
+            try:
+                taken = self.cache.incr(key)
+            except ValueError:
+                # The counter can't be kept, e.g. with a dummy cache, so don't limit the rate
+                log.warning(u"BulkEmail ==> Could not count the emails sent during slot %s", slot)
+                return waited
+            previous = self.cache.get_many([self._key(slot - i) for i in range(1, self.SLOTS + 1)])
+            if taken + sum(previous.values()) <= self.capacity:
+                return waited
+            # Give the email back, and wait for the oldest slot to leave the window
+            self.cache.decr(key)
+            wait = float(slot + 1) / self.SLOTS - now
+            time.sleep(wait)
+            waited += wait
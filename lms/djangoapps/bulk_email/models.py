@@ -12,6 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+from string import Formatter
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
@@ -20,7 +23,8 @@ from html_to_text import html_to_text
 from mail_utils import wrap_message
 
 from xmodule_django.models import CourseKeyField
-from util.keyword_substitution import substitute_keywords_with_data
+from util import keyword_substitution
+from util.keyword_substitution import substitute_keywords, substitute_keywords_with_data
 
 log = logging.getLogger(__name__)
 
@@ -150,6 +154,10 @@ class Optout(models.Model):
 # the location where the email message body is to be inserted.
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
+# The keys of the context of course emails whose values differ between the
+# recipients of an email.
+RECIPIENT_CONTEXT_KEYS = frozenset(['name', 'email', 'user_id'])
+
 
 class CourseEmailTemplate(models.Model):
     """
@@ -228,6 +236,153 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Create a plain text message to render for each recipient of an email.
+
+        See `CompiledEmailMessage`.
+        """
+        return CompiledEmailMessage(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Create an HTML text message to render for each recipient of an email.
+
+        See `CompiledEmailMessage`.
+        """
+        return CompiledEmailMessage(self.html_template, htmltext, context)
+
+
+class CompiledEmailMessage(object):
+    """
+    An email message created from a template, a message body and a context
+    once for all the recipients of an email.
+
+    Only the parts of the message which depend on the recipient are left to
+    render for each of them: the fields of the template whose keys are in
+    RECIPIENT_CONTEXT_KEYS, and the lines of the message body with %%-encoded
+    keywords. Rendering it gives the same message as
+    `CourseEmailTemplate._render` with the same context.
+    """
+    def __init__(self, format_string, message_body, context):
+        # The formatted template, as a list of text and fields left to format
+        segments = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(format_string):
+            segments.append(literal)
+            if field_name is None:
+                continue
+            field = u'{' + field_name
+            if conversion:
+                field += u'!' + conversion
+            if format_spec:
+                field += u':' + format_spec
+            field += u'}'
+            if re.match(r'[^.[]*', field_name).group() in RECIPIENT_CONTEXT_KEYS:
+                segments.append(_RecipientField(field))
+            else:
+                segments.append(field.format(**context))
+        segments = _merge_text(segments)
+
+        # Insert the message body in place of its tag, as in the formatted template
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        for index, segment in enumerate(segments):
+            if isinstance(segment, basestring) and message_body_tag in segment:
+                before, after = segment.split(message_body_tag, 1)
+                body_segments = []
+                for line_num, line in enumerate(message_body.split('\n')):
+                    if line_num:
+                        body_segments.append(u'\n')
+                    if any(keyword in line for keyword in keyword_substitution.KEYWORD_FUNCTION_MAP):
+                        body_segments.append(_KeywordLine(line))
+                    else:
+                        body_segments.append(line)
+                segments[index:index + 1] = [before] + body_segments + [after]
+                segments = _merge_text(segments)
+                break
+
+        # Wrap the lines which don't depend on the recipient now, the others are
+        # wrapped as they are rendered
+        lines = [[]]
+        for segment in segments:
+            if isinstance(segment, basestring):
+                first_line, separator, rest = segment.partition(u'\n')
+                lines[-1].append(first_line)
+                if separator:
+                    lines.extend([line] for line in rest.split(u'\n'))
+            else:
+                lines[-1].append(segment)
+        self._lines = [
+            wrap_message(u''.join(line)) if all(isinstance(segment, basestring) for segment in line) else line
+            for line in lines
+        ]
+
+    @property
+    def has_keywords(self):
+        """
+        Whether the message body has %%-encoded keywords, which need the user
+        and the course to render.
+        """
+        return any(
+            isinstance(segment, _KeywordLine)
+            for line in self._lines if not isinstance(line, basestring)
+            for segment in line
+        )
+
+    def render(self, context, user=None, course=None):
+        """
+        Render the message for the recipient of the given context, with the
+        keywords of its body substituted with the data of the given user and
+        course if they are given.
+        """
+        return u'\n'.join(
+            line if isinstance(line, basestring) else wrap_message(u''.join(
+                segment if isinstance(segment, basestring) else segment.render(context, user, course)
+                for segment in line
+            ))
+            for line in self._lines
+        )
+
+
+def _merge_text(segments):
+    """
+    Merge the adjacent pieces of text of the given list of message segments.
+    """
+    merged = []
+    for segment in segments:
+        if isinstance(segment, basestring) and merged and isinstance(merged[-1], basestring):
+            merged[-1] += segment
+        else:
+            merged.append(segment)
+    return merged
+
+
+class _RecipientField(object):
+    """
+    A field of a template which depends on the recipient of the message.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def render(self, context, user, course):  # pylint: disable=unused-argument
+        """
+        Format the field with the context of the recipient.
+        """
+        return self.field.format(**context)
+
+
+class _KeywordLine(object):
+    """
+    A line of a message body with %%-encoded keywords.
+    """
+    def __init__(self, line):
+        self.line = line
+
+    def render(self, context, user, course):  # pylint: disable=unused-argument
+        """
+        Substitute the keywords of the line with the data of the user and course.
+        """
+        return substitute_keywords(self.line, user, course)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -30,9 +30,11 @@ from celery.exceptions import RetryTaskError
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.urlresolvers import reverse
 
+from bulk_email.delivery import ConnectionPool, SendRateLimiter
 from bulk_email.models import (
     CourseEmail, Optout, CourseEmailTemplate,
     SEND_TO_MYSELF, SEND_TO_ALL, TO_OPTIONS,
@@ -48,6 +50,7 @@ from instructor_task.subtasks import (
     update_subtask_status,
 )
 from util.query import use_read_replica_if_available
+from xmodule.modulestore.django import modulestore
 
 log = logging.getLogger('edx.celery.task')
 
@@ -92,6 +95,19 @@ BULK_EMAIL_FAILURE_ERRORS = (
     SMTPException,
 )
 
+# The email connections which this worker keeps open between tasks.
+_CONNECTION_POOL = ConnectionPool(settings.BULK_EMAIL_CONNECTION_POOL_SIZE)
+
+
+def _get_send_rate_limiter():
+    """
+    Returns the limiter of the rate at which all the workers send emails, or
+    None if it is not limited.
+    """
+    if not settings.BULK_EMAIL_MAX_SEND_RATE:
+        return None
+    return SendRateLimiter(cache, settings.BULK_EMAIL_MAX_SEND_RATE)
+
 
 def _get_recipient_querysets(user_id, to_option, course_id):
     """
@@ -470,13 +486,26 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    rate_limiter = _get_send_rate_limiter()
+    connection = None
     try:
-        connection = get_connection()
-        connection.open()
+        connection = _CONNECTION_POOL.acquire(get_connection)
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # Construct message content using templates and context, leaving only
+        # the parts which depend on the recipient to render for each of them:
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, email_context)
+
+        # The user and course data substituted for the keywords of the message
+        users = course = None
+        if plaintext_template.has_keywords or html_template.has_keywords:
+            users = User.objects.in_bulk([recipient['pk'] for recipient in to_list])
+            course = modulestore().get_course(course_email.course_id, depth=0)
 
         while to_list:
             # Update context with user-specific values from the user at the end of the list.
@@ -490,11 +519,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             email_context['email'] = email
             email_context['name'] = current_recipient['profile__name']
             email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
+            user = users.get(current_recipient['pk']) if users is not None else None
 
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            plaintext_msg = plaintext_template.render(email_context, user, course)
+            html_msg = html_template.render(email_context, user, course)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
@@ -506,12 +534,14 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             )
             email_msg.attach_alternative(html_msg, 'text/html')
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
+            # Throttle to the rate shared by all the workers, if it is configured.
+            # Otherwise, if a task has been retried for rate-limiting reasons, then we sleep
             # for a period of time between all emails within this task.  Choice of
             # the value depends on the number of workers that might be sending email in
             # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            elif subtask_status.retried_nomax > 0:
                 sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
 
             try:
@@ -679,8 +709,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         # Successful completion is marked by an exception value of None.
         return subtask_status, None
     finally:
-        # Clean up at the end.
-        connection.close()
+        # Clean up at the end, keeping the connection for the next tasks unless
+        # sending failed with it.
+        if connection is not None:
+            _CONNECTION_POOL.release(connection, reuse=not to_list)
 
 
 def _get_current_task():
@@ -0,0 +1,108 @@
+"""
+Unit tests for the connections and rate limiting of bulk email sending.
+"""
+from smtplib import SMTPServerDisconnected
+
+from django.core.cache import get_cache
+from django.test import TestCase
+from mock import Mock, patch
+
+from bulk_email.delivery import ConnectionPool, SendRateLimiter
+
+
+class ConnectionPoolTest(TestCase):
+    """
+    Test that the connections released to the pool are reused.
+    """
+    def setUp(self):
+        super(ConnectionPoolTest, self).setUp()
+        self.pool = ConnectionPool(1)
+        self.get_connection = Mock(side_effect=lambda: Mock(connection=None))
+
+    def test_reuse_connection(self):
+        connection = self.pool.acquire(self.get_connection)
+        connection.open.assert_called_once_with()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(self.get_connection), connection)
+        self.assertEqual(self.get_connection.call_count, 1)
+        self.assertFalse(connection.close.called)
+
+    def test_pool_size(self):
+        first = self.pool.acquire(self.get_connection)
+        second = self.pool.acquire(self.get_connection)
+        self.pool.release(first)
+        self.pool.release(second)
+        self.assertFalse(first.close.called)
+        second.close.assert_called_once_with()
+
+        self.pool.close_all()
+        first.close.assert_called_once_with()
+        self.assertIsNot(self.pool.acquire(self.get_connection), first)
+
+    def test_no_reuse(self):
+        connection = self.pool.acquire(self.get_connection)
+        self.pool.release(connection, reuse=False)
+        connection.close.assert_called_once_with()
+        self.assertIsNot(self.pool.acquire(self.get_connection), connection)
+
+    def test_dropped_connection(self):
+        connection = self.pool.acquire(self.get_connection)
+        connection.connection = Mock()
+        connection.connection.noop.side_effect = SMTPServerDisconnected
+        self.pool.release(connection)
+        self.assertIsNot(self.pool.acquire(self.get_connection), connection)
+        connection.close.assert_called_once_with()
+
+
+@patch('bulk_email.delivery.time')
+class SendRateLimiterTest(TestCase):
+    """
+    Test that the rate limiter waits until an email can be sent without going
+    over the rate during any second.
+    """
+    def setUp(self):
+        super(SendRateLimiterTest, self).setUp()
+        self.cache = get_cache('django.core.cache.backends.locmem.LocMemCache', LOCATION='send_rate_test')
+        self.cache.clear()
+        self.limiter = SendRateLimiter(self.cache, 2)
+        self.now = [0]
+
+    def mock_clock(self, mock_time, now):
+        """
+        Makes the mocked time start at `now`, and move forward when sleeping.
+        """
+        self.now[0] = now
+        mock_time.time.side_effect = lambda: self.now[0]
+
+        def sleep(seconds):
+            """
+            Moves the mocked time forward.
+            """
+            self.now[0] += seconds
+
+        mock_time.sleep.side_effect = sleep
+
+    def test_rate_limit(self, mock_time):
+        self.mock_clock(mock_time, 1000.25)
+        self.assertEqual(self.limiter.acquire(), 0)
+        self.assertEqual(self.limiter.acquire(), 0)
+        # The third email waits for the first two to be more than a second old
+        self.assertAlmostEqual(self.limiter.acquire(), 1.05)
+        self.assertAlmostEqual(self.now[0], 1001.3)
+        self.assertEqual(self.limiter.acquire(), 0)
+        self.assertAlmostEqual(self.now[0], 1001.3)
+
+    def test_no_burst_across_seconds(self, mock_time):
+        self.mock_clock(mock_time, 1000.95)
+        self.assertEqual(self.limiter.acquire(), 0)
+        self.assertEqual(self.limiter.acquire(), 0)
+        self.now[0] = 1001.05
+        self.assertGreater(self.limiter.acquire(), 0)
+        self.assertGreater(self.now[0], 1001.95)
+
+    def test_cache_without_counters(self, mock_time):
+        mock_time.time.return_value = 1000.25
+        limiter = SendRateLimiter(get_cache('django.core.cache.backends.dummy.DummyCache'), 1)
+        for __ in range(3):
+            self.assertEqual(limiter.acquire(), 0)
+        self.assertFalse(mock_time.sleep.called)
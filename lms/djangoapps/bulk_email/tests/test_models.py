@@ -133,6 +133,36 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    @patch.dict('util.keyword_substitution.KEYWORD_FUNCTION_MAP', {
+        '%%USER_FULLNAME%%': lambda user, course: user.profile.name,
+    })
+    def test_compiled_render(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        message_body = "Hello %%USER_FULLNAME%%,\nMy new text for {email}, " + "with a long line " * 100
+        compiled_html = template.compile_htmltext(message_body, context)
+        compiled_plain = template.compile_plaintext(message_body, context)
+        self.assertTrue(compiled_html.has_keywords)
+        self.assertFalse(template.compile_htmltext("My new html text.", context).has_keywords)
+
+        # The compiled messages render the same messages for each recipient
+        for name, email in (('Bob', 'bob@test.com'), ('Alice ' * 200, 'alice@test.com')):
+            context.update(name=name, email=email)
+            self.assertEqual(compiled_html.render(context), template.render_htmltext(message_body, context))
+            self.assertEqual(compiled_plain.render(context), template.render_plaintext(message_body, context))
+
+        user = Mock()
+        user.profile.name = 'Bob'
+        self.assertIn('Hello Bob,', compiled_plain.render(context, user, Mock()))
+
+    def test_compiled_render_without_context(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_plain_context()
+        compiled = template.compile_plaintext("My new plain text.", context)
+        del context['email']
+        with self.assertRaises(KeyError):
+            compiled.render(context)
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
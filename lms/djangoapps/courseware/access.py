@@ -6,7 +6,9 @@ from datetime import datetime, timedelta
 import pytz
 
 from django.conf import settings
-from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import AnonymousUser, User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from xmodule.course_module import (
     CourseDescriptor, CATALOG_VISIBILITY_CATALOG_AND_ABOUT,
@@ -19,15 +21,17 @@ from xblock.core import XBlock
 from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPartitionGroupError
 
 from external_auth.models import ExternalAuthMap
-from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
+from courseware.masquerade import get_course_masquerade, get_masquerade_role, is_masquerading_as_student
 from django.utils.timezone import UTC
+from request_cache.decorators import request_cached
 from student import auth
 from student.roles import (
     GlobalStaff, CourseStaffRole, CourseInstructorRole,
     OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole
 )
-from student.models import CourseEnrollment, CourseEnrollmentAllowed
+from student.models import CourseAccessRole, CourseEnrollment, CourseEnrollmentAllowed
 from opaque_keys.edx.keys import CourseKey, UsageKey
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from util.milestones_helpers import get_pre_requisite_courses_not_completed
 DEBUG_ACCESS = False
 
@@ -40,6 +44,48 @@ def debug(*args, **kwargs):
         log.debug(*args, **kwargs)
 
 
+def _has_access_cache_key(user, action, obj, course_key=None):
+    """
+    Returns the key of a has_access check in the request cache, or None if the
+    check shouldn't be memoized.
+
+    Objects are identified by their location or key, and the key includes the
+    masquerade of the user in the course of the object, which can be set up
+    after the user's access has been checked. Checks of blocks with group access
+    rules aren't memoized, as they depend on the groups of the user, such as
+    cohorts, which aren't part of the key.
+    """
+    if user and user.is_authenticated():
+        if user.id is None:
+            return None
+        user_id = user.id
+    else:
+        user_id = None
+
+    if isinstance(obj, (CourseDescriptor, CourseOverview)):
+        obj_key = obj_course_key = obj.id
+    elif isinstance(obj, (XModule, XBlock)):
+        if any(group_ids is not None for group_ids in getattr(obj, 'merged_group_access', {}).values()):
+            return None
+        obj_key = obj.location
+        obj_course_key = course_key or obj.location.course_key
+    elif isinstance(obj, CourseKey):
+        obj_key = obj_course_key = obj
+    elif isinstance(obj, UsageKey):
+        obj_key = obj
+        obj_course_key = course_key or obj.course_key
+    elif isinstance(obj, basestring):
+        obj_key = obj
+        obj_course_key = None
+    else:
+        return None
+
+    masquerade = get_course_masquerade(user, obj_course_key) if user_id is not None else None
+    masquerade_key = (masquerade.role, masquerade.user_partition_id, masquerade.group_id) if masquerade else None
+    return (user_id, action, obj.__class__, obj_key, course_key, masquerade_key)
+
+
+@request_cached(key_func=_has_access_cache_key)
 def has_access(user, action, obj, course_key=None):
     """
     Check whether a user has the access to do action on obj.  Handles any magic
@@ -55,8 +101,8 @@ def has_access(user, action, obj, course_key=None):
     user: a Django user object. May be anonymous. If none is passed,
                     anonymous is assumed
 
-    obj: The object to check access for.  A module, descriptor, location, or
-                    certain special strings (e.g. 'global')
+    obj: The object to check access for.  A module, descriptor, course overview,
+                    location, or certain special strings (e.g. 'global')
 
     action: A string specifying the action that the client is trying to perform.
 
@@ -69,6 +115,10 @@ def has_access(user, action, obj, course_key=None):
 
     Returns a bool.  It is up to the caller to actually deny access in a way
     that makes sense in context.
+
+    The results are memoized for the duration of the request, until the users,
+    enrollments or course roles change. Checks which depend on the groups of
+    the user in a user partition aren't memoized.
     """
     # Just in case user is passed in as None, make them anonymous
     if not user:
@@ -76,7 +126,7 @@ def has_access(user, action, obj, course_key=None):
 
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
-    if isinstance(obj, CourseDescriptor):
+    if isinstance(obj, (CourseDescriptor, CourseOverview)):
         return _has_access_course_desc(user, action, obj)
 
     if isinstance(obj, ErrorDescriptor):
@@ -104,10 +154,25 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+@receiver(post_save, sender=CourseEnrollmentAllowed)
+@receiver(post_delete, sender=CourseEnrollmentAllowed)
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def _clear_memoized_access(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forgets the memoized has_access checks when the users, enrollments or
+    course roles they depend on change.
+    """
+    has_access.clear()
+
+
 # ================ Implementation helpers ================================
 def _has_access_course_desc(user, action, course):
     """
-    Check if user has access to a course descriptor.
+    Check if user has access to a course descriptor or course overview.
 
     Valid actions:
 
@@ -128,6 +193,8 @@ def _has_access_course_desc(user, action, course):
 
         NOTE: this is not checking whether user is actually enrolled in the course.
         """
+        if isinstance(course, CourseOverview):
+            return _can_load_course_overview(user, course)
         # delegate to generic descriptor check to check start dates
         return _has_access_descriptor(user, 'load', course, course.id)
 
@@ -442,6 +509,34 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
     return _dispatch(checkers, action, user, descriptor)
 
 
+def _can_load_course_overview(user, overview):
+    """
+    The 'load' check of _has_access_descriptor, on the overview of a course.
+
+    Courses don't restrict the group access to themselves, so only the staff only
+    flag and the start date of the course are checked.
+    """
+    if overview.visible_to_staff_only and not _has_staff_access_to_descriptor(user, overview, overview.id):
+        return False
+
+    # If start dates are off, can always load
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, overview.id):
+        debug("Allow: DISABLE_START_DATES")
+        return True
+
+    # Check start date
+    if overview.start is not None:
+        now = datetime.now(UTC())
+        effective_start = _adjust_start_date_for_beta_testers(user, overview, course_key=overview.id)
+        if now > effective_start:
+            debug("Allow: now > effective start date")
+            return True
+        return _has_staff_access_to_descriptor(user, overview, overview.id)
+
+    debug("Allow: no start date")
+    return True
+
+
 def _has_access_xmodule(user, action, xmodule, course_key):
     """
     Check if user has access to this xmodule.
@@ -344,7 +344,7 @@ def get_courses_by_university(user, domain=None):
 
 def get_courses(user, domain=None):
     '''
-    Returns a list of courses available, sorted by course.number
+    Returns a list of the CourseOverviews of the courses available, sorted by course.number
     '''
     courses = branding.get_visible_courses()
 
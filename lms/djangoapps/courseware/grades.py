@@ -1,27 +1,32 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from itertools import islice
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.test.client import RequestFactory
+from django.utils import timezone
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, MultiUserFieldDataCache, chunks
 from student.models import anonymous_id_for_user
+from student.roles import prefetch_roles
 from util.module_utils import yield_dynamic_descriptor_descendents
 from xmodule import graders
 from xmodule.graders import Score
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import StudentModule, PersistentSubsectionGrade, PersistentCourseGrade, invalidate_persisted_grade
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
@@ -29,6 +34,389 @@ from opaque_keys import InvalidKeyError
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose stored scores are loaded together by iterate_grades_for
+GRADING_CHUNK_SIZE = 100
+
+# Grading indexes are cached per published course version, so they never go
+# stale; the timeout only bounds how long old versions linger in the cache.
+GRADING_INDEX_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+# A scorable block of a graded section, with the attributes of its descriptor
+# that grading needs, under the same names so it can stand in for the descriptor.
+IndexedBlock = namedtuple(
+    'IndexedBlock',
+    ['location', 'display_name_with_default', 'weight', 'graded', 'always_recalculate_grades', 'has_score'],
+)
+
+# A graded section. `blocks` are its scorable blocks (including itself, if it
+# has a score) in the order that walking the section yields them. If any block
+# in it has dynamic children, which blocks a student sees can only be found by
+# walking the section's descriptors, and `blocks` lists all that are possible.
+IndexedSection = namedtuple('IndexedSection', ['location', 'display_name_with_default', 'blocks', 'has_dynamic_children'])
+
+
+def build_grading_index(course):
+    """
+    Walk the descriptor tree of `course` and return its grading index: a
+    picklable dict with the key 'graded_sections', which maps each section
+    format to the list of IndexedSections of that format.
+
+    This holds everything `grade` needs to know about the structure of the
+    course, so that grading doesn't load the descriptor tree unless it has
+    to instantiate a block.
+    """
+    def index_block(descriptor):
+        """Return the IndexedBlock for `descriptor`."""
+        return IndexedBlock(
+            descriptor.location,
+            descriptor.display_name_with_default,
+            descriptor.weight,
+            descriptor.graded,
+            descriptor.always_recalculate_grades,
+            True,
+        )
+
+    graded_sections = defaultdict(list)
+    for chapter in course.get_children():
+        for section_descriptor in chapter.get_children():
+            if not section_descriptor.graded:
+                continue
+
+            # Walk the section in the same order as yield_dynamic_descriptor_descendents,
+            # but through every possible child of blocks with dynamic children.
+            descendants = []
+            stack = [section_descriptor]
+            while stack:
+                descriptor = stack.pop()
+                stack.extend(descriptor.get_children())
+                descendants.append(descriptor)
+
+            section_format = section_descriptor.format if section_descriptor.format is not None else ''
+            graded_sections[section_format].append(IndexedSection(
+                section_descriptor.location,
+                section_descriptor.display_name_with_default,
+                [index_block(descriptor) for descriptor in descendants if descriptor.has_score],
+                any(descriptor.has_dynamic_children() for descriptor in descendants),
+            ))
+
+    return {'graded_sections': dict(graded_sections)}
+
+
+def get_grading_index(course):
+    """
+    Return the grading index of `course` (see `build_grading_index`).
+
+    The index of each published version of a course is only built once, and
+    shared through the cache.
+    """
+    store = modulestore()
+    course_version = None
+    if store.get_branch_setting(course.id) == ModuleStoreEnum.Branch.published_only:
+        course_version = course_structure_version(course)
+    if course_version is None:
+        return build_grading_index(course)
+
+    cache_key = u'courseware.grading_index.{}.{}'.format(course.id, course_version)
+    index = cache.get(cache_key)
+    if index is None:
+        index = build_grading_index(course)
+        cache.set(cache_key, index, GRADING_INDEX_CACHE_TIMEOUT)
+    return index
+
+
+class StudentModuleScoresCache(object):
+    """
+    The stored StudentModule scores for a set of students on a set of
+    scorable locations, loaded with a handful of bulk queries.
+
+    This stands in for the per-section `exists()` checks and the per-problem
+    `StudentModule.objects.get` calls that `_grade` would otherwise make for
+    each student.
+    """
+    def __init__(self, course_id, students, locations, chunk_size=500):
+        """
+        Arguments:
+            course_id: the course in the context of which scores are read
+            students: the User objects to load scores for
+            locations: the usage keys of every scorable block that may be graded
+            chunk_size: the maximum number of locations in a single query
+        """
+        self.course_id = course_id
+        self.locations = frozenset(locations)
+        # student id -> {usage key: [StudentModule, ...]}. A location can have
+        # rows in more than one course (e.g. i4x locations shared by reruns),
+        # which matters for `has_module`, so no course filter is applied here.
+        self._modules = defaultdict(lambda: defaultdict(list))
+
+        student_ids = [student.id for student in students]
+        if not student_ids or not self.locations:
+            return
+
+        for location_chunk in chunks(self.locations, chunk_size):
+            student_modules = StudentModule.objects.filter(
+                student__in=student_ids,
+                module_state_key__in=location_chunk,
+            ).only('student', 'course_id', 'module_state_key', 'grade', 'max_grade')
+            for student_module in student_modules:
+                location = student_module.module_state_key.map_into_course(course_id)
+                self._modules[student_module.student_id][location].append(student_module)
+
+    def for_student(self, student):
+        """
+        Return a StudentScores view over the rows belonging to `student`.
+        """
+        return StudentScores(self.course_id, self.locations, self._modules.get(student.id, {}))
+
+
+class StudentScores(object):
+    """
+    A single student's slice of a StudentModuleScoresCache.
+    """
+    def __init__(self, course_id, locations, modules):
+        self.course_id = course_id
+        self.locations = locations
+        self._modules = modules
+
+    def __contains__(self, location):
+        """
+        Whether `location` was covered by the bulk load. Locations that
+        weren't must still be looked up in the database.
+        """
+        return location in self.locations
+
+    def has_module(self, location):
+        """
+        Whether the student has any StudentModule for `location`, in any course.
+        """
+        return bool(self._modules.get(location))
+
+    def get(self, location):
+        """
+        Return the student's StudentModule for `location` in this course, or None.
+        """
+        for student_module in self._modules.get(location, []):
+            if student_module.course_id == self.course_id:
+                return student_module
+        return None
+
+
+def scorable_locations(grading_index):
+    """
+    Return the usage keys of every block that can contribute to a grade
+    according to `grading_index`.
+    """
+    return set(
+        block.location
+        for sections in grading_index['graded_sections'].itervalues()
+        for section in sections
+        for block in section.blocks
+    )
+
+
+def course_structure_version(course):
+    """
+    Return a string identifying the version of the structure of `course`, as
+    it was loaded from the modulestore, or None if it isn't known (as in the
+    XML modulestore).
+
+    Split courses are identified by the version of their structure, and old
+    Mongo ones by the last time a block of their branch was edited, which
+    publishing updates on the published branch.
+    """
+    version_guid = getattr(course.location.course_key, 'version_guid', None)
+    if version_guid is not None:
+        return unicode(version_guid)
+    subtree_edited_on = getattr(course, 'subtree_edited_on', None)
+    return subtree_edited_on.isoformat() if subtree_edited_on else None
+
+
+class PersistedGrades(object):
+    """
+    A student's persisted subsection and course grades for the current version
+    of a course's structure.
+
+    Persistence is skipped entirely (every getter returns None) unless the
+    ENABLE_PERSISTENT_GRADES feature is on and the course structure version is
+    known.
+
+    The grades are loaded when this is created, which must be before the
+    scores they are computed from are read: a grade is only written if its row
+    wasn't invalidated since then (see `invalidate_persisted_grade`), so that a
+    grade computed from scores which changed meanwhile isn't persisted.
+    """
+    def __init__(self, student, course, course_grades=None, subsection_grades=None):
+        """
+        `course_grades` and `subsection_grades` are the student's rows for the
+        course, if the caller loaded them already (see `for_students`).
+        """
+        self.student = student
+        self.course_id = course.id
+        self.course_version = None
+        if (
+                settings.FEATURES.get('ENABLE_PERSISTENT_GRADES') and
+                student.is_authenticated() and
+                not settings.GENERATE_PROFILE_SCORES
+        ):
+            self.course_version = course_structure_version(course)
+
+        self._course_grade = None
+        self._subsection_grades = {}
+        if not self.enabled:
+            return
+        if course_grades is None:
+            course_grades = PersistentCourseGrade.objects.filter(user=student, course_id=self.course_id)
+        if subsection_grades is None:
+            subsection_grades = PersistentSubsectionGrade.objects.filter(user=student, course_id=self.course_id)
+        for course_grade in course_grades:
+            self._course_grade = course_grade
+        for subsection_grade in subsection_grades:
+            self._subsection_grades[subsection_grade.usage_key.map_into_course(self.course_id)] = subsection_grade
+
+    @classmethod
+    def for_students(cls, students, course):
+        """
+        Return a dict of the PersistedGrades of each of `students` by their id,
+        with the grades of all of them loaded in bulk.
+        """
+        course_grades = defaultdict(list)
+        subsection_grades = defaultdict(list)
+        if settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+            student_ids = [student.id for student in students]
+            for student_id_chunk in chunks(student_ids, 500):
+                for course_grade in PersistentCourseGrade.objects.filter(
+                        user__in=student_id_chunk, course_id=course.id
+                ):
+                    course_grades[course_grade.user_id].append(course_grade)
+                for subsection_grade in PersistentSubsectionGrade.objects.filter(
+                        user__in=student_id_chunk, course_id=course.id
+                ):
+                    subsection_grades[subsection_grade.user_id].append(subsection_grade)
+        return {
+            student.id: cls(student, course, course_grades[student.id], subsection_grades[student.id])
+            for student in students
+        }
+
+    @property
+    def enabled(self):
+        """
+        Whether grades can be read from and written to the database.
+        """
+        return self.course_version is not None
+
+    def _is_current(self, row):
+        """
+        Whether the persisted row was computed for the current course version.
+        """
+        return row is not None and row.course_version == self.course_version
+
+    def _write(self, model, row, key, **fields):
+        """
+        Write `fields` to the row of `model` with the fields of `key`, unless it
+        was invalidated or written by someone else since `row` (None if there
+        wasn't one) was loaded.
+        """
+        fields['course_version'] = self.course_version
+        if row is None:
+            # A row created in the meantime is kept, be it an invalidation or a
+            # concurrent grade computation
+            model.objects.get_or_create(defaults=fields, **key)
+        else:
+            model.objects.filter(pk=row.pk, generation=row.generation).update(modified=timezone.now(), **fields)
+
+    def get_gradeset(self, submissions_scores):
+        """
+        Return the persisted gradeset, or None if there isn't a current one.
+
+        `submissions_scores` are the student's current scores from the
+        submissions API, which change without going through the LMS: a
+        gradeset computed from different ones is out of date.
+        """
+        if not self.enabled or not self._is_current(self._course_grade):
+            return None
+
+        stored = json.loads(self._course_grade.gradeset)
+        if stored['submissions_scores'] != json.loads(json.dumps(submissions_scores)):
+            return None
+
+        gradeset = stored['gradeset']
+        gradeset['totaled_scores'] = {
+            section_format: [Score(*score) for score in scores]
+            for section_format, scores in gradeset['totaled_scores'].iteritems()
+        }
+        return gradeset
+
+    def set_gradeset(self, gradeset, submissions_scores):
+        """
+        Persist the gradeset computed from `submissions_scores`.
+        """
+        if not self.enabled:
+            return
+
+        self._write(
+            PersistentCourseGrade,
+            self._course_grade,
+            {'user': self.student, 'course_id': self.course_id},
+            gradeset=json.dumps({
+                'gradeset': {key: value for key, value in gradeset.iteritems() if key != 'raw_scores'},
+                'submissions_scores': submissions_scores,
+            }),
+        )
+
+    def get_subsection_scores(self, usage_key):
+        """
+        Return the persisted list of problem Scores for the subsection, or None.
+        """
+        if not self.enabled:
+            return None
+
+        subsection_grade = self._subsection_grades.get(usage_key)
+        if not self._is_current(subsection_grade):
+            return None
+        return [Score(*score) for score in json.loads(subsection_grade.scores)]
+
+    def set_subsection_scores(self, usage_key, scores):
+        """
+        Persist the list of problem Scores for the subsection.
+        """
+        if not self.enabled:
+            return
+
+        self._write(
+            PersistentSubsectionGrade,
+            self._subsection_grades.get(usage_key),
+            {'user': self.student, 'course_id': self.course_id, 'usage_key': usage_key},
+            scores=json.dumps(scores),
+        )
+
+
+def invalidate_persisted_grades(user_id, course_id, usage_key):
+    """
+    Mark as out of date the persisted grades that a new score for `usage_key`
+    makes out of date: the course grade and the grade of the enclosing
+    subsection. Other subsections keep their grades, so only this one is
+    recomputed next time.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+
+    store = modulestore()
+    location = usage_key
+    try:
+        while location is not None and location.block_type != 'sequential':
+            location = store.get_parent_location(location)
+    except ItemNotFoundError:
+        location = None
+
+    if location is not None:
+        invalidate_persisted_grade(
+            PersistentSubsectionGrade, user_id=user_id, course_id=course_id, usage_key=location
+        )
+    else:
+        # Without knowing the subsection, invalidate all of them
+        invalidate_persisted_grade(PersistentSubsectionGrade, create=False, user_id=user_id, course_id=course_id)
+    invalidate_persisted_grade(PersistentCourseGrade, user_id=user_id, course_id=course_id)
+
 
 def answer_distributions(course_key):
     """
@@ -122,16 +510,21 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, grading_index=None, student_scores=None,
+          field_data_caches=None, persisted_grades=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(
+            student, request, course, keep_raw_scores, grading_index, student_scores, field_data_caches,
+            persisted_grades
+        )
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, grading_index=None, student_scores=None,
+           field_data_caches=None, persisted_grades=None):
     """
     Unwrapped version of "grade"
 
@@ -150,11 +543,16 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    grading_index : the course's grading index, if the caller already has it
+    student_scores : a StudentScores with the student's stored scores, which
+      replaces the per-section and per-problem StudentModule queries
+    field_data_caches : a MultiUserFieldDataCache covering the student, from
+      which the FieldDataCaches of the instantiated modules are created
+    persisted_grades : the student's PersistedGrades, if the caller loaded them
+      before `student_scores`
+
     More information on the format is in the docstring for CourseGrader.
     """
-    grading_context = course.grading_context
-    raw_scores = []
-
     # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
     # scores that were registered with the submissions API, which for the moment
     # means only openassessment (edx-ora2)
@@ -162,57 +560,96 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    if persisted_grades is None:
+        persisted_grades = PersistedGrades(student, course)
+    if not keep_raw_scores:
+        grade_summary = persisted_grades.get_gradeset(submissions_scores)
+        if grade_summary is not None:
+            return grade_summary
+    # Set to False if any score can change without the LMS noticing
+    can_persist_gradeset = True
+
+    if grading_index is None:
+        grading_index = get_grading_index(course)
+    raw_scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            if field_data_caches is not None:
+                field_data_cache = field_data_caches.for_user(student, [descriptor])
+            else:
+                field_data_cache = FieldDataCache([descriptor], course.id, student)
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
+    def create_indexed_module(block):
+        '''creates an XModule instance given a descriptor or an IndexedBlock'''
+        if isinstance(block, IndexedBlock):
+            block = modulestore().get_item(block.location)
+        return create_module(block)
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
-    for section_format, sections in grading_context['graded_sections'].iteritems():
+    for section_format, sections in grading_index['graded_sections'].iteritems():
         format_scores = []
         for section in sections:
-            section_descriptor = section['section_descriptor']
-            section_name = section_descriptor.display_name_with_default
+            section_name = section.display_name_with_default
 
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
-            )
+            should_grade_section = any(block.always_recalculate_grades for block in section.blocks)
+            if should_grade_section:
+                can_persist_gradeset = False
 
             # If there are no problems that always have to be regraded, check to
             # see if any of our locations are in the scores from the submissions
             # API. If scores exist, we have to calculate grades for this section.
             if not should_grade_section:
                 should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
+                    block.location.to_deprecated_string() in submissions_scores for block in section.blocks
                 )
 
-            if not should_grade_section:
+            # Sections with scores that change outside of the LMS can't be persisted,
+            # and neither can those where which children are shown can change for a student
+            can_persist_section = not should_grade_section and not section.has_dynamic_children
+            if section.has_dynamic_children:
+                can_persist_gradeset = False
+            scores = None
+            if can_persist_section:
+                scores = persisted_grades.get_subsection_scores(section.location)
+
+            if scores is not None:
+                should_grade_section = True
+            elif not should_grade_section and student_scores is not None:
+                should_grade_section = any(student_scores.has_module(block.location) for block in section.blocks)
+            elif not should_grade_section:
                 with manual_transaction():
                     should_grade_section = StudentModule.objects.filter(
                         student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
+                        module_state_key__in=[block.location for block in section.blocks]
                     ).exists()
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
+            if should_grade_section and scores is None:
                 scores = []
 
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+                if section.has_dynamic_children:
+                    # Only the descriptors can tell which children this student sees
+                    section_descriptor = modulestore().get_item(section.location, depth=None)
+                    module_descriptors = yield_dynamic_descriptor_descendents(section_descriptor, create_module)
+                else:
+                    # Descriptors are only loaded for blocks that need to be instantiated
+                    module_descriptors = section.blocks
 
+                for module_descriptor in module_descriptors:
                     (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        course.id, student, module_descriptor, create_indexed_module,
+                        scores_cache=submissions_scores, student_scores=student_scores
                     )
                     if correct is None and total is None:
                         continue
@@ -230,6 +667,10 @@ def _grade(student, request, course, keep_raw_scores):
 
                     scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
+                if can_persist_section:
+                    persisted_grades.set_subsection_scores(section.location, scores)
+
+            if should_grade_section:
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -242,7 +683,7 @@ def _grade(student, request, course, keep_raw_scores):
             else:
                 log.info(
                     "Unable to grade a section with a total possible score of zero. " +
-                    str(section_descriptor.location)
+                    str(section.location)
                 )
 
         totaled_scores[section_format] = format_scores
@@ -256,6 +697,8 @@ def _grade(student, request, course, keep_raw_scores):
     letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
     grade_summary['grade'] = letter_grade
     grade_summary['totaled_scores'] = totaled_scores  	# make this available, eg for instructor download & debugging
+    if can_persist_gradeset:
+        persisted_grades.set_gradeset(grade_summary, submissions_scores)
     if keep_raw_scores:
         # way to get all RAW scores out to instructor
         # so grader can be double-checked
@@ -331,6 +774,7 @@ def _progress_summary(student, request, course):
             return None
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+    persisted_grades = PersistedGrades(student, course)
 
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
@@ -350,17 +794,25 @@ def _progress_summary(student, request, course):
                 graded = section_module.graded
                 scores = []
 
-                module_creator = section_module.xmodule_runtime.get_module
+                # Persisted subsection grades don't track the submissions API
+                persisted_scores = None
+                if not submissions_scores:
+                    persisted_scores = persisted_grades.get_subsection_scores(section_module.location)
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
+                if persisted_scores is not None:
+                    scores = [Score(score.earned, score.possible, graded, score.section) for score in persisted_scores]
+                else:
+                    module_creator = section_module.xmodule_runtime.get_module
 
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        course_id = course.id
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -387,7 +839,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_scores=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -401,6 +853,8 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_scores: A StudentScores holding the user's prefetched StudentModules.
+           Locations it covers are not looked up in the database.
     """
     scores_cache = scores_cache or {}
 
@@ -427,14 +881,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_scores is not None and problem_descriptor.location in student_scores:
+        student_module = student_scores.get(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -480,7 +937,7 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+def iterate_grades_for(course_id, students, chunk_size=GRADING_CHUNK_SIZE):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -497,33 +954,60 @@ def iterate_grades_for(course_id, students):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in chunks of `chunk_size`: the course's grading index
+    is looked up once, and the stored scores and the user state of each chunk
+    are loaded in bulk rather than queried student by student. Only blocks that must always be
+    recalculated, have dynamic children, or have never been scored are
+    instantiated, exactly as `grade` does.
     """
     course = courses.get_course_by_id(course_id)
+    grading_index = get_grading_index(course)
+    locations = scorable_locations(grading_index)
 
     # We make a fake request because grading code expects to be able to look at
     # the request. We have to attach the correct user to the request before
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course_id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    students = iter(students)
+    while True:
+        student_chunk = list(islice(students, chunk_size))
+        if not student_chunk:
+            break
+        # The persisted grades must be loaded before the scores they are computed from
+        persisted_grades = PersistedGrades.for_students(student_chunk, course)
+        scores_cache = StudentModuleScoresCache(course.id, student_chunk, locations)
+        field_data_caches = MultiUserFieldDataCache(course.id, student_chunk, locations)
+        # The access checks of the modules instantiated for grading look up the roles
+        # of the students in the course
+        prefetch_roles(student_chunk, course.id)
+
+        for student in student_chunk:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(
+                        student, request, course,
+                        grading_index=grading_index,
+                        student_scores=scores_cache.for_student(student),
+                        field_data_caches=field_data_caches,
+                        persisted_grades=persisted_grades[student.id],
+                    )
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course_id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
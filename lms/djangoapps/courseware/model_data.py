@@ -3,7 +3,7 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from itertools import chain
 from .models import (
     StudentModule,
@@ -16,7 +16,8 @@ from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.asides import AsideUsageKeyV1
 
-from django.db import DatabaseError
+from django.db import DatabaseError, router
+from django.db.models.signals import post_save
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -47,7 +48,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, multi_user_cache=None):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -60,10 +61,13 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
         asides: The list of aside types to load, or None to prefetch no asides.
+        multi_user_cache: A MultiUserFieldDataCache which the objects of the user are
+            taken from, for the scopes it has loaded for the descriptors
         '''
         self.cache = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
+        self.multi_user_cache = multi_user_cache
 
         if asides is None:
             self.asides = []
@@ -76,13 +80,16 @@ class FieldDataCache(object):
 
         if user.is_authenticated():
             for scope, fields in self._fields_to_cache().items():
+                if multi_user_cache is not None and multi_user_cache.has_loaded(user, scope, self._all_usage_ids):
+                    self.cache.update(multi_user_cache.field_objects(user, scope, self._all_usage_ids))
+                    continue
                 for field_object in self._retrieve_fields(scope, fields):
                     self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         select_for_update=False, asides=None):
+                                         select_for_update=False, asides=None, multi_user_cache=None):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -92,6 +99,7 @@ class FieldDataCache(object):
         descriptor_filter is a function that accepts a descriptor and return wether the StudentModule
             should be cached
         select_for_update: Flag indicating whether the rows should be locked until end of transaction
+        multi_user_cache: A MultiUserFieldDataCache to take the objects of the user from
         """
 
         def get_child_descriptors(descriptor, depth, descriptor_filter):
@@ -120,7 +128,9 @@ class FieldDataCache(object):
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
-        return FieldDataCache(descriptors, course_id, user, select_for_update, asides=asides)
+        return FieldDataCache(
+            descriptors, course_id, user, select_for_update, asides=asides, multi_user_cache=multi_user_cache
+        )
 
     def _query(self, model_class, **kwargs):
         """
@@ -303,9 +313,157 @@ class FieldDataCache(object):
 
         cache_key = self._cache_key_from_kvs_key(key)
         self.cache[cache_key] = field_object
+        if self.multi_user_cache is not None:
+            self.multi_user_cache.add(self.user, cache_key, field_object)
         return field_object
 
 
+def _save_field_object(field_object):
+    '''
+    Save a field object.
+
+    Objects which were loaded or created exist, so their row is updated without
+    first querying whether it does. If the update matches no row, because it was
+    deleted since, the row is inserted again. Other errors are raised: after a
+    deadlock or a lock wait timeout, writing again in the same transaction isn't safe.
+    '''
+    model = type(field_object)
+    if field_object.pk is None:
+        field_object.save()
+        return
+
+    values = dict(
+        (field.name, field.pre_save(field_object, False))
+        for field in model._meta.local_fields if not field.primary_key  # pylint: disable=protected-access
+    )
+    if model.objects.filter(pk=field_object.pk).update(**values) == 0:
+        field_object.save(force_insert=True)
+        return
+    # The receivers of saves, such as the history of StudentModules, apply to the update too
+    post_save.send(
+        sender=model, instance=field_object, created=False, raw=False,
+        using=router.db_for_write(model, instance=field_object),
+    )
+
+
+def _save_field_objects(field_objects):
+    '''
+    Save each of the field objects once.
+
+    field_objects: an OrderedDict mapping the field objects to the names of the
+        fields set on them
+
+    Raises KeyValueMultiSaveError, with the names of the fields which were saved,
+    if a save fails.
+    '''
+    saved_fields = []
+    for field_object, field_names in field_objects.iteritems():
+        try:
+            _save_field_object(field_object)
+            # If save is successful on this scope, add the saved fields to
+            # the list of successful saves
+            saved_fields.extend(field_names)
+        except DatabaseError:
+            log.exception('Error saving fields %r', field_names)
+            raise KeyValueMultiSaveError(saved_fields)
+
+
+class MultiUserFieldDataCache(object):
+    """
+    The user_state and user_info objects of a set of users in a course, loaded with
+    chunked bulk queries, from which the FieldDataCaches of single users are created
+    without querying those scopes again.
+
+    StudentModules are only loaded for a given set of usage keys: the FieldDataCaches
+    of other descriptors query them as usual. The objects are loaded the first time a
+    FieldDataCache is created, so building a MultiUserFieldDataCache which is never used
+    doesn't query the database.
+    """
+    def __init__(self, course_id, users, usage_keys, chunk_size=250):
+        """
+        Arguments:
+            course_id: the course in the context of which StudentModules are read
+            users: the User objects to load objects for
+            usage_keys: the usage keys of the blocks to load the StudentModules of
+            chunk_size: the maximum number of users, and of usage keys, in a single query
+        """
+        assert isinstance(course_id, CourseKey)
+        self.course_id = course_id
+        self.usage_keys = frozenset(usage_keys)
+        self.chunk_size = chunk_size
+        self._user_ids = set(user.id for user in users if user.is_authenticated())
+        # user id -> {FieldDataCache key: field object}
+        self._field_objects = None
+
+    def _load(self):
+        """
+        Query the StudentModules and the XModuleStudentInfoFields of all the users.
+        """
+        self._field_objects = defaultdict(dict)
+        for user_chunk in chunks(sorted(self._user_ids), self.chunk_size):
+            for usage_key_chunk in chunks(self.usage_keys, self.chunk_size):
+                student_modules = StudentModule.objects.filter(
+                    course_id=self.course_id,
+                    student__in=user_chunk,
+                    module_state_key__in=usage_key_chunk,
+                )
+                for student_module in student_modules:
+                    usage_key = student_module.module_state_key.map_into_course(self.course_id)
+                    self._field_objects[student_module.student_id][(Scope.user_state, usage_key)] = student_module
+
+            for info_field in XModuleStudentInfoField.objects.filter(student__in=user_chunk):
+                self._field_objects[info_field.student_id][(Scope.user_info, info_field.field_name)] = info_field
+
+    def has_loaded(self, user, scope, usage_ids):
+        """
+        Return whether all the objects of the user in the scope for the given usage ids
+        have been loaded.
+        """
+        if user.id not in self._user_ids:
+            return False
+        if scope == Scope.user_info:
+            return True
+        if scope == Scope.user_state:
+            return usage_ids <= self.usage_keys
+        return False
+
+    def field_objects(self, user, scope, usage_ids):
+        """
+        Return the objects of the user in the scope for the given usage ids, keyed like
+        in FieldDataCache.
+        """
+        if self._field_objects is None:
+            self._load()
+        return {
+            cache_key: field_object
+            for cache_key, field_object in self._field_objects[user.id].iteritems()
+            if cache_key[0] == scope and (scope != Scope.user_state or cache_key[1] in usage_ids)
+        }
+
+    def add(self, user, cache_key, field_object):
+        """
+        Add an object created by the FieldDataCache of the user, so that the
+        FieldDataCaches created afterwards find it.
+        """
+        if user.id in self._user_ids and self._field_objects is not None:
+            self._field_objects[user.id][cache_key] = field_object
+
+    def for_user(self, user, descriptors, asides=None):
+        """
+        Return a FieldDataCache of the descriptors for the user.
+        """
+        return FieldDataCache(descriptors, self.course_id, user, asides=asides, multi_user_cache=self)
+
+    def for_descriptor_descendents(self, user, descriptor, depth=None):
+        """
+        Return a FieldDataCache of the descriptor and its descendents for the user, as
+        FieldDataCache.cache_for_descriptor_descendents.
+        """
+        return FieldDataCache.cache_for_descriptor_descendents(
+            self.course_id, user, descriptor, depth, multi_user_cache=self
+        )
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -361,9 +519,8 @@ class DjangoKeyValueStore(KeyValueStore):
           xblock.KvsFieldData._key : value
 
         """
-        saved_fields = []
-        # field_objects maps a field_object to a list of associated fields
-        field_objects = dict()
+        # field_objects maps a field_object to a list of the names of its associated fields
+        field_objects = OrderedDict()
         for field in kv_dict:
             # Check field for validity
             if field.scope not in self._allowed_scopes:
@@ -371,10 +528,8 @@ class DjangoKeyValueStore(KeyValueStore):
 
             # If the field is valid and isn't already in the dictionary, add it.
             field_object = self._field_data_cache.find_or_create(field)
-            if field_object not in field_objects.keys():
-                field_objects[field_object] = []
             # Update the list of associated fields
-            field_objects[field_object].append(field)
+            field_objects.setdefault(field_object, []).append(field.field_name)
 
             # Special case when scope is for the user state, because this scope saves fields in a single row
             if field.scope == Scope.user_state:
@@ -386,16 +541,7 @@ class DjangoKeyValueStore(KeyValueStore):
                 # we don't have to worry about conflicts
                 field_object.value = json.dumps(kv_dict[field])
 
-        for field_object in field_objects:
-            try:
-                # Save the field object that we made above
-                field_object.save()
-                # If save is successful on this scope, add the saved fields to
-                # the list of successful saves
-                saved_fields.extend([field.field_name for field in field_objects[field_object]])
-            except DatabaseError:
-                log.exception('Error saving fields %r', field_objects[field_object])
-                raise KeyValueMultiSaveError(saved_fields)
+        _save_field_objects(field_objects)
 
     def delete(self, key):
         if key.scope not in self._allowed_scopes:
@@ -409,7 +555,7 @@ class DjangoKeyValueStore(KeyValueStore):
             state = json.loads(field_object.state)
             del state[key.field_name]
             field_object.state = json.dumps(state)
-            field_object.save()
+            _save_field_object(field_object)
         else:
             field_object.delete()
 
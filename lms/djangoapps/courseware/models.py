@@ -15,7 +15,8 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField
@@ -230,3 +231,106 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
+
+
+class PersistentSubsectionGrade(models.Model):
+    """
+    The problem scores a student earned in one graded subsection, as computed
+    by courseware.grades against a particular version of the course structure.
+
+    Rows whose course_version doesn't match the current course structure are
+    stale and are ignored (and eventually overwritten) by readers.
+    """
+    class Meta:
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    # The subsection (sequential) this grade is for
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+    course_version = models.CharField(max_length=255, blank=True)
+    # Bumped each time the grade is invalidated (see invalidate_persisted_grade)
+    generation = models.PositiveIntegerField(default=0)
+
+    # JSON list of [earned, possible, graded, display_name], one per scored problem
+    scores = models.TextField()
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} ({}) = {}".format(
+            self.user, self.usage_key, self.course_version, self.scores
+        )
+
+
+class PersistentCourseGrade(models.Model):
+    """
+    The gradeset courseware.grades.grade computed for a student in a course,
+    for a particular version of the course structure.
+    """
+    class Meta:
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    course_version = models.CharField(max_length=255, blank=True)
+    # Bumped each time the grade is invalidated (see invalidate_persisted_grade)
+    generation = models.PositiveIntegerField(default=0)
+
+    gradeset = models.TextField()  # grades, stored as JSON
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return u"[PersistentCourseGrade] {}: {} ({}) = {}".format(
+            self.user, self.course_id, self.course_version, self.gradeset
+        )
+
+
+def invalidate_persisted_grade(model, create=True, **key):
+    """
+    Mark the persisted grades of `model` (PersistentSubsectionGrade or
+    PersistentCourseGrade) matching the fields of `key` as out of date.
+
+    Rather than deleting the rows, this bumps their generation: a grade computed
+    from scores read before the invalidation is only written if the generation
+    of its row is still the one loaded before the scores were read, so it can't
+    overwrite the invalidation. If `create` is True and no row matches, one is
+    created for that purpose, so `key` must then identify a single row.
+    """
+    invalidated = model.objects.filter(**key).update(course_version='', generation=F('generation') + 1)
+    if invalidated or not create:
+        return
+    __, created = model.objects.get_or_create(defaults={'generation': 1}, **key)
+    if not created:
+        # Someone else created the row in the meantime
+        model.objects.filter(**key).update(course_version='', generation=F('generation') + 1)
+
+
+@receiver(post_save, sender=StudentModule)
+def invalidate_persisted_course_grade(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    The first StudentModule in a subsection makes it count as attempted, which
+    changes how the course grade is computed even without a score.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False):
+        return
+    if created:
+        invalidate_persisted_grade(PersistentCourseGrade, user_id=instance.student_id, course_id=instance.course_id)
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_persisted_grades_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Removing a StudentModule (e.g. resetting a student's attempts) bypasses the
+    score-publish path, so mark all the student's persisted grades for the
+    course as out of date.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False):
+        return
+    for model in (PersistentSubsectionGrade, PersistentCourseGrade):
+        invalidate_persisted_grade(model, create=False, user_id=instance.student_id, course_id=instance.course_id)
+    # The grade of the enclosing subsection may be computed right now, from
+    # the deleted row
+    from courseware.grades import invalidate_persisted_grades
+    invalidate_persisted_grades(
+        instance.student_id, instance.course_id, instance.module_state_key.map_into_course(instance.course_id)
+    )
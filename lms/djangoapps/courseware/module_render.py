@@ -22,6 +22,7 @@ from django.core.cache import cache
 from django.core.context_processors import csrf
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
+from django.dispatch import receiver
 from django.http import Http404, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
@@ -47,7 +48,7 @@ from xmodule.exceptions import NotFoundError, ProcessingError
 from opaque_keys.edx.keys import UsageKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.contentstore.django import contentstore
-from xmodule.modulestore.django import modulestore, ModuleI18nService
+from xmodule.modulestore.django import modulestore, ModuleI18nService, SignalHandler
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
 from xmodule_modifiers import (
@@ -59,10 +60,10 @@ from xmodule_modifiers import (
     request_token
 )
 from xmodule.lti_module import LTIModule
-from xmodule.x_module import XModuleDescriptor
+from xmodule.x_module import XModule, XModuleDescriptor, XModuleMixin
 from xblock_django.user_service import DjangoXBlockUserService
 from util.json_request import JsonResponse
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 if settings.FEATURES.get('MILESTONES_APP', False):
     from milestones import api as milestones_api
     from milestones.exceptions import InvalidMilestoneRelationshipTypeException
@@ -71,6 +72,9 @@ if settings.FEATURES.get('MILESTONES_APP', False):
 
 log = logging.getLogger(__name__)
 
+# How long the user independent part of the table of contents of a course is cached
+TOC_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
     REQUESTS_AUTH = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
@@ -154,8 +158,72 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
     None if this is not the case.
 
     field_data_cache must include data from the course module and 2 levels of its descendents
+
+    The user independent parts of the chapters and sections are cached for each
+    version of the course by _course_toc_structure, so only the access to them,
+    the content gating and the due date extensions of the user are computed for
+    each request.
     '''
 
+    with modulestore().bulk_operations(course.id):
+        structure = _course_toc_structure(course)
+        if structure is None:
+            return _toc_for_bound_course(request, course, active_chapter, active_section, field_data_cache)
+
+        user = request.user
+        if not _can_load(user, course, course.id):
+            return None
+
+        # Check to see if the course is gated on required content (such as an Entrance Exam)
+        required_content = _get_required_content(course, request.user)
+
+        chapter_descriptors = {unicode(chapter.location): chapter for chapter in course.get_children()}
+        chapters = list()
+        for chapter_structure in structure:
+            chapter = chapter_descriptors.get(chapter_structure['location'])
+            if chapter is None or not _can_load(user, chapter, course.id):
+                continue
+
+            # Only show required content, if there is required content
+            if required_content and chapter_structure['location'] not in required_content:
+                continue
+
+            # Skip the current chapter if a hide flag is tripped
+            if chapter_structure['hide_from_toc']:
+                continue
+
+            section_descriptors = {unicode(section.location): section for section in chapter.get_children()}
+            sections = list()
+            for section_structure in chapter_structure['sections']:
+                section = section_descriptors.get(section_structure['location'])
+                if section is None or not _can_load(user, section, course.id):
+                    continue
+
+                if not section_structure['hide_from_toc']:
+                    sections.append({
+                        'display_name': section_structure['display_name'],
+                        'url_name': section_structure['url_name'],
+                        'format': section_structure['format'],
+                        'due': get_extended_due_date({
+                            'due': section_structure['due'],
+                            'extended_due': _get_extended_due(user, section, field_data_cache),
+                        }),
+                        'active': (chapter_structure['url_name'] == active_chapter and
+                                   section_structure['url_name'] == active_section),
+                        'graded': section_structure['graded'],
+                    })
+            chapters.append({'display_name': chapter_structure['display_name'],
+                             'url_name': chapter_structure['url_name'],
+                             'sections': sections,
+                             'active': chapter_structure['url_name'] == active_chapter})
+        return chapters
+
+
+def _toc_for_bound_course(request, course, active_chapter, active_section, field_data_cache):
+    '''
+    Create the table of contents of toc_for_course from the modules of the
+    course bound to the user, for the courses whose structure can't be cached.
+    '''
     with modulestore().bulk_operations(course.id):
         course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
         if course_module is None:
@@ -198,6 +266,118 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
         return chapters
 
 
+def _toc_cache_key(course_key):
+    '''
+    Returns the key of the cached table of contents structure of a course.
+    '''
+    return u'courseware.toc.{}'.format(course_key)
+
+
+def _course_toc_version(course):
+    '''
+    Returns the version of the course which its table of contents structure is
+    cached for, or None if it has none, as in the XML modulestore.
+    '''
+    subtree_edited_on = getattr(course, 'subtree_edited_on', None)
+    return subtree_edited_on.isoformat() if subtree_edited_on else None
+
+
+def _course_toc_structure(course):
+    '''
+    Returns the user independent part of the table of contents of the course:
+    a list of dicts describing its chapters, each with the list of dicts
+    describing its sections, in the order in which they are displayed.
+
+    The structure is cached for each version of the course, and the cache is
+    cleared when the course is published.
+
+    Returns None if some of the chapters or sections choose the blocks they
+    display for each user, as A/B tests do.
+    '''
+    version = _course_toc_version(course)
+    cache_key = _toc_cache_key(course.id)
+    if version is not None:
+        cached = cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    structure = list()
+    for chapter in course.get_children():
+        if not _displays_itself(chapter):
+            return None
+        sections = list()
+        for section in chapter.get_children():
+            if not _displays_itself(section):
+                return None
+            sections.append({
+                'location': unicode(section.location),
+                'display_name': section.display_name_with_default,
+                'url_name': section.url_name,
+                'format': section.format if section.format is not None else '',
+                'due': section.due,
+                'graded': section.graded,
+                'hide_from_toc': section.hide_from_toc,
+            })
+        structure.append({
+            'location': unicode(chapter.location),
+            'display_name': chapter.display_name_with_default,
+            'url_name': chapter.url_name,
+            'hide_from_toc': chapter.hide_from_toc,
+            'sections': sections,
+        })
+
+    if version is not None:
+        cache.set(cache_key, (version, structure), TOC_CACHE_TIMEOUT)
+    return structure
+
+
+def _displays_itself(descriptor):
+    '''
+    Returns whether the descriptor is displayed as itself by get_display_items,
+    rather than as blocks chosen for each user.
+    '''
+    block_class = getattr(descriptor, 'module_class', descriptor.__class__)
+    displayable_items = getattr(block_class, 'displayable_items', None)
+    return getattr(displayable_items, '__func__', None) in (
+        XModuleMixin.displayable_items.__func__,
+        XModule.displayable_items.__func__,
+    )
+
+
+def _can_load(user, descriptor, course_key):
+    '''
+    Returns whether the user can load the descriptor, as checked by
+    get_module_for_descriptor_internal when binding it to the user.
+    '''
+    return not getattr(user, 'known', True) or bool(has_access(user, 'load', descriptor, course_key))
+
+
+def _get_extended_due(user, descriptor, field_data_cache):
+    '''
+    Returns the due date extension granted to the user for the descriptor, from
+    the user state in the field data cache, or None if there is none.
+    '''
+    if user.is_anonymous() or field_data_cache is None:
+        return None
+    student_module = field_data_cache.find(
+        DjangoKeyValueStore.Key(Scope.user_state, user.id, descriptor.location, 'extended_due')
+    )
+    if student_module is None or not student_module.state:
+        return None
+    extended_due = json.loads(student_module.state).get('extended_due')
+    if extended_due is None:
+        return None
+    return descriptor.fields['extended_due'].from_json(extended_due)
+
+
+@receiver(SignalHandler.course_published)
+def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    '''
+    Clears the cached table of contents structure of a course when it is published.
+    '''
+    cache.delete(_toc_cache_key(course_key))
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -452,6 +632,10 @@ def get_module_system_for_user(user, field_data_cache,
         # Save all changes to the underlying KeyValueStore
         student_module.save()
 
+        # courseware.grades imports this module, so it can't be imported at the top
+        from courseware.grades import invalidate_persisted_grades
+        invalidate_persisted_grades(user_id, course_id, descriptor.location)
+
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
 
@@ -636,7 +820,7 @@ def get_module_system_for_user(user, field_data_cache,
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
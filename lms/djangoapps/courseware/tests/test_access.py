@@ -5,11 +5,14 @@ from django.test import TestCase
 from django.core.urlresolvers import reverse
 from mock import Mock, patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xblock.core import XBlock
 
 import courseware.access as access
 from courseware.masquerade import CourseMasquerade
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
 from courseware.tests.helpers import LoginEnrollmentTestCase
+from request_cache.middleware import RequestCache
+from student.roles import CourseStaffRole
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory, CourseEnrollmentFactory
 from xmodule.course_module import (
     CATALOG_VISIBILITY_CATALOG_AND_ABOUT, CATALOG_VISIBILITY_ABOUT,
@@ -379,3 +382,42 @@ class UserRoleTestCase(TestCase):
             'student',
             access.get_user_role(self.anonymous_user, self.course_key)
         )
+
+
+class MemoizedAccessTestCase(TestCase):
+    """
+    Tests of the memoization of has_access within a request.
+    """
+    def setUp(self):
+        super(MemoizedAccessTestCase, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.user = UserFactory()
+        middleware = RequestCache()
+        middleware.process_request(Mock())
+        self.addCleanup(middleware.process_response, Mock(), Mock())
+
+    def test_memoized(self):
+        with patch('courseware.access._has_access_to_course', return_value=False) as mock_check:
+            for __ in range(3):
+                self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
+        self.assertEqual(mock_check.call_count, 1)
+
+    def test_invalidated_by_roles(self):
+        self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
+        CourseStaffRole(self.course_key).add_users(self.user)
+        self.assertTrue(access.has_access(self.user, 'staff', self.course_key))
+
+    def test_group_access_not_memoized(self):
+        block = Mock(spec=XBlock, location=self.course_key.make_usage_key('vertical', 'test'))
+        block.merged_group_access = {0: [1]}
+        self.assertIsNone(access._has_access_cache_key(self.user, 'load', block))
+        block.merged_group_access = {}
+        self.assertIsNotNone(access._has_access_cache_key(self.user, 'load', block))
+
+    def test_keyed_by_masquerade(self):
+        CourseStaffRole(self.course_key).add_users(self.user)
+        self.assertTrue(access.has_access(self.user, 'staff', self.course_key))
+        self.user.masquerade_settings = {
+            self.course_key: CourseMasquerade(self.course_key, role='student')
+        }
+        self.assertFalse(access.has_access(self.user, 'staff', self.course_key))
@@ -1,19 +1,30 @@
 """
 Test grade calculation.
 """
+import pickle
+
+from django.core.cache import cache
 from django.http import Http404
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from mock import patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from capa.tests.response_xml_factory import OptionResponseXMLFactory
+from courseware.grades import (
+    grade, iterate_grades_for, StudentModuleScoresCache, scorable_locations, PersistedGrades,
+    invalidate_persisted_grades, get_grading_index
+)
+from courseware.models import PersistentSubsectionGrade, PersistentCourseGrade
+from courseware.tests.factories import StudentModuleFactory
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.graders import Score
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, **kwargs):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -24,7 +35,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, **kwargs)
 
 
 class TestGradeIteration(ModuleStoreTestCase):
@@ -121,3 +132,219 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+class GradedCourseTestCase(ModuleStoreTestCase):
+    """
+    Base class for tests that need a graded course with some scores in it.
+    """
+    def setUp(self):
+        super(GradedCourseTestCase, self).setUp()
+
+        self.course = CourseFactory.create(
+            grading_policy={
+                "GRADER": [{
+                    "type": "Homework",
+                    "min_count": 1,
+                    "drop_count": 0,
+                    "short_label": "HW",
+                    "weight": 1.0
+                }],
+                "GRADE_CUTOFFS": {'Pass': 0.5}
+            }
+        )
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter')
+        self.sections = [
+            ItemFactory.create(
+                parent_location=chapter.location,
+                category='sequential',
+                metadata={'graded': True, 'format': 'Homework'}
+            )
+            for __ in range(2)
+        ]
+        problem_xml = OptionResponseXMLFactory().build_xml(
+            question_text='The correct answer is Correct',
+            num_inputs=1,
+            weight=1,
+            options=['Correct', 'Incorrect'],
+            correct_option='Correct'
+        )
+        self.problems = [
+            ItemFactory.create(parent_location=section.location, category='problem', data=problem_xml)
+            for section in self.sections
+            for __ in range(2)
+        ]
+        self.course = self.store.get_course(self.course.id)
+
+        self.students = [UserFactory.create() for __ in range(5)]
+        # Give each student a different mix of scored, unscored and unseen problems
+        for index, student in enumerate(self.students):
+            for problem in self.problems[:index]:
+                StudentModuleFactory.create(
+                    student=student,
+                    course_id=self.course.id,
+                    module_state_key=problem.location,
+                    grade=index % 2,
+                    max_grade=1,
+                )
+        StudentModuleFactory.create(
+            student=self.students[0],
+            course_id=self.course.id,
+            module_state_key=self.problems[-1].location,
+        )
+
+    def _grade(self, student):
+        """
+        Grade `student` through courseware.grades.grade.
+        """
+        request = RequestFactory().get('/')
+        request.user = student
+        request.session = {}
+        return grade(student, request, self.course)
+
+
+class TestBatchGrading(GradedCourseTestCase):
+    """
+    Test that grading students in chunks matches grading them one at a time.
+    """
+    def test_matches_grade(self):
+        for student, gradeset, err_msg in iterate_grades_for(self.course.id, self.students, chunk_size=2):
+            self.assertEqual(err_msg, "")
+            self.assertEqual(gradeset, self._grade(student))
+
+    def test_scores_cache(self):
+        locations = scorable_locations(get_grading_index(self.course))
+        self.assertEqual(locations, set(problem.location for problem in self.problems))
+
+        with self.assertNumQueries(1):
+            scores_cache = StudentModuleScoresCache(self.course.id, self.students, locations)
+
+        with self.assertNumQueries(0):
+            student_scores = scores_cache.for_student(self.students[2])
+            self.assertIn(self.problems[0].location, student_scores)
+            self.assertTrue(student_scores.has_module(self.problems[1].location))
+            self.assertFalse(student_scores.has_module(self.problems[2].location))
+            self.assertEqual(student_scores.get(self.problems[0].location).grade, 0)
+            self.assertIsNone(student_scores.get(self.problems[2].location))
+
+
+class TestGradingIndex(GradedCourseTestCase):
+    """
+    Test the precomputed grading index of a course.
+    """
+    def tearDown(self):
+        cache.clear()
+        super(TestGradingIndex, self).tearDown()
+
+    def test_index(self):
+        grading_index = get_grading_index(self.course)
+        sections = grading_index['graded_sections']['Homework']
+        self.assertEqual([section.location for section in sections], [section.location for section in self.sections])
+        for index, section in enumerate(sections):
+            self.assertFalse(section.has_dynamic_children)
+            self.assertEqual(
+                set(block.location for block in section.blocks),
+                set(problem.location for problem in self.problems[2 * index:2 * index + 2])
+            )
+        self.assertEqual(pickle.loads(pickle.dumps(grading_index)), grading_index)
+
+    def test_index_is_cached_per_version(self):
+        with patch('courseware.grades.build_grading_index', return_value={'graded_sections': {}}) as mock_build:
+            get_grading_index(self.course)
+            get_grading_index(self.course)
+            self.assertEqual(mock_build.call_count, 1)
+
+            # Publishing a new version of the course builds a new index
+            ItemFactory.create(parent_location=self.sections[0].location, category='problem')
+            get_grading_index(self.store.get_course(self.course.id))
+            self.assertEqual(mock_build.call_count, 2)
+
+    def test_grading_without_descriptors(self):
+        # This student has a stored score for every problem they've seen
+        student = self.students[4]
+        grading_index = get_grading_index(self.course)
+        expected = self._grade(student)
+
+        request = RequestFactory().get('/')
+        request.user = student
+        request.session = {}
+        with patch('courseware.grades.modulestore') as mock_modulestore:
+            gradeset = grade(student, request, self.course, grading_index=grading_index)
+        self.assertFalse(mock_modulestore.return_value.get_item.called)
+        self.assertEqual(gradeset, expected)
+
+
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentGrades(GradedCourseTestCase):
+    """
+    Test that computed grades are persisted and invalidated.
+    """
+    def setUp(self):
+        super(TestPersistentGrades, self).setUp()
+        self.student = self.students[3]
+
+    def test_grade_is_persisted(self):
+        gradeset = self._grade(self.student)
+        self.assertEqual(
+            PersistentSubsectionGrade.objects.filter(user=self.student, course_id=self.course.id).count(),
+            len(self.sections)
+        )
+        self.assertTrue(PersistentCourseGrade.objects.filter(user=self.student, course_id=self.course.id).exists())
+        self.assertEqual(self._grade(self.student), gradeset)
+
+    def test_persisted_subsection_scores_are_used(self):
+        self._grade(self.student)
+        persisted_grades = PersistedGrades(self.student, self.course)
+        scores = persisted_grades.get_subsection_scores(self.sections[0].location)
+        self.assertEqual([score.earned for score in scores], [1.0, 1.0])
+
+        # Scores are read from the table rather than recomputed
+        persisted_grades.set_subsection_scores(self.sections[0].location, [Score(0.0, 1.0, True, 'p')])
+        PersistentCourseGrade.objects.all().delete()
+        self.assertEqual(self._grade(self.student)['totaled_scores']['Homework'][0].earned, 0.0)
+
+    def test_score_change_invalidates(self):
+        self._grade(self.student)
+        invalidate_persisted_grades(self.student.id, self.course.id, self.problems[0].location)
+
+        persisted_grades = PersistedGrades(self.student, self.course)
+        self.assertIsNone(persisted_grades.get_gradeset({}))
+        self.assertIsNone(persisted_grades.get_subsection_scores(self.sections[0].location))
+        self.assertIsNotNone(persisted_grades.get_subsection_scores(self.sections[1].location))
+
+    def test_concurrent_score_change(self):
+        # Grades computed from scores read before a score changes aren't persisted
+        PersistentSubsectionGrade.objects.create(
+            user=self.student, course_id=self.course.id, usage_key=self.sections[1].location, scores='[]'
+        )
+        persisted_grades = PersistedGrades(self.student, self.course)
+        for section in self.sections:
+            invalidate_persisted_grades(self.student.id, self.course.id, section.location)
+        persisted_grades.set_subsection_scores(self.sections[0].location, [Score(1.0, 1.0, True, 'p')])
+        persisted_grades.set_subsection_scores(self.sections[1].location, [Score(1.0, 1.0, True, 'p')])
+        persisted_grades.set_gradeset({'totaled_scores': {}}, {})
+
+        persisted_grades = PersistedGrades(self.student, self.course)
+        self.assertIsNone(persisted_grades.get_gradeset({}))
+        for section in self.sections:
+            self.assertIsNone(persisted_grades.get_subsection_scores(section.location))
+
+    def test_stale_version_is_ignored(self):
+        self._grade(self.student)
+        PersistentSubsectionGrade.objects.update(course_version='old')
+        PersistentCourseGrade.objects.update(course_version='old')
+        persisted_grades = PersistedGrades(self.student, self.course)
+        self.assertIsNone(persisted_grades.get_gradeset({}))
+        self.assertIsNone(persisted_grades.get_subsection_scores(self.sections[0].location))
+
+    def test_submissions_scores_change(self):
+        self._grade(self.student)
+        persisted_grades = PersistedGrades(self.student, self.course)
+        self.assertIsNotNone(persisted_grades.get_gradeset({}))
+        self.assertIsNone(persisted_grades.get_gradeset({'i4x://org/course/openassessment/a': (1, 2)}))
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': False})
+    def test_disabled(self):
+        self._grade(self.student)
+        self.assertFalse(PersistentSubsectionGrade.objects.exists())
+        self.assertFalse(PersistentCourseGrade.objects.exists())
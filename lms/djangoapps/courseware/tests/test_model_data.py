@@ -6,8 +6,8 @@ from mock import Mock, patch
 from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
-from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule
+from courseware.model_data import InvalidScopeError, FieldDataCache, MultiUserFieldDataCache
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -173,11 +173,32 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         for key in kv_dict:
             self.kvs.set(key, 'test_value')
 
-        with patch('django.db.models.Model.save', side_effect=DatabaseError):
+        # Field objects which exist are saved with an update
+        with patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
             with self.assertRaises(KeyValueMultiSaveError) as exception_context:
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
+    def test_set_after_concurrent_delete(self):
+        "Test that setting a field of a StudentModule deleted since it was loaded inserts it again"
+        StudentModule.objects.all().delete()
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.assertEquals(1, StudentModule.objects.all().count())
+        self.assertEquals('new_value', json.loads(StudentModule.objects.all()[0].state)['a_field'])
+
+    def test_set_failure_not_retried(self):
+        "Test that a failed update of a StudentModule isn't retried with an insert"
+        with patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
+            with patch('django.db.models.Model.save') as mock_save:
+                self.assertRaises(KeyValueMultiSaveError, self.kvs.set, user_state_key('a_field'), 'new_value')
+        self.assertFalse(mock_save.called)
+
+    def test_set_saves_history(self):
+        "Test that updating a StudentModule records its history"
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        history = StudentModuleHistory.objects.filter(student_module=StudentModule.objects.get()).latest('id')
+        self.assertEquals('new_value', json.loads(history.state)['a_field'])
+
 
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -308,7 +329,8 @@ class StorageTestBase(object):
         for key in kv_dict:
             self.kvs.set(key, 'test value')
 
-        with patch('django.db.models.Model.save', side_effect=[None, DatabaseError]):
+        # Field objects which exist are saved with an update
+        with patch('django.db.models.query.QuerySet.update', side_effect=[1, DatabaseError]):
             with self.assertRaises(KeyValueMultiSaveError) as exception_context:
                 self.kvs.set_many(kv_dict)
 
@@ -343,3 +365,55 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestMultiUserFieldDataCache(TestCase):
+    """Tests for the FieldDataCaches of several users created from a MultiUserFieldDataCache"""
+    def setUp(self):
+        super(TestMultiUserFieldDataCache, self).setUp()
+        self.users = [UserFactory.create() for __ in range(3)]
+        for user in self.users[:2]:
+            StudentModuleFactory(student=user, state=json.dumps({'a_field': user.username}))
+        StudentInfoFactory(student=self.users[0])
+        self.descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.user_info, 'existing_field'),
+        ])
+        self.field_data_caches = MultiUserFieldDataCache(course_id, self.users, [location('usage_id')])
+
+    def kvs_for(self, user, descriptor=None):
+        """Return a DjangoKeyValueStore of the descriptor for the user"""
+        return DjangoKeyValueStore(self.field_data_caches.for_user(user, [descriptor or self.descriptor]))
+
+    def test_bulk_load(self):
+        with self.assertNumQueries(2):
+            kvs_list = [self.kvs_for(user) for user in self.users]
+
+        for user, kvs in zip(self.users[:2], kvs_list):
+            self.assertEquals(user.username, kvs.get(
+                DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+            ))
+        self.assertFalse(kvs_list[2].has(
+            DjangoKeyValueStore.Key(Scope.user_state, self.users[2].id, location('usage_id'), 'a_field')
+        ))
+        self.assertEquals('old_value', kvs_list[0].get(
+            DjangoKeyValueStore.Key(Scope.user_info, self.users[0].id, None, 'existing_field')
+        ))
+        self.assertFalse(kvs_list[1].has(
+            DjangoKeyValueStore.Key(Scope.user_info, self.users[1].id, None, 'existing_field')
+        ))
+
+    def test_created_objects_are_shared(self):
+        user = self.users[2]
+        key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+        self.kvs_for(user).set(key, 'new_value')
+        with self.assertNumQueries(0):
+            self.assertEquals('new_value', self.kvs_for(user).get(key))
+
+    def test_other_usage_keys(self):
+        self.kvs_for(self.users[0])
+        other_descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        other_descriptor.scope_ids = ScopeIds('user1', 'mock_problem', location('def_id'), location('other_usage_id'))
+        # The state of blocks which weren't loaded in bulk is queried
+        with self.assertNumQueries(1):
+            self.kvs_for(self.users[0], other_descriptor)
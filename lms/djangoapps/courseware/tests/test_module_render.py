@@ -10,6 +10,7 @@ import ddt
 from django.http import Http404, HttpResponse
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.core.cache import cache
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from django.contrib.auth.models import AnonymousUser
@@ -527,6 +528,44 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_structure_cached(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_modulestore(default_ms, setup_finds, setup_sends)
+            expected = render.toc_for_course(self.request, self.toy_course, self.chapter, None, self.field_data_cache)
+
+            # The structure of the course is not computed again for the next requests
+            with patch('courseware.module_render._displays_itself') as mock_displays_itself:
+                actual = render.toc_for_course(
+                    self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+                )
+            self.assertFalse(mock_displays_itself.called)
+        self.assertEqual(
+            [section['url_name'] for chapter in expected for section in chapter['sections']],
+            [section['url_name'] for chapter in actual for section in chapter['sections']],
+        )
+        self.assertTrue(actual[0]['sections'][1]['active'])
+
+    def test_toc_overlay_per_user(self):
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=course, category='chapter', display_name='Chapter')
+        ItemFactory.create(parent=chapter, category='sequential', display_name='Section')
+        ItemFactory.create(parent=course, category='chapter', display_name='Staff Only', visible_to_staff_only=True)
+        course = self.store.get_course(course.id, depth=2)
+
+        request = RequestFactory().get('/')
+        for user, expected_chapters in ((UserFactory(), ['Chapter']), (GlobalStaffFactory(), ['Chapter', 'Staff Only'])):
+            request.user = user
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course.id, user, course, depth=2)
+            toc = render.toc_for_course(request, course, None, None, field_data_cache)
+            self.assertEqual([chapter['display_name'] for chapter in toc], expected_chapters)
+
+        # The structure of the course is cleared when it is published
+        self.assertIsNotNone(cache.get(render._toc_cache_key(course.id)))  # pylint: disable=protected-access
+        self.store.publish(course.location, ModuleStoreEnum.UserID.test)
+        self.assertIsNone(cache.get(render._toc_cache_key(course.id)))  # pylint: disable=protected-access
+
 
 class TestHtmlModifiers(ModuleStoreTestCase):
     """
@@ -322,15 +322,32 @@ class S3ReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def retrieve_rows(self, course_id, filename):
+        """
+        Return the rows of the CSV file stored as `filename` for `course_id`,
+        with each string decoded from utf-8.
+        """
+        data = self.key_for(course_id, filename).get_contents_as_string()
+        gzip_file = GzipFile(fileobj=StringIO(data), mode="rb")
+        return [[item.decode('utf-8') for item in row] for row in csv.reader(gzip_file)]
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file stored as `filename` for `course_id`.
+        """
+        self.key_for(course_id, filename).delete()
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
-        can be plugged straight into an href
+        can be plugged straight into an href. Files in subdirectories (such as
+        partial reports) aren't listed.
         """
         course_dir = self.key_for(course_id, '')
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            if "/" not in key.key[len(course_dir.key):]
         ]
 
 
@@ -381,7 +398,7 @@ class LocalFSReportStore(ReportStore):
         full_path = self.path_to(course_id, filename)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -397,18 +414,39 @@ class LocalFSReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def retrieve_rows(self, course_id, filename):
+        """
+        Return the rows of the CSV file stored as `filename` for `course_id`,
+        with each string decoded from utf-8.
+        """
+        with open(self.path_to(course_id, filename), "rb") as f:
+            return [[item.decode('utf-8') for item in row] for row in csv.reader(f)]
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file stored as `filename` for `course_id`.
+        """
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
         can be plugged straight into an href. Note that `LocalFSReportStore`
         will generate `file://` type URLs, so you'll need to copy the URL and
         open it in a new browser window. Again, this class is only meant for
-        local development.
+        local development. Files in subdirectories (such as partial reports)
+        aren't listed.
         """
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if os.path.isfile(os.path.join(course_dir, filename))
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
@@ -276,7 +276,8 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     return task_progress
 
 
-def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querysets, item_fields, items_per_task):
+def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querysets, item_fields, items_per_task,
+                             extra_subtask_ids=()):
     """
     Generates and queues subtasks to each execute a chunk of "items" generated by a queryset.
 
@@ -290,6 +291,8 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
         `item_fields` : the fields that should be included in the dict that is returned.
             These are in addition to the 'pk' field.
         `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
+        `extra_subtask_ids` : ids of subtasks that aren't created here, but that must also complete
+            before the InstructorTask is done (e.g. a final step run once the others finish).
 
     Returns:  the task progress as stored in the InstructorTask object.
 
@@ -309,7 +312,7 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
         total_num_subtasks,
         total_num_items,
     )  # pylint: disable=no-member
-    progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list)
+    progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list + list(extra_subtask_ids))
 
     # Construct a generator that will return the recipients to use for each subtask.
     # Pass in the desired fields to fetch for each recipient.
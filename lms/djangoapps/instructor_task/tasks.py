@@ -31,6 +31,7 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    upload_grades_csv_chunk,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -140,10 +141,19 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, subtask=calculate_grades_csv_chunk)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_chunk(entry_id, user_ids, merge_subtask_id, subtask_status_dict):
+    """
+    Grade one chunk of the students of a course for a grade report that
+    `calculate_grades_csv` fanned out to subtasks.
+    """
+    return upload_grades_csv_chunk(entry_id, user_ids, merge_subtask_id, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -6,11 +6,13 @@ running state of a course.
 import json
 from datetime import datetime
 from time import time
+from uuid import uuid4
 import unicodecsv
 import logging
 
 from celery import Task, current_task
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, READY_STATES
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
@@ -30,6 +32,13 @@ from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    DuplicateTaskException,
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -340,7 +349,7 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
+    for module_to_update in modules_to_update.select_related('student'):
         task_progress.attempted += 1
         module_descriptor = problems[unicode(module_to_update.module_state_key)]
         # There is no try here:  if there's an error, we let it throw, and the task will
@@ -388,16 +397,20 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, select_for_update=False):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    With `select_for_update`, the state of the student is locked until the end of the transaction.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+        course_id, student, module_descriptor, select_for_update=select_for_update
+    )
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -430,7 +443,7 @@ def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule
     )
 
 
-@transaction.autocommit
+@transaction.commit_on_success
 def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
@@ -447,7 +460,12 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    # The state is reloaded and locked, so that it isn't overwritten with the state
+    # the student had when the task started, or concurrently changed by the student.
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        select_for_update=True
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -548,7 +566,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def upload_grades_csv(_xmodule_instance_args, entry_id, course_id, _task_input, action_name, subtask=None):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -557,17 +575,52 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If `subtask` is given and more than settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    students are enrolled, the grading is instead fanned out to `subtask`s
+    that each grade a chunk of the students (see `upload_grades_csv_chunk`).
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    num_enrolled = enrolled_students.count()
+
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    if subtask is not None and students_per_task and num_enrolled > students_per_task:
+        return _queue_grade_report_subtasks(entry_id, action_name, subtask, enrolled_students, students_per_task)
 
+    task_progress = TaskProgress(action_name, num_enrolled, start_time)
     course = get_course_by_id(course_id)
+    rows, err_rows = _compute_grade_report_rows(course, enrolled_students, task_progress)
+
+    # By this point, we've got the rows we're going to stuff into our CSV files.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+
+    # Perform the actual upload
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _compute_grade_report_rows(course, students, task_progress):
+    """
+    Grade `students` in `course`, counting each of them in `task_progress`.
+
+    Returns a tuple of `(rows, err_rows)`: the rows of the grade report, which
+    start with a header row if any student could be graded, and the rows of
+    the error report, which always start with a header row.
+    """
+    course_id = course.id
+    status_interval = 100
     cohorts_header = ['Cohort Name'] if course.is_cohorted else []
 
     experiment_partitions = get_split_user_partitions(course.user_partitions)
@@ -578,7 +631,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     rows = []
     err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -625,19 +678,165 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
+    return rows, err_rows
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+def _partial_report_filename(csv_name, subtask_id):
+    """
+    Return the ReportStore filename of the part of a report produced by a subtask.
 
-    # One last update before we close out...
-    return task_progress.update_task_state(extra_meta=current_step)
+    Partial reports live in a subdirectory, so they aren't listed as downloads.
+    """
+    return u"partial/{csv_name}_{subtask_id}.csv".format(csv_name=csv_name, subtask_id=subtask_id)
+
+
+def _queue_grade_report_subtasks(entry_id, action_name, subtask, enrolled_students, students_per_task):
+    """
+    Queue a `subtask` for each chunk of `students_per_task` enrolled students,
+    plus an id for the final step that merges their partial reports.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As for bulk email, a parent task that gets requeued must not create a
+    # second raft of subtasks.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already been processed!  InstructorTask = %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    # The merge doesn't get a celery task of its own: it's run by whichever
+    # chunk subtask finishes last, and reported under this id.
+    merge_subtask_id = str(uuid4())
+
+    def _create_grade_report_subtask(item_list, initial_subtask_status):
+        """Creates a subtask to grade a given list of students."""
+        return subtask.subtask(
+            (
+                entry_id,
+                [item['pk'] for item in item_list],
+                merge_subtask_id,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students.order_by('id')],
+        [],
+        students_per_task,
+        extra_subtask_ids=[merge_subtask_id],
+    )
+
+
+def upload_grades_csv_chunk(entry_id, user_ids, merge_subtask_id, subtask_status_dict):
+    """
+    Grade one chunk of the students of a grade report fanned out by
+    `upload_grades_csv`, and store their rows as partial reports. The subtask
+    that finishes the last chunk merges the partials into the final reports.
+
+    Returns the subtask's status as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Raises DuplicateTaskException if this chunk was already (or is being) graded.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    try:
+        action_name = json.loads(entry.task_output)['action_name']
+        task_progress = TaskProgress(action_name, len(user_ids), time())
+        course = get_course_by_id(course_id)
+        students = User.objects.filter(id__in=user_ids).order_by('id')
+        rows, err_rows = _compute_grade_report_rows(course, students, task_progress)
+
+        report_store = ReportStore.from_config()
+        report_store.store_rows(course_id, _partial_report_filename('grade_report', current_task_id), rows)
+        report_store.store_rows(course_id, _partial_report_filename('grade_report_err', current_task_id), err_rows)
+        subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    except Exception:  # pylint: disable=broad-except
+        # We don't know how far we got, so count the whole chunk as failed.
+        TASK_LOG.exception(u"Grade report subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id)
+        subtask_status.increment(failed=len(user_ids), state=FAILURE)
+
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    _merge_grade_report_if_complete(entry_id, merge_subtask_id)
+    return subtask_status.to_dict()
+
+
+def _merge_grade_report_if_complete(entry_id, merge_subtask_id):
+    """
+    If every chunk of the grade report has been graded, merge their partial
+    reports and record the status of the merge step.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_status_info = json.loads(entry.subtasks)['status']
+    chunk_statuses = [
+        SubtaskStatus.from_dict(status)
+        for subtask_id, status in subtask_status_info.iteritems()
+        if subtask_id != merge_subtask_id
+    ]
+    if any(status.state not in READY_STATES for status in chunk_statuses):
+        return
+
+    merge_status = SubtaskStatus.from_dict(subtask_status_info[merge_subtask_id])
+    try:
+        check_subtask_is_valid(entry_id, merge_subtask_id, merge_status)
+    except DuplicateTaskException:
+        # Another chunk finished at the same time, and is doing the merge.
+        return
+
+    try:
+        _merge_grade_report(
+            entry, [status.task_id for status in chunk_statuses if status.state == SUCCESS]
+        )
+        merge_status.increment(state=SUCCESS)
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Merging the grade report for instructor task %d failed!", entry_id)
+        merge_status.increment(state=FAILURE)
+
+    update_subtask_status(entry_id, merge_subtask_id, merge_status)
+
+
+def _merge_grade_report(entry, subtask_ids):
+    """
+    Stitch the partial reports written by `subtask_ids` into the final grade
+    report (and error report) for the course of `entry`, and delete them.
+    """
+    course_id = entry.course_id
+    report_store = ReportStore.from_config()
+
+    header = None
+    rows = []
+    err_rows = []
+    for subtask_id in subtask_ids:
+        # All chunks are graded against the same course, so their headers match.
+        partial_rows = report_store.retrieve_rows(course_id, _partial_report_filename('grade_report', subtask_id))
+        if partial_rows:
+            header = partial_rows[0]
+            rows.extend(partial_rows[1:])
+        partial_err_rows = report_store.retrieve_rows(
+            course_id, _partial_report_filename('grade_report_err', subtask_id)
+        )
+        err_rows.extend(partial_err_rows[1:])
+
+    # Rows are keyed by student id, which is how the chunks were split.
+    rows.sort(key=lambda row: int(row[0]))
+    err_rows.sort(key=lambda row: int(row[0]))
+
+    upload_csv_to_report_store(([header] if header else []) + rows, 'grade_report', course_id, entry.created)
+    if err_rows:
+        upload_csv_to_report_store(
+            [["id", "username", "error_msg"]] + err_rows, 'grade_report_err', course_id, entry.created
+        )
+
+    for subtask_id in subtask_ids:
+        report_store.delete(course_id, _partial_report_filename('grade_report', subtask_id))
+        report_store.delete(course_id, _partial_report_filename('grade_report_err', subtask_id))
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -4,6 +4,7 @@ Tests for instructor_task/models.py.
 
 from cStringIO import StringIO
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -93,6 +94,28 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_partial_reports(self):
+        """
+        Test that files stored in a subdirectory can be read back and deleted,
+        but aren't listed as downloads.
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', [['id', 'name'], [1, u'ni\xf1o']])
+        report_store.store_rows(self.course_id, 'partial/report_1.csv', [['id', 'name'], [2, u'student']])
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        self.assertEqual(
+            report_store.retrieve_rows(self.course_id, 'partial/report_1.csv'),
+            [[u'id', u'name'], [u'2', u'student']]
+        )
+        self.assertEqual(
+            report_store.retrieve_rows(self.course_id, 'report.csv'),
+            [[u'id', u'name'], [u'1', u'ni\xf1o']]
+        )
+
+        report_store.delete(self.course_id, 'partial/report_1.csv')
+        self.assertFalse(os.path.exists(report_store.path_to(self.course_id, 'partial/report_1.csv')))
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -7,10 +7,15 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
+import os
 from mock import Mock, patch
 import tempfile
 import unicodecsv
 
+from celery.states import SUCCESS
+from django.test.utils import override_settings
+
 from xmodule.modulestore.tests.factories import CourseFactory
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
@@ -20,8 +25,10 @@ from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitio
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 import openedx.core.djangoapps.user_api.api.course_tag as course_tag_api
 from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import calculate_grades_csv_chunk
 from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin
 
 
@@ -257,6 +264,37 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         result = upload_grades_csv(None, None, self.course.id, None, 'graded')
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grading_in_subtasks(self, _mock_current_task):
+        """
+        Test that a grade report for more students than fit in one subtask is
+        graded in chunks, and merged into a single report.
+        """
+        students = [self.create_student('student{}'.format(i)) for i in range(5)]
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course')
+
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded', subtask=calculate_grades_csv_chunk)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        # Three chunks of students, plus the merge.
+        self.assertEqual(json.loads(entry.subtasks)['total'], 4)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output)
+        )
+
+        report_store = ReportStore.from_config()
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            self.assertEqual(
+                [row['username'] for row in unicodecsv.DictReader(csv_file)],
+                [student.username for student in students]
+            )
+        # The partial reports of the subtasks have been cleaned up.
+        self.assertEqual(os.listdir(report_store.path_to(self.course.id, 'partial')), [])
+
 
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
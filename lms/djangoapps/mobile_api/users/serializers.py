@@ -4,12 +4,11 @@ Serializer for user API
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
-from courseware.courses import course_image_url
 from student.models import CourseEnrollment, User
 
 
 class CourseField(serializers.RelatedField):
-    """Custom field to wrap a CourseDescriptor object. Read-only."""
+    """Custom field to wrap a CourseOverview object. Read-only."""
 
     def to_native(self, course):
         course_id = unicode(course.id)
@@ -48,7 +47,7 @@ class CourseField(serializers.RelatedField):
             "org": course.display_org_with_default,
             "start": course.start,
             "end": course.end,
-            "course_image": course_image_url(course),
+            "course_image": course.course_image_url,
             "latest_updates": {
                 "video": None
             },
@@ -63,7 +62,7 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
     """
     Serializes CourseEnrollment models
     """
-    course = CourseField()
+    course = CourseField(source='course_overview')
 
     class Meta:  # pylint: disable=missing-docstring
         model = CourseEnrollment
@@ -347,6 +347,12 @@ FEATURES = {
 
     # Courseware search feature
     'ENABLE_COURSEWARE_SEARCH': False,
+
+    # Persist computed subsection and course grades, and reuse them until a
+    # score changes or a new version of the course is published. Grades aren't
+    # invalidated while it is off, so empty the persistent grade tables before
+    # turning it back on.
+    'ENABLE_PERSISTENT_GRADES': False,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -553,6 +559,18 @@ TRACKING_BACKENDS = {
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat', r'^/segmentio/event']
 
+# Set ENABLED to send tracking events to the TRACKING_BACKENDS from worker
+# threads, rather than on the request thread.  MAX_EVENT_AGES are the seconds,
+# by backend name, after which an event still waiting in the queue is dropped
+# rather than sent.  They don't bound the time a backend takes to send an
+# event: a send which hangs stalls its worker thread.
+TRACKING_ASYNC_DISPATCH = {
+    'ENABLED': False,
+    'WORKERS_PER_BACKEND': 1,
+    'MAX_QUEUE_SIZE': 10000,
+    'MAX_EVENT_AGES': {},
+}
+
 EVENT_TRACKING_ENABLED = True
 EVENT_TRACKING_BACKENDS = {
     'logger': {
@@ -624,6 +642,13 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+# Assets too large to cache in memcache are cached on local disk by
+# contentserver.middleware.StaticContentServer: in the ROOT directory, using
+# at most MAX_SIZE bytes.  The disk cache is off if ROOT is None.
+STATIC_CONTENT_DISK_CACHE = {
+    'ROOT': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -671,6 +696,19 @@ MODULESTORE = {
     }
 }
 
+# Course structures of the split modulestore never change once written, so each
+# process caches them by version, and shares them through the 'split_structures'
+# cache if there is one.
+SPLIT_STRUCTURE_CACHE = {
+    'ENABLED': True,
+    # Bytes of compressed structures kept in the memory of each process.
+    'MAX_LOCAL_SIZE': 64 * 1024 * 1024,
+    # Lifetime of the structures in the 'split_structures' cache, None for its default.
+    'TIMEOUT': None,
+    # Load the published structure of a course into the caches when it is published.
+    'PREWARM_ON_PUBLISH': True,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -696,6 +734,20 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# Caching of the results of the code of problems, which is stored in the
+# 'safe_exec' cache if there is one, else in the default cache.
+SAFE_EXEC_CACHE = {
+    # Results larger than this many bytes of JSON aren't cached.
+    'MAX_ENTRY_SIZE': 100 * 1024,
+    # Lifetime of the cached results, None for the default of the cache.
+    'TIMEOUT': None,
+    # Run the code of the problems of a course for all their seeds when it is
+    # published, so that students never wait for the sandbox.
+    'PREWARM_ON_PUBLISH': False,
+    # Never run the code of a problem for more than this many seeds when prewarming.
+    'PREWARM_MAX_SEEDS': 1000,
+}
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1471,6 +1523,15 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Maximum number of email connections which each worker keeps open between
+# bulk email tasks, for the next tasks to reuse.
+BULK_EMAIL_CONNECTION_POOL_SIZE = 4
+
+# Maximum number of bulk emails sent during any second by all the workers
+# together, as counted in the default cache.  Set it to the rate the email
+# provider allows, or to None not to limit the rate.
+BULK_EMAIL_MAX_SEND_RATE = None
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1635,6 +1696,7 @@ INSTALLED_APPS = (
     'lms.djangoapps.lms_xblock',
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
     'course_structure_api',
 )
 
@@ -1731,6 +1793,11 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Grade reports for courses with more students than this are graded in
+# parallel by subtasks of this many students each.  Set to None to always
+# grade in a single task.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 1000
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
@@ -2025,6 +2092,10 @@ API_DATE_FORMAT = '%Y-%m-%d'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# Seconds for which the course roles of each user are shared between requests through
+# the default cache, or 0 to load them from the database in every request.
+ROLE_CACHE_TIMEOUT = 0
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
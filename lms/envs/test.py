@@ -156,6 +156,10 @@ update_module_store_settings(
     },
 )
 
+# Tests count the queries made to Mongo, which the structure cache would make
+# depend on the tests run before.
+SPLIT_STRUCTURE_CACHE['ENABLED'] = False
+
 CONTENTSTORE = {
     'ENGINE': 'xmodule.contentstore.mongo.MongoContentStore',
     'DOC_STORE_CONFIG': {
@@ -298,6 +302,9 @@ CELERY_ALWAYS_EAGER = True
 CELERY_RESULT_BACKEND = 'cache'
 BROKER_TRANSPORT = 'memory'
 
+# Don't keep the email connections of a test open for the next ones
+BULK_EMAIL_CONNECTION_POOL_SIZE = 0
+
 ######################### MARKETING SITE ###############################
 
 MKTG_URL_LINK_MAP = {
@@ -0,0 +1,285 @@
+"""
+Declaration of CourseOverview model
+"""
+import json
+import logging
+
+from django.db import models, transaction
+from django.db.utils import IntegrityError
+from django.dispatch import receiver
+from django.utils.translation import ugettext
+from model_utils.models import TimeStampedModel
+
+from util.date_utils import strftime_localized
+from xmodule import course_metadata_utils
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore, SignalHandler
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+
+log = logging.getLogger(__name__)
+
+
+class CourseOverview(TimeStampedModel):
+    """
+    Model for storing and caching basic information about a course.
+
+    This model contains the course metadata needed to display a course on the
+    student dashboard, in the course catalog and in the enrollment APIs, and to
+    check course level access to it, without loading the course from the
+    modulestore. It provides the attributes and methods of CourseDescriptor
+    which those pages use, so it can be used in their place.
+
+    Overviews are created from the modulestore the first time they are needed,
+    and deleted whenever their course is published, so that they are created
+    again from the new version of the course.
+    """
+    # Course identification
+    id = CourseKeyField(db_index=True, primary_key=True, max_length=255)  # pylint: disable=invalid-name
+    location = UsageKeyField(max_length=255)
+    display_name = models.TextField(null=True)
+    display_name_with_default = models.TextField()
+    display_number_with_default = models.TextField()
+    display_org_with_default = models.TextField()
+
+    # Dates
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.TextField(null=True)
+    announcement = models.DateTimeField(null=True)
+    is_new = models.NullBooleanField()
+
+    # Assets
+    course_image_url = models.TextField()
+    static_asset_path = models.TextField(blank=True)
+
+    # Visibility and enrollment
+    visible_to_staff_only = models.BooleanField(default=False)
+    days_early_for_beta = models.FloatField(null=True)
+    mobile_available = models.BooleanField(default=False)
+    catalog_visibility = models.TextField(null=True)
+    ispublic = models.NullBooleanField()
+    invitation_only = models.BooleanField(default=False)
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    enrollment_domain = models.TextField(null=True)
+    pre_requisite_courses_json = models.TextField(default='[]')
+
+    # Certificates
+    cert_name_short = models.TextField()
+    cert_name_long = models.TextField()
+    certificates_display_behavior = models.TextField(null=True)
+    certificates_show_before_end = models.BooleanField(default=False)
+    lowest_passing_grade = models.FloatField(null=True)
+    end_of_course_survey_url = models.TextField(null=True)
+
+    @classmethod
+    def _create_from_course(cls, course):
+        """
+        Creates (but does not save) a CourseOverview object from the given
+        CourseDescriptor.
+        """
+        # Imported here because courseware imports the modules of the LMS
+        # which use this model.
+        from courseware.courses import course_image_url
+
+        try:
+            lowest_passing_grade = course.lowest_passing_grade
+        except ValueError:
+            # The grade cutoffs of the course are empty
+            lowest_passing_grade = None
+
+        return cls(
+            id=course.id,
+            location=course.location,
+            display_name=course.display_name,
+            display_name_with_default=course.display_name_with_default,
+            display_number_with_default=course.display_number_with_default,
+            display_org_with_default=course.display_org_with_default,
+
+            start=course.start,
+            end=course.end,
+            advertised_start=course.advertised_start,
+            announcement=course.announcement,
+            is_new=None if course.is_new is None else course_metadata_utils.course_is_newish(
+                course.is_new, course.announcement, course.advertised_start, course.start
+            ),
+
+            course_image_url=course_image_url(course),
+            static_asset_path=course.static_asset_path,
+
+            visible_to_staff_only=course.visible_to_staff_only,
+            days_early_for_beta=course.days_early_for_beta,
+            mobile_available=course.mobile_available,
+            catalog_visibility=course.catalog_visibility,
+            ispublic=getattr(course, 'ispublic', None),
+            invitation_only=course.invitation_only,
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            enrollment_domain=course.enrollment_domain,
+            pre_requisite_courses_json=json.dumps(course.pre_requisite_courses),
+
+            cert_name_short=course.cert_name_short,
+            cert_name_long=course.cert_name_long,
+            certificates_display_behavior=course.certificates_display_behavior,
+            certificates_show_before_end=course.certificates_show_before_end,
+            lowest_passing_grade=lowest_passing_grade,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+        )
+
+    @classmethod
+    def _load_from_module_store(cls, course_id):
+        """
+        Loads the course with the given ID from the modulestore, and returns a
+        CourseOverview of it, or None if the course doesn't exist or failed to
+        load.
+
+        The overview is saved, unless the course comes from the XML modulestore,
+        which doesn't signal when its courses change.
+        """
+        store = modulestore()
+        with store.bulk_operations(course_id):
+            course = store.get_course(course_id)
+            if not isinstance(course, CourseDescriptor):
+                return None
+
+            overview = cls._create_from_course(course)
+            if store.get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+                # The savepoint keeps the transaction of the request usable when
+                # another request saved the overview of this course first
+                sid = transaction.savepoint()
+                try:
+                    overview.save()
+                    transaction.savepoint_commit(sid)
+                except IntegrityError:
+                    transaction.savepoint_rollback(sid)
+                    log.info(u"CourseOverview of %s was saved concurrently", course_id)
+            return overview
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        Returns the CourseOverview of the course with the given ID, loading the
+        course from the modulestore if there is no overview of it yet.
+
+        Returns None if the course doesn't exist or failed to load.
+        """
+        try:
+            return cls.objects.get(id=course_id)
+        except cls.DoesNotExist:
+            return cls._load_from_module_store(course_id)
+
+    @classmethod
+    def get_select_courses(cls, course_ids):
+        """
+        Returns a dict of the CourseOverviews of the courses with the given IDs,
+        keyed by course ID, with a single query for all the courses which
+        already have an overview.
+
+        The courses which don't exist or failed to load are missing from the
+        dict.
+        """
+        course_ids = set(course_ids)
+        overviews = {
+            overview.id: overview
+            for overview in cls.objects.filter(id__in=course_ids)
+        } if course_ids else {}
+        for course_id in course_ids.difference(overviews):
+            overview = cls._load_from_module_store(course_id)
+            if overview is not None:
+                overviews[course_id] = overview
+        return overviews
+
+    @property
+    def number(self):
+        """
+        Returns the course number of the course, as in its location.
+        """
+        return self.location.course
+
+    @property
+    def org(self):
+        """
+        Returns the organization of the course, as in its location.
+        """
+        return self.location.org
+
+    @property
+    def pre_requisite_courses(self):
+        """
+        Returns the IDs of the pre-requisite courses of the course.
+        """
+        return json.loads(self.pre_requisite_courses_json)
+
+    def has_started(self):
+        """
+        Returns whether the course has started.
+        """
+        return course_metadata_utils.has_course_started(self.start)
+
+    def has_ended(self):
+        """
+        Returns whether the course has ended.
+        """
+        return course_metadata_utils.has_course_ended(self.end)
+
+    def may_certify(self):
+        """
+        Returns whether it is acceptable to show the student a certificate
+        download link.
+        """
+        return course_metadata_utils.may_certify_for_course(
+            self.certificates_display_behavior,
+            self.certificates_show_before_end,
+            self.has_ended()
+        )
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Returns whether the start date of the course is still the default.
+        """
+        return course_metadata_utils.course_start_date_is_default(self.start, self.advertised_start)
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the text of the start date of the course, preferring its
+        advertised start date.
+        """
+        return course_metadata_utils.course_start_datetime_text(
+            self.start, self.advertised_start, format_string, ugettext, strftime_localized
+        )
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the text of the end date of the course, or an empty string if
+        it has none.
+        """
+        return course_metadata_utils.course_end_datetime_text(self.end, format_string, strftime_localized)
+
+    @property
+    def is_newish(self):
+        """
+        Returns whether the course has been flagged as new, or otherwise looks
+        new from its announcement and start dates.
+        """
+        return course_metadata_utils.course_is_newish(
+            self.is_new, self.announcement, self.advertised_start, self.start
+        )
+
+    @property
+    def sorting_score(self):
+        """
+        Returns a number to sort courses by how new they are, lowest first.
+        """
+        return course_metadata_utils.course_sorting_score(self.announcement, self.advertised_start, self.start)
+
+
+@receiver(SignalHandler.course_published)
+def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deletes the overview of a course when it is published, so that it is
+    created again from the new version of the course when it is next needed.
+    """
+    CourseOverview.objects.filter(id=course_key).delete()
@@ -0,0 +1,165 @@
+"""
+Tests for course_overviews app.
+"""
+import datetime
+
+import ddt
+from django.contrib.auth.models import AnonymousUser
+from django.db.utils import IntegrityError
+from mock import patch
+from pytz import UTC
+
+from courseware.access import has_access
+from courseware.courses import course_image_url
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+@ddt.ddt
+class CourseOverviewTestCase(ModuleStoreTestCase):
+    """
+    Tests for CourseOverview model.
+    """
+    NEXT_WEEK = datetime.datetime.now(UTC) + datetime.timedelta(days=7)
+    LAST_WEEK = datetime.datetime.now(UTC) - datetime.timedelta(days=7)
+
+    def check_course_overview_against_course(self, course):
+        """
+        Compares the CourseOverview of the given course against the course itself.
+        """
+        overview = CourseOverview.get_from_id(course.id)
+
+        fields_to_test = [
+            'id',
+            'display_name',
+            'display_name_with_default',
+            'display_number_with_default',
+            'display_org_with_default',
+            'number',
+            'org',
+            'start',
+            'end',
+            'advertised_start',
+            'start_date_is_still_default',
+            'mobile_available',
+            'visible_to_staff_only',
+            'days_early_for_beta',
+            'catalog_visibility',
+            'invitation_only',
+            'enrollment_start',
+            'enrollment_end',
+            'pre_requisite_courses',
+            'cert_name_short',
+            'cert_name_long',
+            'certificates_display_behavior',
+            'certificates_show_before_end',
+            'lowest_passing_grade',
+            'end_of_course_survey_url',
+            'is_newish',
+        ]
+        for attribute_name in fields_to_test:
+            self.assertEqual(getattr(course, attribute_name), getattr(overview, attribute_name), attribute_name)
+
+        methods_to_test = [
+            ('has_started', ()),
+            ('has_ended', ()),
+            ('may_certify', ()),
+            ('start_datetime_text', ('SHORT_DATE',)),
+            ('start_datetime_text', ('DATE_TIME',)),
+            ('end_datetime_text', ('SHORT_DATE',)),
+            ('end_datetime_text', ('DATE_TIME',)),
+        ]
+        for method_name, args in methods_to_test:
+            self.assertEqual(
+                getattr(course, method_name)(*args),
+                getattr(overview, method_name)(*args),
+                method_name
+            )
+
+        self.assertEqual(course_image_url(course), overview.course_image_url)
+
+        for action in ('load', 'see_exists', 'see_in_catalog', 'see_about_page', 'enroll', 'staff'):
+            self.assertEqual(
+                bool(has_access(AnonymousUser(), action, course)),
+                bool(has_access(AnonymousUser(), action, overview)),
+                action
+            )
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_course_overview_matches_course(self, modulestore_type):
+        course_infos = [
+            {
+                'display_name': 'Test Course',
+            },
+            {
+                'display_name': 'Started Course',
+                'start': self.LAST_WEEK,
+                'end': self.NEXT_WEEK,
+                'advertised_start': 'Spring 2015',
+                'mobile_available': True,
+                'certificates_show_before_end': True,
+                'catalog_visibility': 'about',
+            },
+            {
+                'display_name': 'Ended Course <with> brackets',
+                'start': self.LAST_WEEK - datetime.timedelta(days=30),
+                'end': self.LAST_WEEK,
+                'days_early_for_beta': 10,
+                'visible_to_staff_only': True,
+                'invitation_only': True,
+                'cert_name_short': 'Cert',
+                'certificates_display_behavior': 'early_no_info',
+                'end_of_course_survey_url': 'http://example.com/survey',
+            },
+        ]
+        for course_info in course_infos:
+            course = CourseFactory.create(default_store=modulestore_type, **course_info)
+            self.check_course_overview_against_course(course)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_course_overview_caching(self, modulestore_type):
+        course = CourseFactory.create(default_store=modulestore_type)
+        self.assertFalse(CourseOverview.objects.filter(id=course.id).exists())
+
+        CourseOverview.get_from_id(course.id)
+        self.assertTrue(CourseOverview.objects.filter(id=course.id).exists())
+
+        # The saved overview is used instead of the modulestore
+        with patch.object(CourseOverview, '_load_from_module_store') as mock_load:
+            overview = CourseOverview.get_from_id(course.id)
+        self.assertFalse(mock_load.called)
+        self.assertEqual(overview.display_name, course.display_name)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_course_overview_deleted_on_publish(self, modulestore_type):
+        course = CourseFactory.create(default_store=modulestore_type, display_name='Original Name')
+        CourseOverview.get_from_id(course.id)
+
+        course.display_name = 'Updated Name'
+        self.update_course(course, ModuleStoreEnum.UserID.test)
+        self.assertFalse(CourseOverview.objects.filter(id=course.id).exists())
+        self.assertEqual(CourseOverview.get_from_id(course.id).display_name, 'Updated Name')
+
+    def test_course_overview_saved_concurrently(self):
+        course = CourseFactory.create(display_name='Course Name')
+        with patch.object(CourseOverview, 'save', side_effect=IntegrityError):
+            overview = CourseOverview.get_from_id(course.id)
+        self.assertEqual(overview.display_name, 'Course Name')
+
+        # The transaction can still be used
+        self.assertFalse(CourseOverview.objects.filter(id=course.id).exists())
+
+    def test_get_select_courses(self):
+        courses = [CourseFactory.create() for __ in range(3)]
+        missing_course_key = courses[0].id.replace(run='missing')
+        CourseOverview.get_from_id(courses[0].id)
+
+        overviews = CourseOverview.get_select_courses([course.id for course in courses] + [missing_course_key])
+        self.assertEqual(set(overviews), set(course.id for course in courses))
+
+        # Once they all exist, the overviews are fetched with a single query
+        with self.assertNumQueries(1):
+            CourseOverview.get_select_courses([course.id for course in courses])
@@ -35,7 +35,8 @@ def generate_course_structure(course_key):
     """
     Generates a course structure dictionary for the specified course.
     """
-    course = modulestore().get_course(course_key, depth=None)
+    # Only the structure of the course is needed, so the content of its blocks isn't loaded
+    course = modulestore().get_course(course_key, depth=None, lazy=True)
     blocks_stack = [course]
     blocks_dict = {}
     while blocks_stack: